@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Acoustic excitement features per transcript segment.
+
+The pitch track is computed as a block consumer of the waveform pyramid's
+decode (waveform_pyramid.build_pyramid), so loudness, energy onsets and
+pitch all come from the single pass that measures windowed energy:
+- loudness peaks from the pyramid's RMS blocks
+- speech rate from the density of energy onsets (syllable-like rises)
+- pitch spread from a frame-wise autocorrelation f0 estimator at 8 kHz,
+  as a median absolute deviation so stray octave errors don't dominate it
+
+Each feature is scored by its percentile rank among windows of the same
+length across the episode: a short range has less spread than the whole
+episode, so ratios to episode-wide values would read every clip as calm.
+
+The f0 track is stored next to the audio (<audio>.acoustic.npz) alongside the
+.wpyr sidecar; segment features are then range queries with no decoding.
+
+    python acoustic_features.py 08_gpt5_enhanced.wav 12.5 31.0
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+import waveform_pyramid
+
+PITCH_RATE = 8000            # decimated rate for the f0 estimator
+PITCH_FRAME = 0.04           # seconds per autocorrelation frame
+PITCH_HOP = 0.02             # seconds between frames
+F0_RANGE = (70.0, 400.0)     # Hz searched
+VOICING_THRESHOLD = 0.45     # normalized autocorrelation peak for a voiced frame
+OCTAVE_TOLERANCE = 0.85      # shorter-lag peaks this close to the best one win
+SILENCE_DB = -45.0           # frames and windows below this are not speech
+LOUDNESS_WINDOW = 0.1        # seconds per window for loudness peaks
+ONSET_BLOCK = 0.01           # envelope resolution for onsets
+ONSET_RISE_DB = 6.0          # rise over two envelope blocks that counts as an onset
+ONSET_MIN_GAP = 0.1          # seconds between onsets
+MIN_VOICED_FRAMES = 10
+MAD_TO_STD = 1.4826          # scales a median absolute deviation to a normal std
+REFERENCE_STEP = 5.0         # seconds; reference window lengths are rounded to this
+MIN_REFERENCE_WINDOWS = 5    # fewer windows of speech than this give no score
+FORMAT_VERSION = 1
+
+# Excitement component -> the raw feature it ranks
+COMPONENTS = {"loudness": "loudness_peak_db", "speech_rate": "onset_rate", "pitch_variation": "pitch_std_semitones"}
+
+
+def sidecar_path_for(audio_path) -> Path:
+    audio_path = Path(audio_path)
+    return audio_path.with_name(audio_path.name + ".acoustic.npz")
+
+
+class PitchTracker:
+    """Block consumer for build_pyramid: f0 per PITCH_HOP frame (0 where unvoiced)"""
+
+    def __init__(self, sample_rate: int = waveform_pyramid.ANALYSIS_SAMPLE_RATE):
+        self.decimation = max(1, sample_rate // PITCH_RATE)
+        self.rate = sample_rate / self.decimation
+        self.frame = int(round(self.rate * PITCH_FRAME))
+        self.hop = int(round(self.rate * PITCH_HOP))
+        self.min_lag = int(self.rate / F0_RANGE[1])
+        self.max_lag = int(self.rate / F0_RANGE[0])
+        self.size = 1 << (2 * self.frame - 1).bit_length()
+        self.window = np.hanning(self.frame)
+        # Autocorrelation of the window itself, divided out so long lags are not penalized
+        window_ac = np.fft.irfft(np.abs(np.fft.rfft(self.window, self.size)) ** 2, self.size)[:self.max_lag + 1]
+        self.window_ac = window_ac / window_ac[0]
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._decimated = np.zeros(0, dtype=np.float32)
+        self._tracks = []
+
+    def __call__(self, samples: np.ndarray):
+        samples = np.concatenate([self._pending, samples])
+        usable = len(samples) - len(samples) % self.decimation
+        # Averaging before decimation is a crude low-pass; enough for voice f0
+        decimated = samples[:usable].reshape(-1, self.decimation).mean(axis=1)
+        self._pending = samples[usable:]
+        self._decimated = np.concatenate([self._decimated, decimated])
+        if len(self._decimated) < self.frame:
+            return
+        count = (len(self._decimated) - self.frame) // self.hop + 1
+        frames = np.lib.stride_tricks.sliding_window_view(self._decimated, self.frame)[::self.hop][:count]
+        self._tracks.append(self._estimate(frames))
+        self._decimated = self._decimated[count * self.hop:]
+
+    def _estimate(self, frames: np.ndarray) -> np.ndarray:
+        frames = frames - frames.mean(axis=1, keepdims=True)
+        level = np.sqrt((frames.astype(np.float64) ** 2).mean(axis=1))
+        spectrum = np.fft.rfft(frames * self.window, self.size, axis=1)
+        ac = np.fft.irfft(np.abs(spectrum) ** 2, self.size, axis=1)[:, :self.max_lag + 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            normalized = ac / ac[:, :1] / self.window_ac
+        search = np.nan_to_num(normalized[:, self.min_lag:self.max_lag + 1])
+        peak = search.max(axis=1)
+        # Shortest-lag local maximum close to the best one: a periodic frame also
+        # correlates at twice its period, which would read an octave low
+        middle = search[:, 1:-1]
+        candidates = ((middle >= search[:, :-2]) & (middle >= search[:, 2:])
+                      & (middle >= OCTAVE_TOLERANCE * peak[:, None]))
+        best = np.where(candidates.any(axis=1), candidates.argmax(axis=1) + 1, search.argmax(axis=1))
+        voiced = (peak > VOICING_THRESHOLD) & (level > 10 ** (SILENCE_DB / 20))
+        return np.where(voiced, self.rate / (best + self.min_lag), 0.0).astype(np.float32)
+
+    def track(self) -> np.ndarray:
+        return np.concatenate(self._tracks) if self._tracks else np.zeros(0, dtype=np.float32)
+
+
+def build(audio_path) -> Path:
+    """Decode once: rebuild the waveform pyramid and the f0 track together"""
+    audio_path = Path(audio_path)
+    tracker = PitchTracker()
+    waveform_pyramid.build_pyramid(audio_path, block_consumers=[tracker])
+    sidecar = sidecar_path_for(audio_path)
+    stat = audio_path.stat()
+    temp_path = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'wb') as f:
+        np.savez(f, f0=tracker.track(), hop=PITCH_HOP, frame=PITCH_FRAME, version=FORMAT_VERSION,
+                 source=np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64))
+    os.replace(temp_path, sidecar)
+    return sidecar
+
+
+class AcousticFeatures:
+    """Per-range loudness, onset-rate and pitch features relative to the whole episode"""
+
+    def __init__(self, pyramid: waveform_pyramid.WaveformPyramid, f0: np.ndarray, hop: float = PITCH_HOP):
+        self.pyramid = pyramid
+        self.f0 = f0
+        self.hop = hop
+        self._baseline = None
+        self._references = {}
+
+    @classmethod
+    def for_audio(cls, audio_path) -> "AcousticFeatures":
+        """Load the sidecars, rebuilding both in one decode when either is stale"""
+        audio_path = Path(audio_path)
+        stat = audio_path.stat()
+        sidecar = sidecar_path_for(audio_path)
+        for attempt in range(2):
+            if sidecar.exists():
+                with np.load(sidecar) as data:
+                    fresh = (int(data["version"]) == FORMAT_VERSION
+                             and data["source"].tolist() == [stat.st_size, stat.st_mtime_ns])
+                    if fresh:
+                        f0, hop = data["f0"], float(data["hop"])
+                if fresh:
+                    try:
+                        return cls(waveform_pyramid.WaveformPyramid.for_audio(audio_path, build=False), f0, hop)
+                    except (FileNotFoundError, ValueError):
+                        pass
+            if attempt == 0:
+                build(audio_path)
+        raise RuntimeError(f"Could not build acoustic features for {audio_path}")
+
+    def _onsets(self, start: float, end: float) -> int:
+        envelope, block = self.pyramid.window_rms_db(start, end, ONSET_BLOCK)
+        if len(envelope) < 3:
+            return 0
+        rise = envelope[2:] - envelope[:-2]
+        loud = envelope[2:] > SILENCE_DB
+        positions = np.flatnonzero((rise[1:] >= ONSET_RISE_DB) & (rise[:-1] < ONSET_RISE_DB) & loud[1:])
+        if not len(positions):
+            return 0
+        gaps = np.diff(positions, prepend=-10 ** 9) * block
+        return int((gaps >= ONSET_MIN_GAP).sum())
+
+    def _voiced_semitones(self, start: float, end: float) -> np.ndarray:
+        first = max(0, int(start / self.hop))
+        last = min(len(self.f0), int(np.ceil(end / self.hop)))
+        f0 = self.f0[first:last]
+        f0 = f0[f0 > 0]
+        return 12 * np.log2(f0 / np.median(f0)) if len(f0) else f0
+
+    def raw(self, start: float, end: float) -> Dict:
+        windows, window = self.pyramid.window_rms_db(start, end, LOUDNESS_WINDOW)
+        speech = windows[windows > SILENCE_DB]
+        speech_seconds = len(speech) * window
+        semitones = self._voiced_semitones(start, end)
+        return {
+            "loudness_peak_db": float(np.percentile(speech, 95)) if len(speech) else None,
+            "median_db": float(np.median(speech)) if len(speech) else None,
+            "onset_rate": self._onsets(start, end) / speech_seconds if speech_seconds else 0.0,
+            # Robust std: a few frames an octave off would otherwise swamp the spread
+            "pitch_std_semitones": (float(MAD_TO_STD * np.median(np.abs(semitones)))
+                                    if len(semitones) >= MIN_VOICED_FRAMES else None),
+            "voiced_ratio": len(semitones) * self.hop / max(end - start, 1e-9)
+        }
+
+    @property
+    def baseline(self) -> Dict:
+        """Whole-episode values each segment is compared against"""
+        if self._baseline is None:
+            self._baseline = self.raw(0.0, self.pyramid.duration)
+        return self._baseline
+
+    def reference(self, duration: float) -> Dict[str, np.ndarray]:
+        """Sorted feature values of half-overlapping episode windows about `duration` long"""
+        window = max(REFERENCE_STEP, round(duration / REFERENCE_STEP) * REFERENCE_STEP)
+        if window not in self._references:
+            starts = np.arange(0.0, self.pyramid.duration - window + 1e-9, window / 2)
+            windows = [self.raw(start, start + window) for start in starts]
+            # Windows without speech (silence, gaps) would skew every rank up
+            windows = [features for features in windows if features["loudness_peak_db"] is not None]
+            self._references[window] = {
+                name: np.sort([features[key] for features in windows if features[key] is not None])
+                for name, key in COMPONENTS.items()
+            }
+        return self._references[window]
+
+    def segment_features(self, start: float, end: float) -> Dict:
+        """Raw features for a range plus an excitement score (0-10) relative to the episode
+
+        Each component is the range's percentile rank among same-length windows
+        of the episode, scaled to 0-10, so a typical stretch scores about 5.
+        """
+        features = self.raw(start, end)
+        reference = self.reference(end - start)
+        components = {}
+        for name, key in COMPONENTS.items():
+            values = reference[name]
+            if features[key] is None or len(values) < MIN_REFERENCE_WINDOWS:
+                continue
+            # Ties count half, so a range equal to the median window scores 5
+            rank = (np.searchsorted(values, features[key], 'left') + np.searchsorted(values, features[key], 'right')) / 2
+            components[name] = float(rank / len(values) * 10)
+
+        features["components"] = {name: round(value, 1) for name, value in components.items()}
+        features["excitement"] = round(float(np.mean(list(components.values()))), 1) if components else None
+        for key in ("loudness_peak_db", "median_db", "onset_rate", "pitch_std_semitones", "voiced_ratio"):
+            if features[key] is not None:
+                features[key] = round(features[key], 2)
+        return features
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acoustic excitement features for a time range")
+    parser.add_argument("audio")
+    parser.add_argument("start", type=float, nargs="?")
+    parser.add_argument("end", type=float, nargs="?")
+    args = parser.parse_args()
+
+    features = AcousticFeatures.for_audio(args.audio)
+    start = args.start if args.start is not None else 0.0
+    end = args.end if args.end is not None else features.pyramid.duration
+    print(json.dumps({"baseline": features.baseline, "range": features.segment_features(start, end)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
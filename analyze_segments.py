@@ -1,17 +1,15 @@
 #!/usr/bin/env python3
 import subprocess
-import json
 import re
 from typing import List, Dict, Tuple
 
+import media_info
+
 def analyze_audio_segments(audio_file: str, segment_duration: float = 0.5) -> List[Dict]:
     """Analyze audio file in segments to detect speech boundaries"""
     
     # Get audio duration
-    duration_cmd = f'ffprobe -v quiet -print_format json -show_format "{audio_file}"'
-    result = subprocess.run(duration_cmd, shell=True, capture_output=True, text=True)
-    file_info = json.loads(result.stdout)
-    total_duration = float(file_info['format']['duration'])
+    total_duration = media_info.duration(audio_file)
     
     segments = []
     current_time = 0.0
@@ -2,11 +2,11 @@
 """
 Analyze speech patterns in the audio to provide more context
 """
-import subprocess
 import json
-import re
 from datetime import timedelta
 
+import chunked_analysis
+
 def format_timestamp(seconds):
     """Convert seconds to HH:MM:SS.mmm format"""
     td = timedelta(seconds=seconds)
@@ -16,75 +16,23 @@ def format_timestamp(seconds):
     return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
 
 def analyze_audio_levels(audio_path):
-    """Use ffmpeg to analyze audio levels and detect speech patterns"""
-    # Get audio statistics
-    cmd = [
-        'ffmpeg', '-i', audio_path, '-af', 
-        'silencedetect=noise=-30dB:d=0.5,ametadata=print:file=-',
-        '-f', 'null', '-'
-    ]
-    
-    result = subprocess.run(cmd, capture_output=True, text=True, errors='ignore')
-    
-    # Parse silence detection output
-    silence_periods = []
-    speech_segments = []
+    """Detect speech patterns from silence gaps and measure audio levels
     
-    # Extract silence start/end times
-    silence_starts = re.findall(r'silence_start: ([\d.]+)', result.stderr)
-    silence_ends = re.findall(r'silence_end: ([\d.]+)', result.stderr)
-    
-    # Get total duration
-    duration_match = re.search(r'Duration: (\d{2}):(\d{2}):([\d.]+)', result.stderr)
-    if duration_match:
-        hours = int(duration_match.group(1))
-        minutes = int(duration_match.group(2))
-        seconds = float(duration_match.group(3))
-        total_duration = hours * 3600 + minutes * 60 + seconds
-    else:
-        total_duration = 38.23  # fallback from previous analysis
+    Long recordings are split into overlapping chunks analyzed in parallel;
+    the stitched result is the same as one pass over the whole file.
+    """
+    analysis = chunked_analysis.analyze(audio_path, noise_db=-30.0, min_duration=0.5)
+    total_duration = analysis["duration"]
     
     # Build speech segments based on silence gaps
-    current_pos = 0.0
-    
-    for i, (start, end) in enumerate(zip(silence_starts, silence_ends)):
-        start_time = float(start)
-        end_time = float(end)
-        
-        # If there's speech before this silence
-        if start_time > current_pos:
-            speech_segments.append({
-                "start": current_pos,
-                "end": start_time,
-                "duration": start_time - current_pos
-            })
-        
-        current_pos = end_time
-    
-    # Add final speech segment if needed
-    if current_pos < total_duration:
-        speech_segments.append({
-            "start": current_pos,
-            "end": total_duration,
-            "duration": total_duration - current_pos
-        })
-    
-    # Get volume statistics
-    volume_cmd = [
-        'ffmpeg', '-i', audio_path, '-af', 'volumedetect', '-f', 'null', '-'
-    ]
-    volume_result = subprocess.run(volume_cmd, capture_output=True, text=True)
-    
-    # Extract volume info
-    mean_volume = re.search(r'mean_volume: ([-\d.]+) dB', volume_result.stderr)
-    max_volume = re.search(r'max_volume: ([-\d.]+) dB', volume_result.stderr)
+    speech_segments = chunked_analysis.speech_segments(analysis["silences"], total_duration)
     
     audio_stats = {
         "duration": total_duration,
         "speech_segments": len(speech_segments),
         "total_speech_time": sum(seg["duration"] for seg in speech_segments),
-        "mean_volume": mean_volume.group(1) if mean_volume else "Unknown",
-        "max_volume": max_volume.group(1) if max_volume else "Unknown"
+        "mean_volume": f"{analysis['mean_volume']:.1f}" if analysis["mean_volume"] is not None else "Unknown",
+        "max_volume": f"{analysis['max_volume']:.1f}" if analysis["max_volume"] is not None else "Unknown"
     }
     
     return speech_segments, audio_stats
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Two-pass loudness normalization with cached measurements.
+
+The first loudnorm pass measures integrated loudness, true peak, LRA and the
+gating threshold once per episode and caches the result next to the audio
+file. The second pass applies linear normalization to the whole file using
+the cached numbers, so clip renders can reuse the normalized stem instead of
+measuring again.
+"""
+import argparse
+import json
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional
+
+# Podcast standard from quality-controller.md
+TARGET_LOUDNESS = {"I": -16.0, "TP": -1.5, "LRA": 11.0}
+OUTPUT_SAMPLE_RATE = 48000
+OUTPUT_CODEC = "pcm_s24le"
+
+
+def cache_path_for(audio_path) -> Path:
+    """Location of the cached loudnorm measurement for an audio file"""
+    audio_path = Path(audio_path)
+    return audio_path.with_name(audio_path.name + ".loudnorm.json")
+
+
+def _file_signature(path: Path) -> Dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _parse_loudnorm_json(stderr: str) -> Dict:
+    """Extract the JSON block loudnorm prints at the end of a run"""
+    match = re.search(r'\[Parsed_loudnorm[^\]]*\]\s*(\{.*?\})', stderr, re.DOTALL)
+    if not match:
+        raise RuntimeError("loudnorm did not report measurements")
+    return json.loads(match.group(1))
+
+
+def _load_cache(audio_path: Path) -> Dict:
+    cache_path = cache_path_for(audio_path)
+    if not cache_path.exists():
+        return {}
+    with open(cache_path, 'r') as f:
+        cache = json.load(f)
+    # A changed source invalidates everything recorded for it
+    if cache.get("source_signature") != _file_signature(audio_path):
+        return {}
+    return cache
+
+
+def _save_cache(audio_path: Path, cache: Dict):
+    cache["source"] = str(audio_path)
+    cache["source_signature"] = _file_signature(audio_path)
+    with open(cache_path_for(audio_path), 'w') as f:
+        json.dump(cache, f, indent=2)
+
+
+def measure_loudness(audio_path, target: Optional[Dict] = None, use_cache: bool = True) -> Dict:
+    """Run the loudnorm measurement pass, reusing the cached result when valid"""
+    audio_path = Path(audio_path)
+    target = dict(TARGET_LOUDNESS, **(target or {}))
+
+    cache = _load_cache(audio_path) if use_cache else {}
+    measured = cache.get("measured")
+    if measured and cache.get("target") == target:
+        return measured
+
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", str(audio_path),
+        "-af", f"loudnorm=I={target['I']}:TP={target['TP']}:LRA={target['LRA']}:print_format=json",
+        "-f", "null", "-"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, errors='ignore')
+    if result.returncode != 0:
+        raise RuntimeError(f"loudnorm measurement failed for {audio_path}")
+    report = _parse_loudnorm_json(result.stderr)
+
+    measured = {
+        "input_i": float(report["input_i"]),
+        "input_tp": float(report["input_tp"]),
+        "input_lra": float(report["input_lra"]),
+        "input_thresh": float(report["input_thresh"]),
+        "target_offset": float(report["target_offset"])
+    }
+    _save_cache(audio_path, {"target": target, "measured": measured})
+    return measured
+
+
+def normalize_audio(audio_path, output_path=None, target: Optional[Dict] = None,
+                    sample_rate: int = OUTPUT_SAMPLE_RATE) -> Path:
+    """Apply linear two-pass loudness normalization to the full file"""
+    audio_path = Path(audio_path)
+    target = dict(TARGET_LOUDNESS, **(target or {}))
+    output_path = Path(output_path) if output_path else audio_path.with_name(f"{audio_path.stem}_normalized.wav")
+
+    measured = measure_loudness(audio_path, target)
+    cache = _load_cache(audio_path)
+
+    # Skip the render when the stem on disk came from these exact parameters
+    normalized = cache.get("normalized", {})
+    if (normalized.get("path") == str(output_path) and output_path.exists()
+            and normalized.get("signature") == _file_signature(output_path)
+            and normalized.get("target") == target and normalized.get("sample_rate") == sample_rate):
+        return output_path
+
+    loudnorm = (
+        f"loudnorm=I={target['I']}:TP={target['TP']}:LRA={target['LRA']}"
+        f":measured_I={measured['input_i']}:measured_TP={measured['input_tp']}"
+        f":measured_LRA={measured['input_lra']}:measured_thresh={measured['input_thresh']}"
+        f":offset={measured['target_offset']}:linear=true:print_format=json"
+    )
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", str(audio_path),
+        "-af", loudnorm,
+        "-ar", str(sample_rate),
+        "-c:a", OUTPUT_CODEC,
+        "-y", str(output_path)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, errors='ignore')
+    if result.returncode != 0:
+        raise RuntimeError(f"loudnorm normalization failed for {audio_path}")
+    report = _parse_loudnorm_json(result.stderr)
+
+    cache["normalized"] = {
+        "path": str(output_path),
+        "signature": _file_signature(output_path),
+        "target": target,
+        "sample_rate": sample_rate,
+        # loudnorm falls back to dynamic mode when linear gain would break the TP limit
+        "normalization_type": report.get("normalization_type"),
+        "output_i": float(report["output_i"]),
+        "output_tp": float(report["output_tp"])
+    }
+    _save_cache(audio_path, cache)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Two-pass loudness normalization with cached measurements")
+    parser.add_argument("audio", help="Audio file to normalize")
+    parser.add_argument("-o", "--output", default=None, help="Normalized output path")
+    parser.add_argument("--target", type=float, default=TARGET_LOUDNESS["I"], help="Integrated loudness target (LUFS)")
+    parser.add_argument("--true-peak", type=float, default=TARGET_LOUDNESS["TP"], help="True peak limit (dBTP)")
+    parser.add_argument("--lra", type=float, default=TARGET_LOUDNESS["LRA"], help="Loudness range target (LU)")
+    parser.add_argument("--measure-only", action="store_true", help="Only run (or read) the measurement pass")
+    args = parser.parse_args()
+
+    target = {"I": args.target, "TP": args.true_peak, "LRA": args.lra}
+
+    print(f"Measuring loudness: {args.audio}")
+    measured = measure_loudness(args.audio, target)
+    print(f"  Integrated: {measured['input_i']:.2f} LUFS")
+    print(f"  True peak: {measured['input_tp']:.2f} dBTP")
+    print(f"  LRA: {measured['input_lra']:.2f} LU")
+    print(f"  Offset: {measured['target_offset']:+.2f} LU")
+    print(f"  Cached at: {cache_path_for(args.audio)}")
+
+    if not args.measure_only:
+        output_path = normalize_audio(args.audio, args.output, target)
+        print(f"\nNormalized audio saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Per-episode 48 kHz PCM intermediate with a sample-offset index.
+
+The episode audio is resampled once into an uncompressed WAV whose data chunk
+offset and frame layout are recorded in a JSON index. Clip audio is then cut
+as an exact sample range by seeking straight to the byte offset, so no clip
+has to decode or resample the full file again.
+"""
+import json
+import os
+import struct
+import subprocess
+import wave
+from pathlib import Path
+from typing import Dict
+
+INTERMEDIATE_SAMPLE_RATE = 48000
+INTERMEDIATE_CODEC = "pcm_s24le"
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# SubFormat GUID of an EXTENSIBLE fmt chunk holding integer PCM (the float one differs in its first byte)
+KSDATAFORMAT_SUBTYPE_PCM = b'\x01\x00\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71'
+
+
+def index_path_for(intermediate_path) -> Path:
+    intermediate_path = Path(intermediate_path)
+    return intermediate_path.with_name(intermediate_path.name + ".index.json")
+
+
+def _file_signature(path: Path) -> Dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def read_wav_layout(path) -> Dict:
+    """Walk the RIFF chunks of a WAV file and locate its PCM data"""
+    with open(path, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError(f"{path} is not a RIFF/WAVE file")
+
+        layout = {}
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                format_tag, channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+                layout.update({
+                    "format_tag": format_tag,
+                    "channels": channels,
+                    "sample_rate": sample_rate,
+                    "block_align": block_align,
+                    "bits_per_sample": bits
+                })
+                if format_tag == WAVE_FORMAT_EXTENSIBLE:
+                    # cbSize, valid bits and channel mask precede the real format's GUID
+                    (extension_size,) = struct.unpack('<H', fmt[16:18])
+                    if extension_size < 22 or len(fmt) < 40:
+                        raise ValueError(f"{path} has a truncated WAVE_FORMAT_EXTENSIBLE fmt chunk")
+                    layout["sub_format"] = fmt[24:40].hex()
+                if chunk_size % 2:
+                    f.seek(1, 1)
+            elif chunk_id == b'data':
+                layout["data_offset"] = f.tell()
+                layout["data_size"] = chunk_size
+                break
+            else:
+                f.seek(chunk_size + (chunk_size % 2), 1)
+
+    if "data_offset" not in layout or "block_align" not in layout:
+        raise ValueError(f"{path} has no fmt/data chunk")
+    if layout["format_tag"] == WAVE_FORMAT_EXTENSIBLE:
+        pcm = layout["sub_format"] == KSDATAFORMAT_SUBTYPE_PCM.hex()
+    else:
+        pcm = layout["format_tag"] == WAVE_FORMAT_PCM
+    if not pcm:
+        raise ValueError(f"{path} is not integer PCM")
+
+    # Streams written without a known length leave a placeholder data size
+    available = Path(path).stat().st_size - layout["data_offset"]
+    if layout["data_size"] in (0, 0xFFFFFFFF) or layout["data_size"] > available:
+        layout["data_size"] = available
+    layout["frames"] = layout["data_size"] // layout["block_align"]
+    return layout
+
+
+def load_index(intermediate_path) -> Dict:
+    """Load the index kept for an intermediate path if the audio it points at still matches"""
+    index_path = index_path_for(intermediate_path)
+    if not index_path.exists():
+        return {}
+    with open(index_path, 'r') as f:
+        index = json.load(f)
+    # The indexed audio is the source itself when it needed no resampling
+    indexed = Path(index.get("path", intermediate_path))
+    if not indexed.exists() or index.get("signature") != _file_signature(indexed):
+        return {}
+    return index
+
+
+def build_intermediate(audio_path, output_path, sample_rate: int = INTERMEDIATE_SAMPLE_RATE) -> Dict:
+    """Resample the episode audio once and index its sample offsets"""
+    audio_path = Path(audio_path)
+    output_path = Path(output_path)
+
+    index = load_index(output_path)
+    if index and index.get("source") == str(audio_path) \
+            and index.get("source_signature") == _file_signature(audio_path) \
+            and index.get("sample_rate") == sample_rate:
+        return index
+
+    # A PCM WAV already at the target rate (e.g. the normalized stem) is indexed in
+    # place; its index still lives at output_path's index path, where the lookup is
+    try:
+        source_layout = read_wav_layout(audio_path)
+    except (ValueError, struct.error):
+        source_layout = None
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if source_layout and source_layout["sample_rate"] == sample_rate:
+        data_path = audio_path
+    else:
+        data_path = output_path
+        cmd = [
+            "ffmpeg", "-v", "error",
+            "-i", str(audio_path),
+            "-map", "0:a:0",
+            "-ar", str(sample_rate),
+            "-c:a", INTERMEDIATE_CODEC,
+            "-rf64", "never",
+            "-y", str(output_path)
+        ]
+        subprocess.run(cmd, check=True)
+
+    layout = read_wav_layout(data_path)
+    index = dict(layout, **{
+        "path": str(data_path),
+        "signature": _file_signature(data_path),
+        "source": str(audio_path),
+        "source_signature": _file_signature(audio_path),
+        "duration": layout["frames"] / layout["sample_rate"]
+    })
+    index_path = index_path_for(output_path)
+    temp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(temp_path, index_path)
+    return index
+
+
+def sample_range(index: Dict, start: float, end: float):
+    """Frame range [first, last) covering start..end seconds"""
+    first = max(0, round(start * index["sample_rate"]))
+    last = min(index["frames"], round(end * index["sample_rate"]))
+    return first, max(first, last)
+
+
+def write_slice(index: Dict, start: float, end: float, output_path) -> Path:
+    """Copy the exact sample range start..end into a standalone WAV"""
+    first, last = sample_range(index, start, end)
+    block_align = index["block_align"]
+
+    with open(index["path"], 'rb') as f:
+        f.seek(index["data_offset"] + first * block_align)
+        frames = f.read((last - first) * block_align)
+
+    # Renamed into place so a concurrent reader never sees a half-written slice
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f"{output_path.stem}.{os.getpid()}.tmp{output_path.suffix}")
+    with wave.open(str(temp_path), 'wb') as out:
+        out.setnchannels(index["channels"])
+        out.setsampwidth(block_align // index["channels"])
+        out.setframerate(index["sample_rate"])
+        out.writeframes(frames)
+    os.replace(temp_path, output_path)
+    return output_path
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the audio analysis and clip rendering hot paths.
+
+Synthesizes deterministic test media with ffmpeg lavfi sources, times the
+pipeline functions against it and writes the results (wall time, realtime
+factor, peak RSS) to JSON. A stored result file can be used as a baseline
+to flag regressions.
+
+Examples:
+    python benchmark.py --output bench_results.json
+    python benchmark.py --durations 60 --compare bench_baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_DURATIONS = [60, 600, 3600]
+DEFAULT_SEGMENT_COUNTS = [1000, 10000, 100000]
+DEFAULT_THRESHOLD = 0.10
+
+# Words used to build synthetic transcripts, mixed so that some segments hit
+# the analyzer's viral keywords, numbers and punctuation checks.
+TRANSCRIPT_WORDS = [
+    "the", "model", "will", "release", "this", "summer", "and", "it", "is",
+    "going", "to", "be", "leaked", "breakthrough", "benchmarks", "show",
+    "GPT-5", "OpenAI", "pricing", "enterprise", "reasoning", "multimodal",
+    "100", "times", "more", "powerful", "confirmed", "secret", "insane",
+]
+
+
+def synthesize_audio(path: Path, duration: float, sample_rate: int = 48000) -> Path:
+    """Create a deterministic speech-like test signal with silent gaps"""
+    # A 220 Hz tone mixed with seeded noise, gated off for 0.5 s every 4 s so
+    # the silence detectors have boundaries to find.
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate={sample_rate}:duration={duration}",
+        "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.05:seed=42:sample_rate={sample_rate}:duration={duration}",
+        "-filter_complex", "[0:a][1:a]amix=inputs=2:normalize=0,volume=volume=0:enable='lt(mod(t,4),0.5)'",
+        "-ac", "1", "-c:a", "pcm_s16le",
+        "-y", str(path)
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def synthesize_video(path: Path, duration: float) -> Path:
+    """Create a deterministic 1080p test video with a tone soundtrack"""
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc=size=1920x1080:rate=30:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "28",
+        "-c:a", "aac", "-b:a", "128k",
+        "-shortest", "-y", str(path)
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def synthesize_transcript(segment_count: int, seed: int = 1234) -> Dict:
+    """Build a transcript dict shaped like 08_gpt5_enhanced_transcript.json"""
+    from content_analysis import PodcastContentAnalyzer
+
+    rng = random.Random(seed)
+    analyzer = PodcastContentAnalyzer()
+    segments = []
+    current = 0.0
+
+    for _ in range(segment_count):
+        duration = rng.uniform(2.0, 40.0)
+        words = rng.choices(TRANSCRIPT_WORDS, k=rng.randint(8, 30))
+        text = " ".join(words) + rng.choice([".", "!", "?"])
+        segments.append({
+            "start_time": analyzer.format_timestamp(current),
+            "end_time": analyzer.format_timestamp(current + duration),
+            "speaker": f"Speaker {rng.randint(1, 2)}",
+            "text": text,
+            "confidence": 0.9
+        })
+        current += duration + rng.uniform(0.2, 1.5)
+
+    return {
+        "segments": segments,
+        "metadata": {
+            "duration": analyzer.format_timestamp(current),
+            "speakers_detected": 2,
+            "language": "en"
+        }
+    }
+
+
+def prepare_media(work_dir: Path, durations: List[int], with_video: bool) -> Dict[int, Dict[str, str]]:
+    """Synthesize (or reuse) the test media for every duration"""
+    media = {}
+    for duration in durations:
+        audio_path = work_dir / f"bench_audio_{duration}s.wav"
+        if not audio_path.exists():
+            print(f"Synthesizing {duration}s audio...")
+            synthesize_audio(audio_path, duration)
+        media[duration] = {"audio": str(audio_path)}
+
+        if with_video:
+            video_path = work_dir / f"bench_video_{duration}s.mp4"
+            if not video_path.exists():
+                print(f"Synthesizing {duration}s video...")
+                synthesize_video(video_path, duration)
+            media[duration]["video"] = str(video_path)
+    return media
+
+
+def _peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set size of this process and its waited-for children"""
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "peak_rss_mb": round(own / scale, 2),
+        "peak_child_rss_mb": round(children / scale, 2)
+    }
+
+
+def _run_case(case: Dict) -> Dict:
+    """Execute one benchmark case; runs in a fresh process so RSS is isolated"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    name = case["name"]
+    params = case["params"]
+
+    if name == "analyze_segments.analyze_audio_segments":
+        from analyze_segments import analyze_audio_segments
+        target = lambda: analyze_audio_segments(params["audio"], segment_duration=0.5)
+    elif name == "transcribe_local.analyze_audio_segments":
+        from transcribe_local import analyze_audio_segments
+        target = lambda: analyze_audio_segments(params["audio"])
+    elif name == "run_silence_detection":
+        from detailed_timestamp_analysis import run_silence_detection
+        target = lambda: run_silence_detection(params["audio"])
+    elif name == "analyze_full_audio":
+        from detailed_timestamp_analysis import analyze_full_audio
+        target = lambda: analyze_full_audio(params["audio"])
+    elif name == "quality_metrics.measure":
+        from quality_metrics import measure
+        target = lambda: measure(params["audio"])
+    elif name == "generate_analysis_report":
+        from content_analysis import PodcastContentAnalyzer
+        transcript = synthesize_transcript(params["segments"])
+        analyzer = PodcastContentAnalyzer()
+        target = lambda: analyzer.generate_analysis_report(transcript)
+    elif name == "generate_all_clips":
+        from generate_social_clips import SocialMediaClipGenerator
+        output_dir = tempfile.mkdtemp(prefix="bench_clips_")
+        generator = SocialMediaClipGenerator(params["video"], params["audio"], output_dir=output_dir)
+        target = generator.generate_all_clips
+    else:
+        raise ValueError(f"Unknown benchmark case: {name}")
+
+    start = time.perf_counter()
+    target()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "name": name,
+        "params": {k: v for k, v in params.items() if k not in ("audio", "video")},
+        "wall_seconds": round(elapsed, 4)
+    }
+    if "media_seconds" in params:
+        result["realtime_factor"] = round(params["media_seconds"] / elapsed, 2) if elapsed > 0 else None
+    if "segments" in params:
+        result["segments_per_second"] = round(params["segments"] / elapsed, 1) if elapsed > 0 else None
+    result.update(_peak_rss_mb())
+    return result
+
+
+def case_key(result: Dict) -> str:
+    """Stable identifier for matching a result against the baseline"""
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def build_cases(media: Dict[int, Dict[str, str]], segment_counts: List[int], include_clips: bool,
+                include_per_window: bool) -> List[Dict]:
+    """List every benchmark case to run"""
+    cases = []
+    for duration, files in media.items():
+        base = {"audio": files["audio"], "media_seconds": duration}
+        cases.append({"name": "run_silence_detection", "params": dict(base)})
+        cases.append({"name": "analyze_full_audio", "params": dict(base)})
+        cases.append({"name": "quality_metrics.measure", "params": dict(base)})
+        cases.append({"name": "transcribe_local.analyze_audio_segments", "params": dict(base)})
+        # One ffmpeg launch per 0.5 s window; only run it when asked for long inputs
+        if include_per_window or duration <= 60:
+            cases.append({"name": "analyze_segments.analyze_audio_segments", "params": dict(base)})
+        if include_clips and "video" in files:
+            cases.append({"name": "generate_all_clips", "params": dict(base, video=files["video"])})
+
+    for count in segment_counts:
+        cases.append({"name": "generate_analysis_report", "params": {"segments": count}})
+    return cases
+
+
+def run_benchmarks(cases: List[Dict], repeat: int = 1) -> List[Dict]:
+    """Run each case in its own process, keeping the fastest of `repeat` runs"""
+    results = []
+    ctx = get_context("spawn")
+    for case in cases:
+        best = None
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                result = pool.submit(_run_case, case).result()
+            if best is None or result["wall_seconds"] < best["wall_seconds"]:
+                best = result
+        print(f"  {case_key(best)}: {best['wall_seconds']:.3f}s"
+              + (f" ({best['realtime_factor']}x realtime)" if best.get("realtime_factor") else ""))
+        results.append(best)
+    return results
+
+
+def compare_results(results: List[Dict], baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Flag cases whose wall time grew by more than `threshold` over the baseline"""
+    baseline_by_key = {case_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+
+    for result in results:
+        key = case_key(result)
+        previous = baseline_by_key.get(key)
+        if not previous:
+            continue
+        change = (result["wall_seconds"] - previous["wall_seconds"]) / previous["wall_seconds"] \
+            if previous["wall_seconds"] else 0.0
+        result["baseline_wall_seconds"] = previous["wall_seconds"]
+        result["change"] = round(change, 4)
+        if change > threshold:
+            regressions.append({
+                "case": key,
+                "baseline_wall_seconds": previous["wall_seconds"],
+                "wall_seconds": result["wall_seconds"],
+                "change": f"{change:+.1%}"
+            })
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the podcast analysis and clip pipeline")
+    parser.add_argument("--durations", type=int, nargs="+", default=DEFAULT_DURATIONS,
+                        help="Synthetic media durations in seconds")
+    parser.add_argument("--segments", type=int, nargs="+", default=DEFAULT_SEGMENT_COUNTS,
+                        help="Synthetic transcript sizes for the content analyzer")
+    parser.add_argument("--work-dir", default=None, help="Where to keep synthesized media (reused between runs)")
+    parser.add_argument("--output", default="bench_results.json", help="Result JSON path")
+    parser.add_argument("--compare", default=None, help="Baseline result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown that counts as a regression")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is kept")
+    parser.add_argument("--skip-clips", action="store_true", help="Do not benchmark generate_all_clips")
+    parser.add_argument("--per-window", action="store_true",
+                        help="Also run analyze_segments.analyze_audio_segments on long inputs")
+    args = parser.parse_args(argv)
+
+    work_dir = Path(args.work_dir or Path(tempfile.gettempdir()) / "podcast_bench_media")
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    media = prepare_media(work_dir, args.durations, with_video=not args.skip_clips)
+    cases = build_cases(media, args.segments, not args.skip_clips, args.per_window)
+
+    print(f"Running {len(cases)} benchmark cases...")
+    results = run_benchmarks(cases, repeat=args.repeat)
+
+    report = {
+        "benchmark_timestamp": datetime.now().isoformat(),
+        "host": {"platform": sys.platform, "cpu_count": os.cpu_count(), "python": sys.version.split()[0]},
+        "results": results
+    }
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        report["baseline"] = args.compare
+        report["regressions"] = regressions
+        if regressions:
+            exit_code = 1
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for reg in regressions:
+                print(f"- {reg['case']}: {reg['baseline_wall_seconds']}s -> {reg['wall_seconds']}s ({reg['change']})")
+        else:
+            print("\nNo regressions against baseline.")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nBenchmark results saved to: {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Word-level karaoke captions for social clips.
+
+A moment's text is split into short timed phrases (from word timings in the
+transcript when available, otherwise estimated from word length). Each moment
+gets one ASS file with karaoke highlighting, and each output resolution gets
+one transparent overlay render of it, which every platform at that
+resolution composites instead of re-running libass in its own encode.
+"""
+import os
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Reference canvas the ASS file is authored against; libass scales it by
+# frame height, so the same file works for 9:16 and 16:9 renders.
+PLAY_RES_X = 1080
+PLAY_RES_Y = 1920
+
+MAX_WORDS_PER_CUE = 3
+PHRASE_BREAK = re.compile(r'[.,!?;:]$')
+
+ASS_STYLE = {
+    "font": "Arial",
+    "font_size": 96,
+    "highlight_colour": "&H0000FFFF",   # yellow once spoken
+    "text_colour": "&H00FFFFFF",        # white before
+    "outline_colour": "&H00000000",
+    "outline": 5,
+    "margin_v": 300
+}
+
+
+def split_words(text: str, duration: float, word_timings: Optional[List[Dict]] = None,
+                offset: float = 0.0) -> List[Dict]:
+    """Time every word of a caption, relative to the start of the clip
+
+    word_timings entries carry absolute episode times ({"word", "start", "end"});
+    `offset` is the clip start used to rebase them. Without timings the
+    duration is shared out in proportion to word length.
+    """
+    if word_timings:
+        words = []
+        for timing in word_timings:
+            start = max(0.0, timing["start"] - offset)
+            end = min(duration, timing["end"] - offset)
+            if end > start:
+                words.append({"word": timing["word"], "start": start, "end": end})
+        return words
+
+    tokens = text.split()
+    if not tokens:
+        return []
+    # Longer words take longer to say; punctuation implies a short pause
+    weights = [len(t) + 2 + (3 if PHRASE_BREAK.search(t) else 0) for t in tokens]
+    scale = duration / sum(weights)
+
+    words = []
+    current = 0.0
+    for token, weight in zip(tokens, weights):
+        words.append({"word": token, "start": current, "end": current + weight * scale})
+        current += weight * scale
+    words[-1]["end"] = duration
+    return words
+
+
+def group_cues(words: List[Dict], max_words: int = MAX_WORDS_PER_CUE) -> List[Dict]:
+    """Group timed words into short phrases, breaking at punctuation"""
+    cues = []
+    current = []
+    for word in words:
+        current.append(word)
+        if len(current) >= max_words or PHRASE_BREAK.search(word["word"]):
+            cues.append(current)
+            current = []
+    if current:
+        cues.append(current)
+
+    return [{
+        "start": group[0]["start"],
+        "end": group[-1]["end"],
+        "text": " ".join(w["word"] for w in group),
+        "words": group
+    } for group in cues]
+
+
+def build_cues(moment: Dict, duration: float, offset: float = 0.0) -> List[Dict]:
+    """Timed caption cues for a moment dict from the clip generator"""
+    words = split_words(moment["text"], duration, moment.get("words"), offset)
+    return group_cues(words)
+
+
+def _srt_time(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def _ass_time(seconds: float) -> str:
+    centis = int(round(seconds * 100))
+    hours, centis = divmod(centis, 360000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+
+def _ass_escape(text: str) -> str:
+    return text.replace("\\", "/").replace("{", "(").replace("}", ")")
+
+
+def write_srt(cues: List[Dict], output_path) -> Path:
+    """Write the phrase cues as an SRT file"""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    blocks = [f"{i}\n{_srt_time(cue['start'])} --> {_srt_time(cue['end'])}\n{cue['text']}\n"
+              for i, cue in enumerate(cues, 1)]
+    temp_path = _temp_path(output_path)
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(blocks))
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def write_ass(cues: List[Dict], output_path, style: Optional[Dict] = None) -> Path:
+    """Write the cues as an ASS script with per-word karaoke highlighting"""
+    style = dict(ASS_STYLE, **(style or {}))
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {PLAY_RES_X}",
+        f"PlayResY: {PLAY_RES_Y}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Caption,{style['font']},{style['font_size']},{style['highlight_colour']},{style['text_colour']},"
+        f"{style['outline_colour']},&H80000000,1,0,0,0,100,100,0,0,1,{style['outline']},0,2,60,60,"
+        f"{style['margin_v']},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"
+    ]
+    for cue in cues:
+        # \kf sweeps the highlight across each word over its spoken duration
+        karaoke = " ".join(
+            f"{{\\kf{max(1, int(round((w['end'] - w['start']) * 100)))}}}{_ass_escape(w['word'])}"
+            for w in cue["words"]
+        )
+        lines.append(f"Dialogue: 0,{_ass_time(cue['start'])},{_ass_time(cue['end'])},Caption,,0,0,0,,{karaoke}")
+
+    # Written aside and renamed: other render processes may be reading the script
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = _temp_path(output_path)
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def _temp_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+
+
+def _filter_path(path: Path) -> str:
+    """Escape a path for use inside an ffmpeg filter argument"""
+    return str(path).replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+
+
+def render_overlay(ass_path, width: int, height: int, duration: float, output_path,
+                   fps: float = 30) -> Path:
+    """Rasterize the captions once into a transparent video stream"""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = _temp_path(output_path)
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi",
+        "-i", f"color=c=black@0.0:s={width}x{height}:r={fps}:d={duration:.3f},format=rgba",
+        "-vf", f"ass='{_filter_path(Path(ass_path))}':alpha=1",
+        # qtrle keeps the alpha channel and run-length codes the empty canvas cheaply
+        "-c:v", "qtrle",
+        "-y", str(temp_path)
+    ]
+    subprocess.run(cmd, check=True)
+    os.replace(temp_path, output_path)
+    return output_path
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Chunk-parallel silence and level analysis for long recordings.
+
+A single silencedetect/volumedetect pass decodes a 3-hour episode on one core.
+Here the file is split into whole-second chunks that overlap their neighbours;
+each chunk is decoded by its own ffmpeg process and scanned with numpy for
+runs of frames below the noise floor, all chunks at once. Silence runs are
+tracked in sample indices, so runs crossing chunk edges are stitched exactly:
+
+- a run belongs to the chunk whose core contains its first frame; the leading
+  overlap shows the frame before it, so its start is never cut off
+- the trailing overlap is at least the minimum duration, so every run that
+  starts in a core is long enough to be reported by that chunk
+- a run still open at the end of a chunk takes its end from the next chunk(s)
+
+The stitched result equals a whole-file pass frame for frame
+(test_chunked_analysis.py checks this on synthetic lavfi audio with silences
+placed across chunk edges; `verify` repeats the check on a real file).
+Levels are summed over chunk cores only.
+
+    python chunked_analysis.py silence 08_gpt5_enhanced.wav --noise -18 --duration 0.2
+    python chunked_analysis.py verify                # synthetic equivalence check
+    python chunked_analysis.py verify episode.wav    # whole-file vs chunked on a real file
+"""
+import argparse
+import json
+import math
+import re
+import subprocess
+import tempfile
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import audio_intermediate
+import media_info
+
+CHUNK_SECONDS = 600
+READ_FRAMES = 1 << 16
+DEFAULT_WORKERS = 8
+
+
+def stream_info(audio_path) -> Dict:
+    """Sample rate, channels and frame count (exact for PCM WAV, from the shared probe cache otherwise)"""
+    try:
+        layout = audio_intermediate.read_wav_layout(audio_path)
+        return {"sample_rate": layout["sample_rate"], "channels": layout["channels"], "frames": layout["frames"]}
+    except (ValueError, OSError):
+        pass
+    sample_rate = media_info.sample_rate(audio_path)
+    if sample_rate is None:
+        raise RuntimeError(f"No audio stream in {audio_path}")
+    return {
+        "sample_rate": sample_rate,
+        "channels": media_info.channels(audio_path),
+        "frames": int(round(media_info.duration(audio_path) * sample_rate))
+    }
+
+
+def plan_chunks(frames: int, sample_rate: int, chunk_seconds: Optional[int] = CHUNK_SECONDS,
+                min_duration: float = 0.2) -> List[Dict]:
+    """Chunk cores covering the file, each extended by an overlap on both sides
+
+    Boundaries fall on whole seconds so every ffmpeg seek is sample-exact.
+    The last chunk has no end and reads to EOF.
+    """
+    if not chunk_seconds or frames <= chunk_seconds * sample_rate:
+        return [{"index": 0, "core_start": 0, "core_end": None, "start": 0, "end": None}]
+
+    overlap = (math.ceil(min_duration) + 1) * sample_rate
+    step = chunk_seconds * sample_rate
+    starts = list(range(0, frames, step))
+    chunks = []
+    for i, core_start in enumerate(starts):
+        last = i == len(starts) - 1
+        chunks.append({
+            "index": i,
+            "core_start": core_start,
+            "core_end": None if last else core_start + step,
+            "start": max(0, core_start - overlap),
+            "end": None if last else core_start + step + overlap
+        })
+    return chunks
+
+
+class SilenceTracker:
+    """Streaming detector for runs of frames whose every channel is below the threshold"""
+
+    def __init__(self, threshold: float, min_frames: int):
+        self.threshold = threshold
+        self.min_frames = min_frames
+        self.position = 0
+        self.run_start = None
+        self.runs = []
+        self.sum_squares = 0.0
+        self.peak = 0.0
+        self.level_frames = 0
+
+    def _emit(self, start: int, end: int):
+        if end - start >= self.min_frames:
+            self.runs.append((start, end))
+
+    def feed(self, block: np.ndarray, level_range=None):
+        """Scan frames x channels samples; level_range limits level stats to [a, b) of the block"""
+        n = len(block)
+        if n == 0:
+            return
+        if level_range is not None:
+            a, b = level_range
+            if b > a:
+                core = block[a:b].astype(np.float64)
+                self.sum_squares += float(np.square(core).sum())
+                self.peak = max(self.peak, float(np.abs(core).max()))
+                self.level_frames += b - a
+
+        silent = (np.abs(block) < self.threshold).all(axis=1).astype(np.int8)
+        edges = np.diff(np.concatenate([[0], silent, [0]]))
+        starts = np.flatnonzero(edges == 1) + self.position
+        ends = np.flatnonzero(edges == -1) + self.position
+
+        if self.run_start is not None:
+            if len(starts) and starts[0] == self.position:
+                starts[0] = self.run_start
+            else:
+                self._emit(self.run_start, self.position)
+            self.run_start = None
+        if len(ends) and ends[-1] == self.position + n:
+            self.run_start = int(starts[-1])
+            starts, ends = starts[:-1], ends[:-1]
+
+        keep = ends - starts >= self.min_frames
+        self.runs.extend(zip(starts[keep].tolist(), ends[keep].tolist()))
+        self.position += n
+
+    def finish(self) -> List[tuple]:
+        if self.run_start is not None:
+            self._emit(self.run_start, self.position)
+            self.run_start = None
+        return self.runs
+
+
+def analyze_chunk(audio_path, chunk: Dict, info: Dict, threshold: float, min_frames: int) -> Dict:
+    """Decode one chunk and return its silence runs (absolute frames) and core level sums"""
+    sample_rate, channels = info["sample_rate"], info["channels"]
+    cmd = ["ffmpeg", "-v", "error", "-threads", "1"]
+    if chunk["start"]:
+        cmd.extend(["-ss", str(chunk["start"] // sample_rate)])
+    if chunk["end"] is not None:
+        cmd.extend(["-t", str((chunk["end"] - chunk["start"]) // sample_rate)])
+    cmd.extend(["-i", str(audio_path), "-map", "0:a:0", "-f", "f32le", "-acodec", "pcm_f32le", "-"])
+
+    tracker = SilenceTracker(threshold, min_frames)
+    core_first = chunk["core_start"] - chunk["start"]
+    core_last = None if chunk["core_end"] is None else chunk["core_end"] - chunk["start"]
+    frame_bytes = 4 * channels
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    while True:
+        data = process.stdout.read(READ_FRAMES * frame_bytes)
+        if not data:
+            break
+        block = np.frombuffer(data[:len(data) // frame_bytes * frame_bytes], dtype=np.float32).reshape(-1, channels)
+        a = min(max(core_first - tracker.position, 0), len(block))
+        b = len(block) if core_last is None else min(max(core_last - tracker.position, 0), len(block))
+        tracker.feed(block, (a, b))
+    process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {audio_path} from frame {chunk['start']}")
+
+    runs = tracker.finish()
+    return {
+        "chunk": chunk,
+        "frames": tracker.position,
+        "runs": [(start + chunk["start"], end + chunk["start"]) for start, end in runs],
+        "sum_squares": tracker.sum_squares,
+        "peak": tracker.peak,
+        "level_frames": tracker.level_frames
+    }
+
+
+def stitch_runs(results: List[Dict]) -> List[tuple]:
+    """Whole-file silence runs from per-chunk runs"""
+    runs = []
+    for i, result in enumerate(results):
+        chunk = result["chunk"]
+        chunk_end = chunk["start"] + result["frames"]
+        for start, end in result["runs"]:
+            if start < chunk["core_start"] or (chunk["core_end"] is not None and start >= chunk["core_end"]):
+                continue
+            # Still silent at the end of a chunk that stops before EOF: the run continues
+            j, reached = i, chunk_end
+            while end == reached and j + 1 < len(results):
+                j += 1
+                following = results[j]
+                continuation = next(((s, e) for s, e in following["runs"] if s < reached <= e), None)
+                if continuation is None:
+                    break
+                end = continuation[1]
+                reached = following["chunk"]["start"] + following["frames"]
+            runs.append((start, end))
+    return runs
+
+
+def analyze(audio_path, noise_db: float = -18.0, min_duration: float = 0.2,
+            chunk_seconds: Optional[int] = CHUNK_SECONDS, workers: Optional[int] = None) -> Dict:
+    """Silence periods and volume statistics of a whole file, analyzed in parallel chunks"""
+    info = stream_info(audio_path)
+    sample_rate = info["sample_rate"]
+    threshold = 10 ** (noise_db / 20)
+    min_frames = int(round(min_duration * sample_rate))
+
+    chunks = plan_chunks(info["frames"], sample_rate, chunk_seconds, min_duration)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers or DEFAULT_WORKERS, len(chunks)))) as pool:
+        results = list(pool.map(lambda c: analyze_chunk(audio_path, c, info, threshold, min_frames), chunks))
+
+    frames = results[-1]["chunk"]["start"] + results[-1]["frames"]
+    silences = [{
+        "start": round(start / sample_rate, 6),
+        "end": round(end / sample_rate, 6),
+        "duration": round((end - start) / sample_rate, 6)
+    } for start, end in stitch_runs(results)]
+
+    samples = sum(r["level_frames"] for r in results) * info["channels"]
+    sum_squares = sum(r["sum_squares"] for r in results)
+    peak = max(r["peak"] for r in results)
+    return {
+        "duration": frames / sample_rate,
+        "sample_rate": sample_rate,
+        "channels": info["channels"],
+        "chunks": len(chunks),
+        "silences": silences,
+        "mean_volume": 10 * math.log10(sum_squares / samples) if samples and sum_squares > 0 else None,
+        "max_volume": 20 * math.log10(peak) if peak > 0 else None
+    }
+
+
+def detect_silence(audio_path, noise_db: float = -18.0, min_duration: float = 0.2,
+                   chunk_seconds: Optional[int] = CHUNK_SECONDS, workers: Optional[int] = None) -> List[Dict]:
+    """Silence periods as {start, end, duration} seconds, like ffmpeg's silencedetect"""
+    return analyze(audio_path, noise_db, min_duration, chunk_seconds, workers)["silences"]
+
+
+def speech_segments(silences: List[Dict], duration: float) -> List[Dict]:
+    """Speech between silence periods, from the file start to its end"""
+    segments = []
+    position = 0.0
+    for silence in silences:
+        if silence["start"] > position:
+            segments.append({"start": position, "end": silence["start"], "duration": silence["start"] - position})
+        position = silence["end"]
+    if position < duration:
+        segments.append({"start": position, "end": duration, "duration": duration - position})
+    return segments
+
+
+def _ffmpeg_silencedetect(audio_path, noise_db: float, min_duration: float) -> List[Dict]:
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats", "-i", str(audio_path),
+        "-af", f"silencedetect=n={noise_db}dB:d={min_duration}", "-f", "null", "-"
+    ]
+    stderr = subprocess.run(cmd, capture_output=True, text=True, errors='ignore').stderr
+    starts = [float(x) for x in re.findall(r'silence_start:\s*([\d.]+)', stderr)]
+    ends = [float(x) for x in re.findall(r'silence_end:\s*([\d.]+)', stderr)]
+    return [{"start": s, "end": e} for s, e in zip(starts, ends)]
+
+
+def synthesize_test_audio(path, sample_rate: int = 48000, chunk_seconds: int = 7) -> Path:
+    """Stereo noise with silences placed on, across and far beyond chunk edges"""
+    rng = np.random.default_rng(7)
+    duration = 10 * chunk_seconds + 3
+    audio = rng.normal(0, 0.3, (duration * sample_rate, 2)).clip(-0.99, 0.99)
+    gaps = [
+        (0.0, 0.6),                                              # file start
+        (chunk_seconds - 0.1, chunk_seconds + 0.15),             # across an edge, long enough only in total
+        (2 * chunk_seconds - 0.35, 2 * chunk_seconds),           # ends exactly on an edge
+        (3 * chunk_seconds, 3 * chunk_seconds + 0.5),            # starts exactly on an edge
+        (4 * chunk_seconds - 1.5, 4 * chunk_seconds + 0.05),     # starts in the previous chunk's overlap
+        (5 * chunk_seconds - 0.2, 7 * chunk_seconds + 0.3),      # spans several chunks
+        (8 * chunk_seconds + 2.0, 8 * chunk_seconds + 2.1),      # too short everywhere
+        (duration - 0.9, duration)                               # file end
+    ]
+    for start, end in gaps:
+        audio[int(round(start * sample_rate)):int(round(end * sample_rate))] *= 0.001
+    with wave.open(str(path), 'wb') as out:
+        out.setnchannels(2)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes((audio * 32767).astype('<i2').tobytes())
+    return Path(path)
+
+
+def verify(audio_path=None, chunk_seconds: int = 7, noise_db: float = -18.0, min_duration: float = 0.2) -> bool:
+    """Compare chunked analysis with a whole-file pass (and with ffmpeg's silencedetect)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        if audio_path is None:
+            audio_path = synthesize_test_audio(Path(tmp) / "chunk_edges.wav", chunk_seconds=chunk_seconds)
+        whole = analyze(audio_path, noise_db, min_duration, chunk_seconds=None)
+        chunked = analyze(audio_path, noise_db, min_duration, chunk_seconds=chunk_seconds)
+        reference = _ffmpeg_silencedetect(audio_path, noise_db, min_duration)
+
+    ok = True
+    print(f"{len(whole['silences'])} silences whole-file, {len(chunked['silences'])} from {chunked['chunks']} chunks")
+    if whole["silences"] != chunked["silences"]:
+        ok = False
+        for a, b in zip(whole["silences"], chunked["silences"]):
+            if a != b:
+                print(f"  MISMATCH whole {a} vs chunked {b}")
+    if speech_segments(whole["silences"], whole["duration"]) != speech_segments(chunked["silences"], chunked["duration"]):
+        ok = False
+        print("  MISMATCH in speech segments")
+    for key in ("mean_volume", "max_volume"):
+        if (whole[key] is None) != (chunked[key] is None) or (whole[key] is not None and abs(whole[key] - chunked[key]) > 1e-6):
+            ok = False
+            print(f"  MISMATCH {key}: {whole[key]} vs {chunked[key]}")
+
+    # ffmpeg prints times with 6 significant digits and counts interleaved samples
+    close = len(reference) == len(whole["silences"]) and all(
+        abs(r["start"] - s["start"]) < 2e-3 and abs(r["end"] - s["end"]) < 2e-3
+        for r, s in zip(reference, whole["silences"])
+    )
+    print(f"silencedetect reference: {len(reference)} silences, {'matching' if close else 'DIFFERENT'}")
+    print("OK: chunked analysis matches the whole-file pass" if ok else "FAILED")
+    return ok and close
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk-parallel silence and level analysis")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    silence_cmd = sub.add_parser("silence", help="Detect silence periods and volume statistics")
+    silence_cmd.add_argument("audio")
+    silence_cmd.add_argument("--noise", type=float, default=-18.0, help="Noise floor in dB")
+    silence_cmd.add_argument("--duration", type=float, default=0.2, help="Minimum silence in seconds")
+    silence_cmd.add_argument("--chunk-seconds", type=int, default=CHUNK_SECONDS)
+    silence_cmd.add_argument("--workers", type=int)
+
+    verify_cmd = sub.add_parser("verify", help="Check chunked results against a whole-file pass")
+    verify_cmd.add_argument("audio", nargs="?", help="Audio file (default: synthetic chunk-edge test signal)")
+    verify_cmd.add_argument("--chunk-seconds", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.command == "silence":
+        result = analyze(args.audio, args.noise, args.duration, args.chunk_seconds, args.workers)
+        print(json.dumps(result, indent=2))
+    else:
+        raise SystemExit(0 if verify(args.audio, args.chunk_seconds) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,26 @@
 Podcast Content Analysis Tool for identifying viral moments and engagement opportunities
 """
 import json
+import os
 import re
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Tuple
 
+import acoustic_features
+import instrumentation
+
 class PodcastContentAnalyzer:
-    def __init__(self):
+    def __init__(self, dedup_index=None, episode=None, suppress_duplicates=False, acoustic=None):
+        # Optional moment_dedup.MomentIndex of published clips: moments repeating
+        # one from another episode are flagged (or dropped with suppress_duplicates)
+        self.dedup_index = dedup_index
+        self.episode = episode
+        self.suppress_duplicates = suppress_duplicates
+        # Optional acoustic_features.AcousticFeatures of the episode audio; its
+        # excitement score is blended into the text-based engagement score
+        self.acoustic = acoustic
+        self.acoustic_weight = 0.3
+        
         self.viral_keywords = {
             'prediction': 8,
             'breakthrough': 9,
@@ -53,8 +67,8 @@ class PodcastContentAnalyzer:
         secs = td.total_seconds() % 60
         return f"{hours:02d}:{minutes:02d}:{secs:06.3f}"
 
-    def calculate_engagement_score(self, text: str, duration: float) -> Dict[str, Any]:
-        """Calculate engagement score based on multiple factors"""
+    def calculate_engagement_score(self, text: str, duration: float, start: float = None) -> Dict[str, Any]:
+        """Calculate engagement score based on multiple factors (and the audio, given start and acoustic)"""
         text_lower = text.lower()
         
         # Base scores
@@ -94,7 +108,7 @@ class PodcastContentAnalyzer:
                       duration_score * 0.3 + 
                       content_type_score * 0.3)
         
-        return {
+        score = {
             'overall_score': round(final_score, 1),
             'keyword_score': round(keyword_score, 1),
             'duration_score': duration_score,
@@ -108,6 +122,16 @@ class PodcastContentAnalyzer:
                 'optimal_duration': 15 <= duration <= 60
             }
         }
+        
+        if self.acoustic is not None and start is not None:
+            acoustic = self.acoustic.segment_features(start, start + duration)
+            if acoustic['excitement'] is not None:
+                final_score = final_score * (1 - self.acoustic_weight) + acoustic['excitement'] * self.acoustic_weight
+                score['overall_score'] = round(final_score, 1)
+                score['acoustic_score'] = acoustic['excitement']
+            score['acoustic'] = acoustic
+        
+        return score
 
     def identify_platform_suitability(self, duration: float, content_type: str) -> List[str]:
         """Determine which platforms are best suited for this content"""
@@ -170,6 +194,7 @@ class PodcastContentAnalyzer:
         
         return title_templates.get(content_type, f"🎯 {base} - Must Watch Moment")
 
+    @instrumentation.timed("extract_key_moments")
     def extract_key_moments(self, segments: List[Dict]) -> List[Dict]:
         """Extract and analyze key moments from transcript segments"""
         key_moments = []
@@ -185,7 +210,7 @@ class PodcastContentAnalyzer:
                 continue
             
             # Analyze engagement potential
-            engagement = self.calculate_engagement_score(text, duration)
+            engagement = self.calculate_engagement_score(text, duration, start_time)
             content_type = self.classify_content_type(text)
             platforms = self.identify_platform_suitability(duration, content_type)
             
@@ -203,6 +228,15 @@ class PodcastContentAnalyzer:
                     'suggested_title': self.generate_clip_title(text, content_type),
                     'viral_potential': 'high' if engagement['overall_score'] >= 8.5 else 'medium'
                 }
+                if segment.get('words'):
+                    # Word timings from a real transcription drive the clip captions
+                    moment['words'] = segment['words']
+                if self.dedup_index is not None:
+                    duplicates = self.dedup_index.find_similar(text, exclude_episode=self.episode)
+                    if duplicates and self.suppress_duplicates:
+                        continue
+                    if duplicates:
+                        moment['near_duplicates'] = duplicates[:3]
                 key_moments.append(moment)
         
         # Sort by engagement score
@@ -210,6 +244,7 @@ class PodcastContentAnalyzer:
         
         return key_moments
 
+    @instrumentation.timed("create_chapters")
     def create_chapters(self, segments: List[Dict], target_chapter_length: int = 300) -> List[Dict]:
         """Create logical chapter breaks based on content and timing"""
         chapters = []
@@ -245,7 +280,8 @@ class PodcastContentAnalyzer:
 
     def extract_keywords_and_entities(self, segments: List[Dict]) -> Dict[str, List[str]]:
         """Extract SEO-relevant keywords and entities"""
-        all_text = ' '.join([seg['text'] for seg in segments])
+        # Lowercased once here rather than per term in the loop below
+        all_text = ' '.join([seg['text'] for seg in segments]).lower()
         
         # Common AI/Tech keywords to look for
         keywords = {
@@ -259,7 +295,7 @@ class PodcastContentAnalyzer:
         
         found_keywords = {}
         for category, terms in keywords.items():
-            found = [term for term in terms if term.lower() in all_text.lower()]
+            found = [term for term in terms if term.lower() in all_text]
             if found:
                 found_keywords[category] = found
         
@@ -319,8 +355,10 @@ def main():
     with open(transcript_path, 'r') as f:
         transcript_data = json.load(f)
     
-    # Initialize analyzer
-    analyzer = PodcastContentAnalyzer()
+    # Initialize analyzer; the episode audio adds acoustic excitement to the scores
+    audio_path = "/Users/cam/Desktop/video-automation/08_gpt5_enhanced.wav"
+    acoustic = acoustic_features.AcousticFeatures.for_audio(audio_path) if os.path.exists(audio_path) else None
+    analyzer = PodcastContentAnalyzer(acoustic=acoustic)
     
     # Generate analysis
     print("Analyzing podcast content for viral moments...")
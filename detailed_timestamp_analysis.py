@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
-import subprocess
-import json
+import argparse
 import re
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 
+import chunked_analysis
+import instrumentation
+import media_info
+
 @dataclass
 class Timestamp:
     seconds: float
@@ -12,9 +15,11 @@ class Timestamp:
     frame_30fps: int
     frame_24fps: int
     frame_60fps: int
+    fps: float = 30.0
+    frame: int = 0
     
     @classmethod
-    def from_seconds(cls, seconds: float):
+    def from_seconds(cls, seconds: float, fps: float = 30.0):
         hours = int(seconds // 3600)
         minutes = int((seconds % 3600) // 60)
         secs = seconds % 60
@@ -27,52 +32,27 @@ class Timestamp:
             formatted=formatted,
             frame_30fps=int(seconds * 30),
             frame_24fps=int(seconds * 24),
-            frame_60fps=int(seconds * 60)
+            frame_60fps=int(seconds * 60),
+            fps=fps,
+            frame=int(seconds * fps)
         )
 
-def run_silence_detection(audio_file: str) -> List[Dict]:
-    """Run comprehensive silence detection"""
-    cmd = f'ffmpeg -i "{audio_file}" -af "silencedetect=n=-18dB:d=0.2" -f null - 2>&1'
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    
-    silence_periods = []
-    lines = result.stderr.split('\n')
-    
-    start_time = None
-    for line in lines:
-        if 'silence_start:' in line:
-            match = re.search(r'silence_start:\s*([\d.]+)', line)
-            if match:
-                start_time = float(match.group(1))
-        elif 'silence_end:' in line and start_time is not None:
-            match_end = re.search(r'silence_end:\s*([\d.]+)', line)
-            match_duration = re.search(r'silence_duration:\s*([\d.]+)', line)
-            if match_end:
-                end_time = float(match_end.group(1))
-                duration = float(match_duration.group(1)) if match_duration else (end_time - start_time)
-                silence_periods.append({
-                    'start': start_time,
-                    'end': end_time,
-                    'duration': duration
-                })
-                start_time = None
-    
-    return silence_periods
+@instrumentation.timed("run_silence_detection")
+def run_silence_detection(audio_file: str, workers: Optional[int] = None) -> List[Dict]:
+    """Run comprehensive silence detection (long files are analyzed in parallel chunks)"""
+    return chunked_analysis.detect_silence(audio_file, noise_db=-18.0, min_duration=0.2, workers=workers)
 
+@instrumentation.timed("analyze_full_audio")
 def analyze_full_audio(audio_file: str) -> Dict:
     """Perform comprehensive audio analysis"""
     
-    # Get file info
-    probe_cmd = f'ffprobe -v quiet -print_format json -show_format -show_streams "{audio_file}"'
-    result = subprocess.run(probe_cmd, shell=True, capture_output=True, text=True)
-    file_info = json.loads(result.stdout)
-    
-    duration = float(file_info['format']['duration'])
-    sample_rate = int(file_info['streams'][0]['sample_rate'])
+    # File info comes from the shared probe cache
+    duration = media_info.duration(audio_file)
+    sample_rate = media_info.sample_rate(audio_file)
     
     # Get volume statistics
-    volume_cmd = f'ffmpeg -i "{audio_file}" -af "volumedetect" -f null - 2>&1'
-    result = subprocess.run(volume_cmd, shell=True, capture_output=True, text=True)
+    volume_cmd = f'ffmpeg -i "{audio_file}" -af "volumedetect" -f null -'
+    result = instrumentation.run(volume_cmd, shell=True, capture_output=True, text=True)
     
     mean_match = re.search(r'mean_volume:\s*([-\d.]+)\s*dB', result.stderr)
     max_match = re.search(r'max_volume:\s*([-\d.]+)\s*dB', result.stderr)
@@ -87,17 +67,21 @@ def analyze_full_audio(audio_file: str) -> Dict:
         'max_volume': max_volume
     }
 
-def identify_speech_segments(audio_file: str, silence_periods: List[Dict], total_duration: float) -> List[Dict]:
+@instrumentation.timed("identify_speech_segments")
+def identify_speech_segments(audio_file: str, silence_periods: List[Dict], total_duration: float,
+                             fps: float = 30.0) -> List[Dict]:
     """Identify speech segments based on silence periods"""
     
     segments = []
+    def at(seconds):
+        return Timestamp.from_seconds(seconds, fps)
     
     # If no silence detected, assume entire file is speech
     if not silence_periods:
         segments.append({
             'segment_id': 'segment_001',
-            'start_time': Timestamp.from_seconds(0.0),
-            'end_time': Timestamp.from_seconds(total_duration),
+            'start_time': at(0.0),
+            'end_time': at(total_duration),
             'duration': total_duration,
             'boundary_type': 'file_boundary',
             'confidence': 0.9
@@ -111,8 +95,8 @@ def identify_speech_segments(audio_file: str, silence_periods: List[Dict], total
     if silence_periods[0]['start'] > 0.5:  # If there's speech at the beginning
         segments.append({
             'segment_id': 'segment_001',
-            'start_time': Timestamp.from_seconds(0.0),
-            'end_time': Timestamp.from_seconds(silence_periods[0]['start'] - 0.1),
+            'start_time': at(0.0),
+            'end_time': at(silence_periods[0]['start'] - 0.1),
             'duration': silence_periods[0]['start'] - 0.1,
             'boundary_type': 'natural_pause',
             'confidence': 0.95
@@ -126,8 +110,8 @@ def identify_speech_segments(audio_file: str, silence_periods: List[Dict], total
         if next_silence_start - current_silence_end > 0.5:  # Significant speech duration
             segments.append({
                 'segment_id': f'segment_{len(segments)+1:03d}',
-                'start_time': Timestamp.from_seconds(current_silence_end + 0.1),
-                'end_time': Timestamp.from_seconds(next_silence_start - 0.1),
+                'start_time': at(current_silence_end + 0.1),
+                'end_time': at(next_silence_start - 0.1),
                 'duration': next_silence_start - current_silence_end - 0.2,
                 'boundary_type': 'natural_pause',
                 'confidence': 0.95
@@ -138,8 +122,8 @@ def identify_speech_segments(audio_file: str, silence_periods: List[Dict], total
     if total_duration - last_silence['end'] > 0.5:
         segments.append({
             'segment_id': f'segment_{len(segments)+1:03d}',
-            'start_time': Timestamp.from_seconds(last_silence['end'] + 0.1),
-            'end_time': Timestamp.from_seconds(total_duration),
+            'start_time': at(last_silence['end'] + 0.1),
+            'end_time': at(total_duration),
             'duration': total_duration - last_silence['end'] - 0.1,
             'boundary_type': 'file_boundary',
             'confidence': 0.9
@@ -148,7 +132,13 @@ def identify_speech_segments(audio_file: str, silence_periods: List[Dict], total
     return segments
 
 def main():
-    audio_file = "08_gpt5_enhanced.wav"
+    parser = argparse.ArgumentParser(description="Frame-accurate speech segment timestamps")
+    parser.add_argument("audio_file", nargs="?", default="08_gpt5_enhanced.wav")
+    parser.add_argument("--video", default="08 - GPT 5.0 This Summer.mp4",
+                        help="Source video whose frame rate the frame numbers use")
+    args = parser.parse_args()
+    audio_file = args.audio_file
+    fps, fps_assumed = media_info.fps_or_default(args.video)
     
     print("Analyzing audio file...")
     audio_info = analyze_full_audio(audio_file)
@@ -169,14 +159,15 @@ def main():
         print(f"  Silence {i+1}: {silence['start']:.3f}s - {silence['end']:.3f}s (duration: {silence['duration']:.3f}s)")
     
     print("\nIdentifying speech segments...")
-    segments = identify_speech_segments(audio_file, silence_periods, audio_info['duration'])
+    segments = identify_speech_segments(audio_file, silence_periods, audio_info['duration'], fps)
     
     # Generate detailed report
     report = {
         'segments': [],
         'video_info': {
-            'fps': 30.0,  # Assuming 30fps
-            'total_frames': int(audio_info['duration'] * 30),
+            'fps': fps,
+            'fps_assumed': fps_assumed,
+            'total_frames': int(audio_info['duration'] * fps),
             'duration': f"{int(audio_info['duration']//60):02d}:{int(audio_info['duration']%60):02d}.{int((audio_info['duration']%1)*1000):03d}"
         },
         'analysis_notes': f"Enhanced audio analyzed. Silence threshold: -18dB, minimum duration: 0.2s. Mean volume: {audio_info['mean_volume']:.1f}dB" if audio_info['mean_volume'] else "Enhanced audio analyzed. Silence threshold: -18dB, minimum duration: 0.2s"
@@ -193,8 +184,8 @@ def main():
             'segment_id': seg['segment_id'],
             'start_time': seg['start_time'].formatted,
             'end_time': seg['end_time'].formatted,
-            'start_frame': seg['start_time'].frame_30fps,
-            'end_frame': seg['end_time'].frame_30fps,
+            'start_frame': seg['start_time'].frame,
+            'end_frame': seg['end_time'].frame,
             'fade_in_duration': fade_in,
             'fade_out_duration': fade_out,
             'silence_padding': {
@@ -210,6 +201,7 @@ def main():
         print(f"\n{seg['segment_id'].upper()}:")
         print(f"  Time Range: {seg['start_time'].formatted} - {seg['end_time'].formatted}")
         print(f"  Duration: {seg['duration']:.3f} seconds")
+        print(f"  Frames ({fps:g}fps{', assumed' if fps_assumed else ''}): {seg['start_time'].frame} - {seg['end_time'].frame}")
         print(f"  Frames (30fps): {seg['start_time'].frame_30fps} - {seg['end_time'].frame_30fps}")
         print(f"  Frames (24fps): {seg['start_time'].frame_24fps} - {seg['end_time'].frame_24fps}")
         print(f"  Frames (60fps): {seg['start_time'].frame_60fps} - {seg['end_time'].frame_60fps}")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Adaptive per-clip encode settings from a fast complexity probe.
+
+Each clip range is encoded once at low resolution and frame rate with
+x264 ultrafast; the resulting bits per pixel says how hard the footage is to
+compress. From that the planner predicts the bitrate of the real encode and
+picks a CRF/preset that lands near the platform's quality target, or switches
+to two-pass bitrate control when the prediction would break the platform's
+upload size limit. Probe results are cached per (source, range).
+"""
+import json
+import math
+import os
+import re
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+import media_info
+
+PROBE_WIDTH = 320
+PROBE_FPS = 10
+PROBE_CRF = 23
+
+# Empirical model: x264 bitrate roughly halves every +6 CRF, grows with
+# pixel count to the 0.75 power, and ultrafast spends ~1.6x the bits of "fast".
+CRF_DOUBLING_STEP = 6
+PIXEL_EXPONENT = 0.75
+FPS_EXPONENT = 0.6
+PRESET_BIT_FACTOR = 0.6
+
+MIN_CRF = 18
+MAX_CRF = 30
+SIZE_SAFETY = 0.92
+
+# bits per pixel per frame in the probe; below this the footage is a static talking head
+STATIC_BPP = 0.05
+COMPLEX_BPP = 0.25
+
+
+class EncodePlanner:
+    def __init__(self, cache_path=None):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._cache = {}
+        self._lock = threading.Lock()
+        if self.cache_path and self.cache_path.exists():
+            with open(self.cache_path, 'r') as f:
+                self._cache = json.load(f)
+
+    def _cache_key(self, source, start: float, end: float) -> str:
+        source = Path(source)
+        stat = source.stat()
+        return f"{source.resolve()}|{stat.st_size}|{stat.st_mtime}|{start:.3f}|{end:.3f}"
+
+    def _save_cache(self):
+        if self.cache_path:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # Renamed into place so other render processes never read a partial file
+            temp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+            with open(temp_path, 'w') as f:
+                json.dump(self._cache, f, indent=2)
+            os.replace(temp_path, self.cache_path)
+
+    def probe(self, source, start: float, end: float) -> Dict:
+        """Measure how compressible a range of the source is (cached)"""
+        key = self._cache_key(source, start, end)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+
+        duration = end - start
+        cmd = [
+            "ffmpeg", "-hide_banner", "-nostats",
+            "-ss", f"{start:.3f}", "-t", f"{duration:.3f}",
+            "-i", str(source),
+            "-an", "-vf", f"fps={PROBE_FPS},scale={PROBE_WIDTH}:-2",
+            "-c:v", "libx264", "-preset", "ultrafast", "-crf", str(PROBE_CRF),
+            "-f", "mp4", "-movflags", "frag_keyframe+empty_moov", "-"
+        ]
+        result = subprocess.run(cmd, capture_output=True)
+        stderr = result.stderr.decode("utf-8", errors="ignore")
+        if result.returncode != 0:
+            raise RuntimeError(f"Complexity probe failed for {source} [{start:.3f}-{end:.3f}]")
+
+        source_width, source_height = media_info.video_size(source) or (1920, 1080)
+        source_fps = media_info.fps(source) or 30.0
+        probe_match = re.findall(r'Video:.*?(\d{2,5})x(\d{2,5})', stderr)
+        probe_width, probe_height = (int(v) for v in probe_match[-1]) if probe_match else (PROBE_WIDTH, PROBE_WIDTH * 9 // 16)
+
+        frames = max(1, round(duration * PROBE_FPS))
+        probe_bits = len(result.stdout) * 8
+        bpp = probe_bits / (probe_width * probe_height * frames)
+
+        info = {
+            "start": start,
+            "end": end,
+            "source_width": source_width,
+            "source_height": source_height,
+            "source_fps": source_fps,
+            "probe_kbps": round(probe_bits / duration / 1000, 2),
+            "probe_pixels": probe_width * probe_height,
+            "bits_per_pixel": round(bpp, 5),
+            "complexity": "static" if bpp < STATIC_BPP else "complex" if bpp > COMPLEX_BPP else "moderate"
+        }
+        with self._lock:
+            self._cache[key] = info
+            self._save_cache()
+        return info
+
+    def predict_kbps(self, probe: Dict, width: int, height: int, crf: float) -> float:
+        """Predicted video bitrate of the real encode at a given CRF"""
+        pixel_ratio = (width * height) / probe["probe_pixels"]
+        fps_ratio = probe["source_fps"] / PROBE_FPS
+        return (probe["probe_kbps"] * pixel_ratio ** PIXEL_EXPONENT * fps_ratio ** FPS_EXPONENT
+                * PRESET_BIT_FACTOR * 2 ** ((PROBE_CRF - crf) / CRF_DOUBLING_STEP))
+
+    def plan(self, source, start: float, end: float, platform_spec: Dict) -> Dict:
+        """Pick CRF/preset or two-pass bitrate for one clip on one platform"""
+        probe = self.probe(source, start, end)
+        width, height = (int(x) for x in platform_spec['resolution'].split('x'))
+        duration = end - start
+        base_crf = platform_spec.get('crf', 23)
+
+        # Spend up to the platform's quality target: lower CRF on easy footage,
+        # raise it on busy footage, always within sane bounds
+        target_kbps = platform_spec.get('target_video_kbps')
+        crf = base_crf
+        if target_kbps:
+            predicted = self.predict_kbps(probe, width, height, base_crf)
+            crf = base_crf + CRF_DOUBLING_STEP * math.log2(predicted / target_kbps)
+        crf = int(round(min(MAX_CRF, max(MIN_CRF, crf))))
+
+        # Easy footage can use a faster preset without visible loss
+        preset = platform_spec.get('preset', 'fast')
+        if probe["complexity"] == "static":
+            preset = "veryfast"
+
+        predicted_kbps = self.predict_kbps(probe, width, height, crf)
+        audio_kbps = platform_spec.get('audio_kbps', 128)
+        predicted_mb = (predicted_kbps + audio_kbps) * duration / 8 / 1000
+
+        plan = {
+            "mode": "crf",
+            "crf": crf,
+            "preset": preset,
+            "fps": probe["source_fps"],
+            "complexity": probe["complexity"],
+            "predicted_video_kbps": round(predicted_kbps, 1),
+            "predicted_size_mb": round(predicted_mb, 2)
+        }
+
+        max_mb = platform_spec.get('max_file_size_mb')
+        if max_mb and predicted_mb > max_mb * SIZE_SAFETY:
+            # Constant quality would overshoot the upload limit: fix the bitrate instead
+            video_kbps = int(max_mb * SIZE_SAFETY * 8 * 1000 / duration - audio_kbps)
+            plan.update({
+                "mode": "2pass",
+                "bitrate_kbps": max(video_kbps, 100),
+                # both passes must see exactly the same frames or x264 rejects the stats
+                "frames": max(1, int(round(duration * probe["source_fps"]))),
+                "predicted_size_mb": round(max_mb * SIZE_SAFETY, 2)
+            })
+        return plan
+
+
+def video_args(plan: Dict, codec: str = "libx264") -> List[str]:
+    """ffmpeg video encoding arguments for a plan (second pass for two-pass plans)"""
+    if plan["mode"] == "2pass":
+        kbps = plan["bitrate_kbps"]
+        return ["-frames:v", str(plan["frames"]), "-c:v", codec, "-preset", plan["preset"], "-b:v", f"{kbps}k",
+                "-maxrate", f"{int(kbps * 1.5)}k", "-bufsize", f"{kbps * 2}k"]
+    return ["-c:v", codec, "-crf", str(plan["crf"]), "-preset", plan["preset"]]
+
+
+def first_pass_args(plan: Dict, passlog) -> List[str]:
+    """Arguments following video_args() for the analysis pass; output is discarded"""
+    return ["-pass", "1", "-passlogfile", str(passlog), "-an", "-f", "null"]
+
+
+def second_pass_args(plan: Dict, passlog) -> List[str]:
+    return ["-pass", "2", "-passlogfile", str(passlog)]
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
-import subprocess
 import json
 import re
 from typing import List, Dict, Tuple
 from dataclasses import dataclass
 
+import media_info
+
 @dataclass
 class Timestamp:
     seconds: float
@@ -12,9 +13,11 @@ class Timestamp:
     frame_30fps: int
     frame_24fps: int
     frame_60fps: int
+    fps: float = 30.0
+    frame: int = 0
     
     @classmethod
-    def from_seconds(cls, seconds: float):
+    def from_seconds(cls, seconds: float, fps: float = 30.0):
         hours = int(seconds // 3600)
         minutes = int((seconds % 3600) // 60)
         secs = seconds % 60
@@ -27,18 +30,18 @@ class Timestamp:
             formatted=formatted,
             frame_30fps=int(seconds * 30),
             frame_24fps=int(seconds * 24),
-            frame_60fps=int(seconds * 60)
+            frame_60fps=int(seconds * 60),
+            fps=fps,
+            frame=int(seconds * fps)
         )
 
 def main():
     audio_file = "08_gpt5_enhanced.wav"
     
-    # Get file info
-    probe_cmd = f'ffprobe -v quiet -print_format json -show_format -show_streams "{audio_file}"'
-    result = subprocess.run(probe_cmd, shell=True, capture_output=True, text=True)
-    file_info = json.loads(result.stdout)
-    duration = float(file_info['format']['duration'])
-    sample_rate = int(file_info['streams'][0]['sample_rate'])
+    # File info comes from the shared probe cache
+    duration = media_info.duration(audio_file)
+    sample_rate = media_info.sample_rate(audio_file)
+    fps, fps_assumed = media_info.fps_or_default("08 - GPT 5.0 This Summer.mp4")
     
     print("Analyzing enhanced audio file...")
     print(f"Duration: {duration:.3f} seconds")
@@ -95,8 +98,9 @@ def main():
     report = {
         'segments': [],
         'video_info': {
-            'fps': 30.0,
-            'total_frames': int(duration * 30),
+            'fps': fps,
+            'fps_assumed': fps_assumed,
+            'total_frames': int(duration * fps),
             'duration': f"{int(duration//60):02d}:{int(duration%60):02d}.{int((duration%1)*1000):03d}"
         },
         'analysis_notes': "Enhanced audio analyzed with frame-accurate timestamps. Silence threshold: -18dB, minimum duration: 0.2s. Natural speech boundaries preserved with 50ms padding."
@@ -107,8 +111,8 @@ def main():
     print("="*80)
     
     for seg in segments:
-        start_ts = Timestamp.from_seconds(seg['start'])
-        end_ts = Timestamp.from_seconds(seg['end'])
+        start_ts = Timestamp.from_seconds(seg['start'], fps)
+        end_ts = Timestamp.from_seconds(seg['end'], fps)
         duration = seg['end'] - seg['start']
         
         # Determine fade durations based on segment characteristics
@@ -127,8 +131,8 @@ def main():
             'segment_id': seg['segment_id'],
             'start_time': start_ts.formatted,
             'end_time': end_ts.formatted,
-            'start_frame': start_ts.frame_30fps,
-            'end_frame': end_ts.frame_30fps,
+            'start_frame': start_ts.frame,
+            'end_frame': end_ts.frame,
             'fade_in_duration': fade_in,
             'fade_out_duration': fade_out,
             'silence_padding': {
@@ -147,6 +151,7 @@ def main():
         print(f"Duration: {duration:.3f} seconds")
         print(f"")
         print(f"Frame Numbers:")
+        print(f"  {fps:g}fps{' (assumed)' if fps_assumed else ''}: {start_ts.frame} → {end_ts.frame} ({end_ts.frame - start_ts.frame} frames)")
         print(f"  30fps: {start_ts.frame_30fps} → {end_ts.frame_30fps} ({end_ts.frame_30fps - start_ts.frame_30fps} frames)")
         print(f"  24fps: {start_ts.frame_24fps} → {end_ts.frame_24fps} ({end_ts.frame_24fps - start_ts.frame_24fps} frames)")
         print(f"  60fps: {start_ts.frame_60fps} → {end_ts.frame_60fps} ({end_ts.frame_60fps - start_ts.frame_60fps} frames)")
@@ -168,8 +173,8 @@ def main():
     
     print("\nFFmpeg commands for precise extraction:")
     for seg in segments:
-        start_ts = Timestamp.from_seconds(seg['start'])
-        end_ts = Timestamp.from_seconds(seg['end'])
+        start_ts = Timestamp.from_seconds(seg['start'], fps)
+        end_ts = Timestamp.from_seconds(seg['end'], fps)
         cmd = f"ffmpeg -i {audio_file} -ss {seg['start']:.3f} -to {seg['end']:.3f} -c copy {seg['segment_id']}.wav"
         print(f"\n{seg['segment_id']}:")
         print(f"  {cmd}")
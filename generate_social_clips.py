@@ -4,59 +4,137 @@ Social Media Video Clip Generator
 Generates optimized video clips for different social media platforms
 """
 
+import argparse
+import copy
+import hashlib
 import subprocess
 import json
 import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-import shutil
+
+import audio_enhancement
+import audio_intermediate
+import captions
+import encode_planner
+import instrumentation
+import media_info
+import moment_manifest
+import proxy_media
+import reframing
+import render_pool
+import render_journal
+import render_queue
+import thumbnail_selector
+
+# Everything else (mp4, jpg) is already compressed and stored without deflate
+TEXT_ASSET_SUFFIXES = {".srt", ".ass", ".vtt", ".json", ".txt"}
+
+# Stream codec each encoder produces, for deciding when a source can be copied as-is
+ENCODER_CODECS = {"libx264": "h264", "libx265": "hevc", "libvpx-vp9": "vp9"}
+
+# Platform specifications
+PLATFORM_SPECS = {
+    "tiktok": {
+        "aspect_ratio": "9:16",
+        "max_duration": 60,
+        "resolution": "1080x1920",
+        "video_codec": "libx264",
+        "audio_codec": "aac",
+        "crf": 23,
+        "preset": "fast",
+        "target_video_kbps": 4500,
+        "max_file_size_mb": 287,
+        "burn_captions": True
+    },
+    "youtube_shorts": {
+        "aspect_ratio": "9:16", 
+        "max_duration": 60,
+        "resolution": "1080x1920",
+        "video_codec": "libx264",
+        "audio_codec": "aac",
+        "crf": 23,
+        "preset": "fast",
+        "target_video_kbps": 6000,
+        "burn_captions": True
+    },
+    "twitter": {
+        "aspect_ratio": "16:9",
+        "max_duration": 140,  # 2:20
+        "resolution": "1280x720",
+        "video_codec": "libx264",
+        "audio_codec": "aac",
+        "crf": 23,
+        "preset": "fast",
+        "target_video_kbps": 2500,
+        "max_file_size_mb": 512,
+        "burn_captions": True
+    },
+    "linkedin": {
+        "aspect_ratio": "16:9",
+        "max_duration": 600,  # 10 minutes
+        "resolution": "1920x1080",
+        "video_codec": "libx264",
+        "audio_codec": "aac",
+        "crf": 23,
+        "preset": "fast",
+        "target_video_kbps": 5000,
+        "max_file_size_mb": 5120,
+        "burn_captions": False  # plays embedded caption tracks
+    }
+}
 
 class SocialMediaClipGenerator:
-    def __init__(self, source_video, enhanced_audio, output_dir="output_clips"):
+    def __init__(self, source_video, enhanced_audio, output_dir="output_clips", normalize_loudness=False,
+                 moments=None, platform_specs=None, soft_subtitles=False):
         self.source_video = Path(source_video)
         self.enhanced_audio = Path(enhanced_audio)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.normalize_loudness = normalize_loudness
         
-        # Platform specifications
-        self.platform_specs = {
-            "tiktok": {
-                "aspect_ratio": "9:16",
-                "max_duration": 60,
-                "resolution": "1080x1920",
-                "video_codec": "libx264",
-                "audio_codec": "aac",
-                "crf": 23,
-                "preset": "fast"
-            },
-            "youtube_shorts": {
-                "aspect_ratio": "9:16", 
-                "max_duration": 60,
-                "resolution": "1080x1920",
-                "video_codec": "libx264",
-                "audio_codec": "aac",
-                "crf": 23,
-                "preset": "fast"
-            },
-            "twitter": {
-                "aspect_ratio": "16:9",
-                "max_duration": 140,  # 2:20
-                "resolution": "1280x720",
-                "video_codec": "libx264",
-                "audio_codec": "aac",
-                "crf": 23,
-                "preset": "fast"
-            },
-            "linkedin": {
-                "aspect_ratio": "16:9",
-                "max_duration": 600,  # 10 minutes
-                "resolution": "1920x1080",
-                "video_codec": "libx264",
-                "audio_codec": "aac",
-                "crf": 23,
-                "preset": "fast"
-            }
-        }
+        # Captions muxed as a mov_text track on platforms that don't need them burned in
+        self.soft_subtitles = soft_subtitles
+        
+        # Audio track muxed into every clip; replaced by the normalized stem in prepare_audio()
+        self.clip_audio = self.enhanced_audio
+        
+        # Shared assets are built once even when clips render on several workers
+        self._locks_guard = threading.Lock()
+        self._asset_locks = {}
+        
+        # Per-episode 48 kHz intermediate and the per-moment slices cut from it
+        self.work_dir = self.output_dir / ".work"
+        self.audio_index = None
+        self._audio_slices = {}
+        
+        # Caption scripts per moment and their transparent renders per resolution
+        self._caption_scripts = {}
+        self._caption_overlays = {}
+        
+        # Per-episode crop trajectory for vertical clips, analyzed on first use
+        self.reframe_track = None
+        self._reframe_filters = {}
+        
+        # All-intra low-res proxy for stream-copied previews, built on first use
+        self.proxy_index = None
+        
+        # CRF/preset or two-pass bitrate chosen per clip from a cached complexity probe
+        self.encode_planner = encode_planner.EncodePlanner(self.work_dir / "encode_probe_cache.json")
+        
+        # Best thumbnail frame per moment from one low-res scan, shared by every platform
+        self.thumbnail_selector = thumbnail_selector.ThumbnailSelector(self.work_dir / "thumbnail_cache.json")
+        
+        # Finished render jobs, so an interrupted batch resumes where it stopped
+        self.journal = render_journal.RenderJournal(self.work_dir / "render_journal.jsonl")
+        
+        # Platform specifications, with per-manifest overrides merged per platform
+        self.platform_specs = copy.deepcopy(PLATFORM_SPECS)
+        for platform, spec in (platform_specs or {}).items():
+            self.platform_specs[platform] = dict(self.platform_specs.get(platform, {}), **spec)
         
         # Viral moments from content analysis
         self.viral_moments = [
@@ -93,36 +171,134 @@ class SocialMediaClipGenerator:
                 "title": "GPT-5.0 CONFIRMED: Everything You Need to Know"
             }
         ]
+        if moments is not None:
+            # Moments from a manifest or analysis report replace the built-in set
+            self.viral_moments = moment_manifest.dedupe_moments(
+                moment_manifest.validate_moments(moments, set(self.platform_specs))
+            )
+        
+    def parse_timestamp(self, timestamp):
+        """Convert HH:MM:SS.mmm (or MM:SS.mmm) to seconds"""
+        return sum(float(x) * 60 ** i for i, x in enumerate(reversed(timestamp.split(':'))))
+    
+    def _asset_lock(self, *key):
+        """Lock serializing the creation of one shared asset"""
+        with self._locks_guard:
+            return self._asset_locks.setdefault(key, threading.Lock())
+    
+    def _run_ffmpeg(self, cmd):
+        """Run a render command, pinned to the worker's CPU slot inside a RenderPool"""
+        return render_pool.run(cmd, check=True)
+    
+    def format_timestamp(self, seconds):
+        """Convert seconds to HH:MM:SS.mmm"""
+        millis = int(round(seconds * 1000))
+        hours, millis = divmod(millis, 3600000)
+        minutes, millis = divmod(millis, 60000)
+        return f"{hours:02d}:{minutes:02d}:{millis / 1000:06.3f}"
+    
+    def prepare_audio(self):
+        """Normalize and resample the episode audio once so every clip reuses the same stem"""
+        if self.normalize_loudness:
+            normalized_path = self.output_dir / f"{self.enhanced_audio.stem}_normalized.wav"
+            print(f"Normalizing episode audio: {normalized_path}")
+            self.clip_audio = audio_enhancement.normalize_audio(self.enhanced_audio, normalized_path)
+        
+        self.work_dir.mkdir(exist_ok=True)
+        self.audio_index = audio_intermediate.build_intermediate(
+            self.clip_audio, self.work_dir / f"{self.clip_audio.stem}_48k.wav"
+        )
+        self._audio_slices = {}
+        return self.clip_audio
+    
+    def get_audio_slice(self, moment):
+        """Exact sample-range slice of the episode audio for a moment, cut once per moment"""
+        with self._asset_lock("audio_index"):
+            if self.audio_index is None:
+                self.prepare_audio()
         
+        key = (moment['start'], moment['end'])
+        with self._asset_lock("audio", *key):
+            if key not in self._audio_slices:
+                slice_path = self.work_dir / f"{self._moment_key(moment)[1]}_audio.wav"
+                self._audio_slices[key] = audio_intermediate.write_slice(
+                    self.audio_index,
+                    self.parse_timestamp(moment['start']),
+                    self.parse_timestamp(moment['end']),
+                    slice_path
+                )
+            return self._audio_slices[key]
+    
     def generate_subtitles(self, moment, output_path):
-        """Generate SRT subtitle file for a clip"""
-        # Calculate duration properly
-        start_seconds = sum(float(x) * 60 ** i for i, x in enumerate(reversed(moment['start'].split(':'))))
-        end_seconds = sum(float(x) * 60 ** i for i, x in enumerate(reversed(moment['end'].split(':'))))
-        duration = end_seconds - start_seconds
-        
-        # Format duration for SRT
-        hours = int(duration // 3600)
-        minutes = int((duration % 3600) // 60)
-        seconds = int(duration % 60)
-        milliseconds = int((duration % 1) * 1000)
-        
-        srt_content = f"""1
-00:00:00,000 --> {hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}
-{moment['text']}
-"""
-        # Ensure directory exists
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        """Generate SRT subtitle file for a clip with short timed phrases"""
+        duration = self.parse_timestamp(moment['end']) - self.parse_timestamp(moment['start'])
+        cues = captions.build_cues(moment, duration, offset=self.parse_timestamp(moment['start']))
+        return captions.write_srt(cues, output_path)
+    
+    def _moment_key(self, moment):
+        """Cache key and work file stem of a moment: its id and exact range (ids can repeat across runs)"""
+        start_ms = int(round(self.parse_timestamp(moment['start']) * 1000))
+        end_ms = int(round(self.parse_timestamp(moment['end']) * 1000))
+        return (moment['id'], start_ms, end_ms), f"{moment['id']}_{start_ms}_{end_ms}"
+    
+    def get_caption_overlay(self, moment, width, height, cues=None):
+        """Transparent karaoke caption stream for a moment, rendered once per resolution"""
+        start_seconds = self.parse_timestamp(moment['start'])
+        duration = self.parse_timestamp(moment['end']) - start_seconds
+        moment_key, stem = self._moment_key(moment)
+        
+        with self._asset_lock("captions", *moment_key):
+            if moment_key not in self._caption_scripts:
+                if cues is None:
+                    cues = captions.build_cues(moment, duration, offset=start_seconds)
+                self._caption_scripts[moment_key] = captions.write_ass(
+                    cues, self.work_dir / f"{stem}_captions.ass"
+                )
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(srt_content)
-        return output_path
+        key = moment_key + (width, height)
+        with self._asset_lock("overlay", *key):
+            if key not in self._caption_overlays:
+                self._caption_overlays[key] = captions.render_overlay(
+                    self._caption_scripts[moment_key], width, height, duration,
+                    self.work_dir / f"{stem}_captions_{width}x{height}.mov",
+                    fps=media_info.fps(self.source_video) or 30
+                )
+            return self._caption_overlays[key]
     
-    def crop_to_vertical(self, input_file, output_file):
-        """Crop video to 9:16 vertical aspect ratio"""
+    def get_reframe_track(self):
+        """Motion-aware crop track for the whole episode, computed once and cached on disk"""
+        with self._asset_lock("reframe_track"):
+            if self.reframe_track is None:
+                self.work_dir.mkdir(exist_ok=True)
+                self.reframe_track = reframing.analyze(
+                    self.source_video, self.work_dir / f"{self.source_video.stem}.reframe.json"
+                )
+            return self.reframe_track
+    
+    def get_vertical_crop(self, moment):
+        """9:16 crop filter following the speaker through a moment"""
+        track = self.get_reframe_track()
+        key, stem = self._moment_key(moment)
+        with self._asset_lock("crop", *key):
+            if key not in self._reframe_filters:
+                self._reframe_filters[key] = reframing.crop_filter(
+                    track,
+                    self.parse_timestamp(moment['start']),
+                    self.parse_timestamp(moment['end']),
+                    self.work_dir / f"{stem}_reframe.cmd"
+                )
+            return self._reframe_filters[key]
+    
+    def crop_to_vertical(self, input_file, output_file, moment=None):
+        """Crop video to 9:16 vertical aspect ratio
+        
+        When input_file is the cut of `moment` from the source video, the crop
+        follows the episode's reframe track instead of the center.
+        """
+        crop = self.get_vertical_crop(moment) if moment else "crop=ih*9/16:ih"
         cmd = [
             "ffmpeg", "-i", str(input_file),
-            "-vf", "crop=ih*9/16:ih",
+            "-vf", crop,
             "-c:v", "libx264", "-crf", "23", "-preset", "fast",
             "-c:a", "copy",
             "-y", str(output_file)
@@ -130,85 +306,220 @@ class SocialMediaClipGenerator:
         subprocess.run(cmd, check=True)
         return output_file
     
-    def generate_clip(self, moment, platform):
-        """Generate a clip for a specific platform"""
+    def burns_captions(self, platform):
+        """Whether captions are burned into the platform's video rather than muxed as a track"""
+        return not self.soft_subtitles or self.platform_specs[platform].get('burn_captions', True)
+    
+    def fits_without_encode(self, moment, platform):
+        """Whether the source range can be stream-copied as the platform's video
+        
+        Needs the platform's codec, 8-bit 4:2:0 pixels, aspect ratio and
+        resolution as-is, the constant frame rate every encode would output,
+        a bitrate within the platform's target, and a copied range (from the
+        keyframe before the moment) that stays under the upload limit.
+        """
         platform_spec = self.platform_specs[platform]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        source = self.source_video
+        if self.burns_captions(platform) or platform_spec['aspect_ratio'] != "16:9":
+            return False
+        if media_info.codec(source) != ENCODER_CODECS.get(platform_spec['video_codec']):
+            return False
+        if media_info.pix_fmt(source) != "yuv420p":
+            return False
+        if media_info.video_size(source) != tuple(int(x) for x in platform_spec['resolution'].split('x')):
+            return False
+        # Encodes run at the source fps (encode_planner); a variable or unknown rate would change
+        if not media_info.constant_frame_rate(source):
+            return False
         
-        # Create platform directory
-        platform_dir = self.output_dir / platform
-        platform_dir.mkdir(exist_ok=True)
+        video_bps = media_info.bit_rate(source)
+        source_duration = media_info.duration(source)
+        if not video_bps and source_duration:
+            video_bps = os.path.getsize(source) * 8 / source_duration
+        if not video_bps:
+            return False
+        target_kbps = platform_spec.get('target_video_kbps')
+        if target_kbps and video_bps > target_kbps * 1000:
+            return False
         
-        # Output filename
-        output_filename = f"{moment['id']}_{platform}_{timestamp}.mp4"
-        output_path = platform_dir / output_filename
+        max_mb = platform_spec.get('max_file_size_mb')
+        if max_mb:
+            start, end = self.parse_timestamp(moment['start']), self.parse_timestamp(moment['end'])
+            copy_start = media_info.keyframe_before(source, start)
+            audio_kbps = platform_spec.get('audio_kbps', 128)
+            copied_mb = (video_bps / 1000 + audio_kbps) * (end - copy_start) / 8 / 1000
+            if copied_mb > max_mb * encode_planner.SIZE_SAFETY:
+                return False
+        return True
+    
+    def copy_clip(self, moment, platform, subtitles, audio_slice, output_path):
+        """Stream-copy a moment's range of the source video with its audio slice and a caption track
         
-        # Generate subtitles
-        srt_path = platform_dir / f"{moment['id']}_subtitles.srt"
-        self.generate_subtitles(moment, srt_path)
+        The copy starts at the keyframe before the moment; the frames ahead
+        of it are hidden by the mp4 edit list, so playback starts on time.
+        """
+        platform_spec = self.platform_specs[platform]
+        duration = self.parse_timestamp(moment['end']) - self.parse_timestamp(moment['start'])
+        cmd = [
+            "ffmpeg",
+            "-ss", moment['start'],
+            "-i", str(self.source_video),
+            "-i", str(audio_slice),
+            "-i", str(subtitles),
+            "-t", str(duration),
+            "-map", "0:v:0", "-map", "1:a:0", "-map", "2:s:0",
+            "-c:v", "copy",
+            "-c:a", platform_spec['audio_codec'],
+            "-b:a", "128k",
+            "-ar", "48000",
+            "-c:s", "mov_text",
+            "-metadata:s:s:0", "language=eng",
+            "-movflags", "+faststart",
+            "-y", str(output_path)
+        ]
+        self._run_ffmpeg(cmd)
+    
+    def encode_clip(self, moment, platform, plan, caption_overlay, output_args, audio_slice=None, keyframes=None,
+                    subtitles=None):
+        """Crop, scale, caption and encode a moment's range of the source video
         
-        # Calculate duration properly
-        start_seconds = sum(float(x) * 60 ** i for i, x in enumerate(reversed(moment['start'].split(':'))))
-        end_seconds = sum(float(x) * 60 ** i for i, x in enumerate(reversed(moment['end'].split(':'))))
-        duration = end_seconds - start_seconds
+        output_args name the output (and muxer); without audio_slice the
+        output is video only. keyframes are forced at the given clip times.
+        Without caption_overlay nothing is burned in; subtitles (an SRT) are
+        muxed as a mov_text track instead.
+        """
+        platform_spec = self.platform_specs[platform]
+        width, height = (int(x) for x in platform_spec['resolution'].split('x'))
+        duration = self.parse_timestamp(moment['end']) - self.parse_timestamp(moment['start'])
         
         # Build ffmpeg command
         cmd = [
             "ffmpeg",
             "-ss", moment['start'],
-            "-i", str(self.source_video),
-            "-i", str(self.enhanced_audio),
-            "-t", str(duration),
-            "-map", "0:v:0",
-            "-map", "1:a:0"
+            "-i", str(self.source_video)
         ]
+        next_input = 1
+        if audio_slice:
+            cmd.extend(["-i", str(audio_slice)])
+            next_input += 1
+        if caption_overlay:
+            cmd.extend(["-i", str(caption_overlay)])
+            overlay_input = next_input
+            next_input += 1
+        if subtitles:
+            cmd.extend(["-i", str(subtitles)])
+            subtitles_input = next_input
+        cmd.extend(["-t", str(duration)])
         
         # Add video filters
         filters = []
         
         # Aspect ratio adjustment
         if platform_spec['aspect_ratio'] == "9:16":
-            # Vertical crop centering on the middle
-            filters.append("crop=ih*9/16:ih")
+            # Vertical crop following the speaker
+            filters.append(self.get_vertical_crop(moment))
         elif platform_spec['aspect_ratio'] == "1:1":
             # Square crop
             filters.append("crop=ih:ih")
         
-        # Scale to target resolution
-        if platform in ["twitter"]:
-            filters.append(f"scale={platform_spec['resolution']}")
-        elif platform in ["tiktok", "youtube_shorts"]:
-            filters.append("scale=1080:1920")
-            
-        # Add subtitles with styling
-        filters.append(f"subtitles={srt_path}:force_style='FontSize=24,PrimaryColour=&HFFFFFF&,OutlineColour=&H000000&,Outline=2,Alignment=2,MarginV=50'")
-        
-        if filters:
-            cmd.extend(["-vf", ",".join(filters)])
+        # Scale to target resolution so the caption overlay lines up
+        filters.append(f"scale={width}:{height}")
         
-        # Video encoding
+        if caption_overlay:
+            graph = f"[0:v]{','.join(filters)}[base];[base][{overlay_input}:v]overlay=0:0,fps={plan['fps']}[v]"
+        else:
+            graph = f"[0:v]{','.join(filters)},fps={plan['fps']}[v]"
         cmd.extend([
-            "-c:v", platform_spec['video_codec'],
-            "-crf", str(platform_spec['crf']),
-            "-preset", platform_spec['preset']
+            "-filter_complex", graph,
+            "-map", "[v]"
         ])
         
+        video_args = encode_planner.video_args(plan, platform_spec['video_codec'])
+        if keyframes:
+            video_args += ["-force_key_frames", ",".join(f"{t:.4f}" for t in keyframes)]
+        
+        # Video encoding
+        if plan['mode'] == "2pass":
+            passlog = self.work_dir / f"{self._moment_key(moment)[1]}_{platform}_passlog"
+            self._run_ffmpeg(cmd + video_args + encode_planner.first_pass_args(plan, passlog) + [os.devnull])
+            cmd.extend(video_args)
+            cmd.extend(encode_planner.second_pass_args(plan, passlog))
+        else:
+            cmd.extend(video_args)
+        
         # Audio encoding
-        cmd.extend([
-            "-c:a", platform_spec['audio_codec'],
-            "-b:a", "128k",
-            "-ar", "48000"
-        ])
+        if audio_slice:
+            cmd.extend([
+                "-map", "1:a:0",
+                "-c:a", platform_spec['audio_codec'],
+                "-b:a", "128k",
+                "-ar", "48000"
+            ])
+        else:
+            cmd.append("-an")
         
-        # Output
-        cmd.extend(["-y", str(output_path)])
+        if subtitles:
+            cmd.extend([
+                "-map", f"{subtitles_input}:s:0",
+                "-c:s", "mov_text",
+                "-metadata:s:s:0", "language=eng"
+            ])
         
-        print(f"Generating {platform} clip: {output_filename}")
-        subprocess.run(cmd, check=True)
+        cmd.extend(output_args)
+        self._run_ffmpeg(cmd)
+    
+    @instrumentation.timed("generate_clip")
+    def generate_clip(self, moment, platform):
+        """Generate a clip for a specific platform"""
+        platform_spec = self.platform_specs[platform]
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        # Create platform directory
+        platform_dir = self.output_dir / platform
+        platform_dir.mkdir(exist_ok=True)
+        
+        # Output filename
+        output_filename = f"{moment['id']}_{platform}_{timestamp}.mp4"
+        output_path = platform_dir / output_filename
+        
+        # Generate subtitles
+        srt_path = platform_dir / f"{moment['id']}_subtitles.srt"
+        self.generate_subtitles(moment, srt_path)
+        
+        # Calculate duration properly
+        duration = self.parse_timestamp(moment['end']) - self.parse_timestamp(moment['start'])
+        
+        # Audio comes from a slice that already starts at the moment, so both
+        # inputs are aligned at t=0 and -t trims them together
+        audio_slice = self.get_audio_slice(moment)
+        
+        temp_path = render_journal.temp_path_for(output_path)
+        burn_captions = self.burns_captions(platform)
+        if self.fits_without_encode(moment, platform):
+            # Source geometry already fits and captions ride along as a track: no re-encode
+            plan = {"mode": "copy"}
+            print(f"Copying {platform} clip: {output_filename}")
+            self.copy_clip(moment, platform, srt_path, audio_slice, temp_path)
+        else:
+            # Captions are pre-rendered per resolution and composited here
+            width, height = (int(x) for x in platform_spec['resolution'].split('x'))
+            caption_overlay = self.get_caption_overlay(moment, width, height) if burn_captions else None
+            
+            # Video encoding planned from the measured complexity of this range
+            plan = self.encode_planner.plan(
+                self.source_video, self.parse_timestamp(moment['start']), self.parse_timestamp(moment['end']),
+                platform_spec
+            )
+            
+            print(f"Generating {platform} clip: {output_filename}")
+            self.encode_clip(moment, platform, plan, caption_overlay, ["-y", str(temp_path)], audio_slice=audio_slice,
+                             subtitles=None if burn_captions else srt_path)
+            instrumentation.count("decoded_seconds", duration)
+        render_journal.commit(temp_path, output_path, duration)
         
         # Generate thumbnail
         thumbnail_path = platform_dir / f"{moment['id']}_thumbnail.jpg"
-        self.generate_thumbnail(output_path, thumbnail_path, timestamp=duration / 2)
+        self.generate_thumbnail(output_path, thumbnail_path, timestamp=self.get_thumbnail_time(moment))
         
         return {
             "platform": platform,
@@ -218,82 +529,507 @@ class SocialMediaClipGenerator:
             "thumbnail": str(thumbnail_path),
             "duration": duration,
             "title": moment['title'],
-            "subtitles": str(srt_path)
+            "subtitles": str(srt_path),
+            "captions": "burned" if burn_captions else "track",
+            "encode_plan": plan
+        }
+    
+    def union_cues(self, moments, union_start):
+        """Caption cues for the union of overlapping moments, relative to union_start
+        
+        Each frame takes its captions from the innermost moment covering it;
+        containing moments only caption the gaps between their parts.
+        """
+        inner = moment_manifest.innermost_moments(moments)
+        inner_ranges = [(self.parse_timestamp(m['start']), self.parse_timestamp(m['end'])) for m in inner]
+        
+        cues = []
+        for moment in moments:
+            start = self.parse_timestamp(moment['start'])
+            duration = self.parse_timestamp(moment['end']) - start
+            for cue in captions.build_cues(moment, duration, offset=start):
+                middle = start + (cue['start'] + cue['end']) / 2
+                if moment not in inner and any(a <= middle < b for a, b in inner_ranges):
+                    continue
+                shift = start - union_start
+                cues.append(dict(cue, start=cue['start'] + shift, end=cue['end'] + shift,
+                                 words=[dict(w, start=w['start'] + shift, end=w['end'] + shift) for w in cue['words']]))
+        return sorted(cues, key=lambda c: c['start'])
+    
+    @instrumentation.timed("generate_clip_group")
+    def generate_clip_group(self, moments, platform):
+        """Generate clips for overlapping moments on one platform from a single encode
+        
+        The union of the ranges is encoded once into segments split at every
+        member's boundaries (forced keyframes); each clip is the stream-copied
+        concatenation of its segments muxed with its own audio slice. Clip
+        boundaries snap to the union's frame grid.
+        """
+        platform_spec = self.platform_specs[platform]
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        platform_dir = self.output_dir / platform
+        platform_dir.mkdir(exist_ok=True)
+        
+        union_start = min(self.parse_timestamp(m['start']) for m in moments)
+        union_end = max(self.parse_timestamp(m['end']) for m in moments)
+        union_id = "union_" + hashlib.md5("|".join(m['id'] for m in moments).encode()).hexdigest()[:10]
+        union = {
+            "id": union_id,
+            "start": self.format_timestamp(union_start),
+            "end": self.format_timestamp(union_end),
+            "text": " ".join(m['text'] for m in moments)
         }
+        
+        plan = self.encode_planner.plan(self.source_video, union_start, union_end, platform_spec)
+        fps = plan['fps']
+        spans = {m['id']: (int(round((self.parse_timestamp(m['start']) - union_start) * fps)),
+                           int(round((self.parse_timestamp(m['end']) - union_start) * fps))) for m in moments}
+        total_frames = int(round((union_end - union_start) * fps))
+        boundaries = sorted({f for span in spans.values() for f in span} - {0, total_frames})
+        # A quarter frame early so the forced keyframe and the split both land on the boundary frame
+        split_times = [(b - 0.25) / fps for b in boundaries]
+        segment_starts = [0] + boundaries
+        
+        # Soft captions are muxed per clip below, so the union is encoded without any
+        burn_captions = self.burns_captions(platform)
+        width, height = (int(x) for x in platform_spec['resolution'].split('x'))
+        caption_overlay = self.get_caption_overlay(union, width, height, cues=self.union_cues(moments, union_start)) \
+            if burn_captions else None
+        
+        segment_dir = self.work_dir / f"{union_id}_{platform}_segments"
+        segment_dir.mkdir(parents=True, exist_ok=True)
+        for old_segment in segment_dir.glob("part*.mp4"):
+            old_segment.unlink()
+        output_args = ["-f", "segment", "-segment_format", "mp4", "-reset_timestamps", "1"]
+        if split_times:
+            output_args += ["-segment_times", ",".join(f"{t:.4f}" for t in split_times)]
+        output_args += ["-y", str(segment_dir / "part%03d.mp4")]
+        
+        print(f"Generating {platform} union of {', '.join(m['id'] for m in moments)}")
+        self.encode_clip(union, platform, plan, caption_overlay, output_args, keyframes=split_times)
+        instrumentation.count("decoded_seconds", union_end - union_start)
+        
+        results = []
+        for moment in moments:
+            first, last = spans[moment['id']]
+            snapped = dict(moment, start=self.format_timestamp(union_start + first / fps),
+                           end=self.format_timestamp(union_start + last / fps))
+            duration = (last - first) / fps
+            
+            output_filename = f"{moment['id']}_{platform}_{timestamp}.mp4"
+            output_path = platform_dir / output_filename
+            srt_path = platform_dir / f"{moment['id']}_subtitles.srt"
+            self.generate_subtitles(snapped, srt_path)
+            
+            temp_path = render_journal.temp_path_for(output_path)
+            concat_path = segment_dir / f"{moment['id']}.txt"
+            with open(concat_path, 'w') as f:
+                for i, segment_start in enumerate(segment_starts):
+                    if first <= segment_start < last:
+                        f.write(f"file '{(segment_dir / f'part{i:03d}.mp4').resolve()}'\n")
+            
+            cmd = [
+                "ffmpeg",
+                "-f", "concat", "-safe", "0", "-i", str(concat_path),
+                "-i", str(self.get_audio_slice(snapped))
+            ]
+            if not burn_captions:
+                cmd.extend(["-i", str(srt_path)])
+            cmd.extend([
+                "-map", "0:v", "-map", "1:a:0",
+                "-c:v", "copy",
+                "-c:a", platform_spec['audio_codec'],
+                "-b:a", "128k",
+                "-ar", "48000"
+            ])
+            if not burn_captions:
+                cmd.extend(["-map", "2:s:0", "-c:s", "mov_text", "-metadata:s:s:0", "language=eng"])
+            cmd.extend(["-movflags", "+faststart", "-y", str(temp_path)])
+            print(f"Cutting {platform} clip from union: {output_filename}")
+            self._run_ffmpeg(cmd)
+            render_journal.commit(temp_path, output_path, duration)
+            
+            thumbnail_path = platform_dir / f"{moment['id']}_thumbnail.jpg"
+            thumbnail_time = self.get_thumbnail_time(moment, clip_start=union_start + first / fps)
+            self.generate_thumbnail(output_path, thumbnail_path, timestamp=min(max(thumbnail_time, 0.0),
+                                                                                duration - 1 / fps))
+            
+            results.append({
+                "platform": platform,
+                "clip_id": moment['id'],
+                "filename": output_filename,
+                "path": str(output_path),
+                "thumbnail": str(thumbnail_path),
+                "duration": duration,
+                "title": moment['title'],
+                "subtitles": str(srt_path),
+                "captions": "burned" if burn_captions else "track",
+                "encode_plan": plan,
+                "coalesced": {
+                    "union": union_id,
+                    "start": snapped['start'],
+                    "end": snapped['end'],
+                    "members": [m['id'] for m in moments]
+                }
+            })
+        return results
+    
+    def get_proxy(self):
+        """Index of the episode proxy, transcoded once with the clip audio"""
+        if self.proxy_index is None:
+            self.work_dir.mkdir(exist_ok=True)
+            self.proxy_index = proxy_media.build_proxy(
+                self.source_video, self.work_dir / f"{self.source_video.stem}.proxy.mp4",
+                audio_path=self.clip_audio
+            )
+        return self.proxy_index
     
+    def generate_preview(self, moment, platform):
+        """Cut a low-res preview of a moment for a platform from the proxy
+        
+        The returned start/end are snapped to master frames; rendering the moment
+        with them gives exactly the previewed frames at full quality.
+        """
+        platform_spec = self.platform_specs[platform]
+        proxy = self.get_proxy()
+        start = self.parse_timestamp(moment['start'])
+        end = self.parse_timestamp(moment['end'])
+        
+        crop = None
+        if platform_spec['aspect_ratio'] != "16:9":
+            # A static crop at the reframe track's position mid-moment
+            position = 0.5
+            if platform_spec['aspect_ratio'] == "9:16":
+                position = float(reframing.position_at(self.get_reframe_track(), (start + end) / 2))
+            crop = proxy_media.aspect_crop(proxy, platform_spec['aspect_ratio'], position)
+        
+        output_path = self.output_dir / "previews" / f"{moment['id']}_{platform}_preview.mp4"
+        proxy_media.cut_preview(proxy, start, end, output_path, crop)
+        timing = proxy_media.to_master(proxy, start, end)
+        return {
+            "platform": platform,
+            "clip_id": moment['id'],
+            "path": str(output_path),
+            "start": self.format_timestamp(timing['start']),
+            "end": self.format_timestamp(timing['end']),
+            "first_frame": timing['first_frame'],
+            "last_frame": timing['last_frame']
+        }
+    
+    def generate_all_previews(self, moments=None):
+        """Preview every moment/platform combination from the proxy"""
+        previews = []
+        for moment in moments or self.viral_moments:
+            for platform in moment['platforms']:
+                previews.append(self.generate_preview(moment, platform))
+        return previews
+    
+    def get_thumbnail_time(self, moment, clip_start=None):
+        """Clip time of the moment's best thumbnail frame, chosen once per moment for all platforms
+        
+        clip_start is where the clip begins in the source when it differs from
+        the moment's start (clips cut from a union snap to its frame grid).
+        """
+        start, end = self.parse_timestamp(moment['start']), self.parse_timestamp(moment['end'])
+        with self._asset_lock("thumbnail", start, end):
+            choice = self.thumbnail_selector.select(self.source_video, start, end)
+        return choice['time'] - (start if clip_start is None else clip_start)
+    
+    @instrumentation.timed("generate_thumbnail")
     def generate_thumbnail(self, video_path, output_path, timestamp=2.0):
         """Extract thumbnail from video at specified timestamp"""
+        temp_path = render_journal.temp_path_for(output_path)
         cmd = [
             "ffmpeg",
-            "-i", str(video_path),
             "-ss", str(timestamp),
+            "-i", str(video_path),
             "-vframes", "1",
             "-q:v", "2",
-            "-y", str(output_path)
+            "-y", str(temp_path)
         ]
-        subprocess.run(cmd, check=True)
+        self._run_ffmpeg(cmd)
+        render_journal.commit(temp_path, output_path)
+    
+    def job_group_cost(self, group):
+        """Estimated encode cost of a job group: union duration x output pixels"""
+        start = min(self.parse_timestamp(job['moment']['start']) for job in group)
+        end = max(self.parse_timestamp(job['moment']['end']) for job in group)
+        return render_pool.estimate_cost(end - start, self.platform_specs[group[0]['platform']]['resolution'])
+    
+    def job_group_key(self, group):
+        """Journal key covering every input that determines a job group's outputs"""
+        with self._asset_lock("audio_index"):
+            if self.audio_index is None:
+                self.prepare_audio()
+        return render_journal.job_key(
+            source=self.source_video.resolve(),
+            source_signature=render_journal.file_signature(self.source_video),
+            audio=self.audio_index["path"],
+            audio_signature=self.audio_index["signature"],
+            platform=group[0]['platform'],
+            spec=self.platform_specs[group[0]['platform']],
+            burn_captions=self.burns_captions(group[0]['platform']),
+            moments=[job['moment'] for job in group]
+        )
+    
+    def render_job_group(self, group, resume=True):
+        """Render one job, or one group of overlapping jobs, into clip entries
+        
+        With resume, a group already recorded in the render journal (and whose
+        files are intact) is returned from the journal instead of re-rendered.
+        """
+        platform = group[0]['platform']
+        key = self.job_group_key(group)
+        journaled = self.journal.get(key) if resume else None
+        if journaled is not None:
+            print(f"Skipping {platform} clip for {', '.join(job['moment']['id'] for job in group)}: already rendered")
+            clip_infos = [dict(clip, resumed=True) for clip in journaled]
+        else:
+            clip_infos = self._render_job_group(group, platform)
+            if not any('error' in clip_info for clip_info in clip_infos):
+                self.journal.record(key, clip_infos)
+        
+        for job, clip_info in zip(group, clip_infos):
+            if len(job['serves']) > 1:
+                clip_info['serves'] = job['serves']
+        return clip_infos
     
-    def generate_all_clips(self):
-        """Generate all clips for all platforms"""
+    def _render_job_group(self, group, platform):
+        try:
+            # Overlapping ranges share one encode unless each can be stream-copied on its own
+            if len(group) > 1 and not all(self.fits_without_encode(job['moment'], platform) for job in group):
+                clip_infos = self.generate_clip_group([job['moment'] for job in group], platform)
+            else:
+                clip_infos = [self.generate_clip(job['moment'], platform) for job in group]
+            
+            # Get file size
+            for clip_info in clip_infos:
+                file_size = os.path.getsize(clip_info['path'])
+                clip_info['file_size_mb'] = round(file_size / (1024 * 1024), 2)
+            
+        except Exception as e:
+            ids = ", ".join(job['moment']['id'] for job in group)
+            print(f"Error generating {platform} clip for {ids}: {e}")
+            clip_infos = [{
+                "platform": platform,
+                "clip_id": job['moment']['id'],
+                "error": str(e)
+            } for job in group]
+        return clip_infos
+    
+    def write_metadata(self, results, earlier_results=None):
+        """Write generation_metadata.json atomically
+        
+        `earlier_results` are other sources' results rendered into the same
+        output_dir; they are merged in rather than overwritten.
+        """
+        metadata_path = self.output_dir / "generation_metadata.json"
+        document = merge_results(earlier_results + [results]) if earlier_results else results
+        temp_path = metadata_path.with_name(f"{metadata_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(document, f, indent=2)
+        os.replace(temp_path, metadata_path)
+        return metadata_path
+    
+    def generate_all_clips(self, jobs=None, workers=1, resume=True, earlier_results=None):
+        """Generate all clips for all platforms
+        
+        `jobs` (from moment_manifest.coalesce_jobs) overrides the moment/platform
+        pairs to render; each distinct range and platform is rendered once.
+        `workers` > 1 (or None for one per CPU slot) renders concurrently.
+        Groups finished by an earlier, interrupted run are reused unless
+        `resume` is False; metadata is rewritten as each group completes,
+        merged with `earlier_results` of other sources sharing output_dir.
+        """
+        if jobs is None:
+            jobs = moment_manifest.coalesce_jobs([{
+                "source_video": self.source_video,
+                "enhanced_audio": self.enhanced_audio,
+                "moments": self.viral_moments
+            }])
+        
+        # Temp renders of a crashed run would otherwise stay in the platform folders
+        swept = render_journal.sweep_partials(self.output_dir)
+        if swept:
+            print(f"Removed {swept} stale partial renders")
+        
         results = {
             "generation_timestamp": datetime.now().isoformat(),
             "source_video": str(self.source_video),
             "enhanced_audio": str(self.enhanced_audio),
+            "status": "rendering",
             "clips": []
         }
         
-        for moment in self.viral_moments:
-            for platform in moment['platforms']:
-                try:
-                    clip_info = self.generate_clip(moment, platform)
-                    results['clips'].append(clip_info)
-                    
-                    # Get file size
-                    file_size = os.path.getsize(clip_info['path'])
-                    clip_info['file_size_mb'] = round(file_size / (1024 * 1024), 2)
-                    
-                except Exception as e:
-                    print(f"Error generating {platform} clip for {moment['id']}: {e}")
-                    results['clips'].append({
-                        "platform": platform,
-                        "clip_id": moment['id'],
-                        "error": str(e)
-                    })
-        
-        # Save results metadata
-        metadata_path = self.output_dir / "generation_metadata.json"
-        with open(metadata_path, 'w') as f:
-            json.dump(results, f, indent=2)
+        results["clip_audio"] = str(self.prepare_audio())
+        results["audio_intermediate"] = self.audio_index["path"]
+        
+        # Overlapping ranges on one platform share a single encode of their union;
+        # groups run on CPU-pinned workers, most expensive first
+        groups = moment_manifest.group_overlapping(jobs)
+        results["jobs_total"] = len(groups)
+        results["jobs_done"] = 0
+        self.write_metadata(results, earlier_results)
+        
+        metadata_lock = threading.Lock()
+        
+        def render(group):
+            clip_infos = self.render_job_group(group, resume=resume)
+            with metadata_lock:
+                results['clips'].extend(clip_infos)
+                results['jobs_done'] += 1
+                self.write_metadata(results, earlier_results)
+            return clip_infos
+        
+        if workers == 1:
+            clip_lists = [render(group) for group in groups]
+        else:
+            pool = render_pool.RenderPool(workers)
+            print(f"Rendering {len(groups)} jobs on {len(pool.slots)} workers")
+            clip_lists = pool.map(render, groups, cost=self.job_group_cost)
+        
+        # Final metadata lists clips in job order rather than completion order
+        results['clips'] = [clip_info for clip_infos in clip_lists for clip_info in clip_infos]
+        results['status'] = "complete"
+        metadata_path = self.write_metadata(results, earlier_results)
         
         print(f"\nGeneration complete! Metadata saved to: {metadata_path}")
         return results
     
-    def generate_platform_package(self, platform):
-        """Create a zip package for a specific platform with all clips and metadata"""
+    def enqueue_all_clips(self, queue_path, jobs=None, run_id=None):
+        """Queue this generator's render jobs for render_queue workers instead of rendering here"""
+        queue = render_queue.RenderQueue(queue_path)
+        run_id = render_queue.enqueue_generator(queue, self, jobs, run_id)
+        print(f"Queued run {run_id} in {queue_path}: {queue.status(run_id)}")
+        return run_id
+    
+    def generate_platform_package(self, platform, clips=None):
+        """Create a zip package for a specific platform with its clips and metadata
+        
+        Only the artifacts listed in `clips` (entries from generate_all_clips) are
+        packed; without them every finished file in the platform folder is (no temp renders).
+        Already-compressed media is stored as-is and only text assets are deflated.
+        """
         platform_dir = self.output_dir / platform
         if not platform_dir.exists():
             print(f"No clips found for {platform}")
-            return
-        
-        # Create package
-        package_name = f"{platform}_clips_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        shutil.make_archive(
-            str(self.output_dir / package_name),
-            'zip',
-            str(platform_dir)
+            return None
+        
+        if clips is None:
+            files = sorted(p for p in platform_dir.iterdir() if p.is_file() and not render_journal.is_partial(p))
+            manifest = None
+        else:
+            clips = [c for c in clips if c['platform'] == platform and 'error' not in c]
+            if not clips:
+                print(f"No clips found for {platform}")
+                return None
+            files = []
+            for clip in clips:
+                for key in ("path", "thumbnail", "subtitles"):
+                    if clip.get(key) and Path(clip[key]) not in files:
+                        files.append(Path(clip[key]))
+            missing = [f for f in files if not f.exists()]
+            for file_path in missing:
+                print(f"Skipping missing {platform} artifact: {file_path}")
+            files = [f for f in files if f not in missing]
+            manifest = {"platform": platform, "clips": clips}
+        
+        package_path = self.output_dir / f"{platform}_clips_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        with zipfile.ZipFile(package_path, 'w') as package:
+            for file_path in files:
+                compress_type = zipfile.ZIP_DEFLATED if file_path.suffix.lower() in TEXT_ASSET_SUFFIXES \
+                    else zipfile.ZIP_STORED
+                package.write(file_path, arcname=file_path.name, compress_type=compress_type)
+            if manifest is not None:
+                package.writestr("metadata.json", json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+        
+        print(f"Created package: {package_path.name}")
+        return package_path
+    
+    def generate_all_packages(self, results, platforms=None):
+        """Build every platform package concurrently from a generation manifest"""
+        platforms = platforms or sorted({c['platform'] for c in results['clips'] if 'error' not in c})
+        with ThreadPoolExecutor(max_workers=max(1, len(platforms))) as pool:
+            packages = pool.map(lambda p: self.generate_platform_package(p, results['clips']), platforms)
+            return {platform: str(path) for platform, path in zip(platforms, packages) if path}
+
+def merge_results(results_list):
+    """One generation_metadata.json document for several sources rendered into one output_dir"""
+    sources = [{k: v for k, v in results.items() if k != 'clips'} for results in results_list]
+    return {
+        "generation_timestamp": results_list[-1]['generation_timestamp'],
+        "status": "complete" if all(r['status'] == "complete" for r in results_list) else "rendering",
+        "sources": sources,
+        "clips": [dict(clip, source_video=results['source_video'])
+                  for results in results_list for clip in results['clips']]
+    }
+
+def generate_from_manifest(manifest_path, defaults=None, normalize_loudness=True, workers=1, resume=True,
+                           soft_subtitles=False):
+    """Render every job of a moment manifest, once per distinct range and platform"""
+    manifest = moment_manifest.load_manifest(manifest_path, set(PLATFORM_SPECS), defaults)
+    jobs = moment_manifest.coalesce_jobs(manifest['episodes'])
+    
+    # One generator (and one set of per-episode intermediates) per source
+    groups = {}
+    for job in jobs:
+        key = (job['source_video'], job['enhanced_audio'], job['output_dir'] or "output_clips")
+        groups.setdefault(key, []).append(job)
+    
+    # Episodes sharing an output_dir share its generation_metadata.json
+    all_results = []
+    by_output_dir = {}
+    for (source_video, enhanced_audio, output_dir), group in groups.items():
+        generator = SocialMediaClipGenerator(
+            source_video, enhanced_audio, output_dir,
+            normalize_loudness=normalize_loudness,
+            platform_specs=manifest['platform_specs'],
+            soft_subtitles=soft_subtitles
         )
-        print(f"Created package: {package_name}.zip")
+        earlier_results = by_output_dir.setdefault(str(generator.output_dir.resolve()), [])
+        results = generator.generate_all_clips(jobs=group, workers=workers, resume=resume,
+                                               earlier_results=list(earlier_results))
+        earlier_results.append(results)
+        all_results.append(results)
+    return all_results
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate social media clips")
+    parser.add_argument("--manifest", help="Moment manifest (JSON/YAML) or content analysis report")
+    parser.add_argument("--video", help="Source video for manifests that don't name one")
+    parser.add_argument("--audio", help="Enhanced audio for manifests that don't name one")
+    parser.add_argument("--output-dir", help="Output directory for manifests that don't name one")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Concurrent CPU-pinned renders (default: one per 8 CPUs)")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Re-render everything instead of resuming from the render journal")
+    parser.add_argument("--soft-subtitles", action="store_true",
+                        help="Mux captions as a mov_text track (stream copy where the source fits) "
+                             "on platforms without burn_captions")
+    args = parser.parse_args()
+    workers = args.workers or None
+    
+    if args.manifest:
+        defaults = {k: v for k, v in {
+            "source_video": args.video, "enhanced_audio": args.audio, "output_dir": args.output_dir
+        }.items() if v}
+        for results in generate_from_manifest(args.manifest, defaults, workers=workers, resume=not args.fresh,
+                                              soft_subtitles=args.soft_subtitles):
+            failed = [c for c in results['clips'] if 'error' in c]
+            print(f"{results['source_video']}: {len(results['clips']) - len(failed)} clips, {len(failed)} failed")
+        return
+    
     # Initialize generator
     generator = SocialMediaClipGenerator(
         source_video="/Users/cam/Desktop/video-automation/08 - GPT 5.0 This Summer.mp4",
         enhanced_audio="/Users/cam/Desktop/video-automation/08_gpt5_enhanced.wav",
-        output_dir="/Users/cam/Desktop/video-automation/output_clips"
+        output_dir="/Users/cam/Desktop/video-automation/output_clips",
+        normalize_loudness=True,
+        soft_subtitles=args.soft_subtitles
     )
     
     # Generate all clips
-    results = generator.generate_all_clips()
+    results = generator.generate_all_clips(workers=workers, resume=not args.fresh)
     
     # Print summary
     print("\n=== CLIP GENERATION SUMMARY ===")
@@ -315,8 +1051,7 @@ def main():
     
     # Create platform packages
     print("\nCreating platform packages...")
-    for platform in ["tiktok", "youtube_shorts", "twitter", "linkedin"]:
-        generator.generate_platform_package(platform)
+    generator.generate_all_packages(results, ["tiktok", "youtube_shorts", "twitter", "linkedin"])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Lightweight profiling hooks and per-stage timing for the pipeline scripts.
+
+Instrumentation is off unless the PODCAST_PROFILE environment variable is set
+to a comma separated list of outputs:
+
+    summary   - per-span table (calls, total, mean, max) and counters at exit
+    trace     - Chrome trace JSON (open in chrome://tracing or Perfetto)
+    cprofile  - a cProfile dump for every outermost span
+
+Files are written to PODCAST_PROFILE_DIR (default: ./profiles).
+
+    PODCAST_PROFILE=summary,trace python detailed_timestamp_analysis.py
+
+When disabled, `timed` returns the function unchanged and `span`/`count`
+return immediately, so instrumented code pays almost nothing.
+"""
+import atexit
+import cProfile
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ENV_VAR = "PODCAST_PROFILE"
+ENV_DIR = "PODCAST_PROFILE_DIR"
+
+MODES = {m.strip().lower() for m in os.environ.get(ENV_VAR, "").split(",") if m.strip()}
+if MODES & {"1", "true", "on", "yes"}:
+    MODES = {"summary"}
+ENABLED = bool(MODES)
+
+_NULL_SPAN = nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+_origin = time.perf_counter()
+_events: List[Dict] = []
+_counters: Dict[str, float] = {}
+_profile_count = 0
+
+
+def _output_dir() -> Path:
+    path = Path(os.environ.get(ENV_DIR, "profiles"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _now_us() -> float:
+    return (time.perf_counter() - _origin) * 1_000_000
+
+
+@contextmanager
+def _recording_span(name: str, args: Dict):
+    global _profile_count
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+
+    profiler = None
+    if "cprofile" in MODES and depth == 0:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    start = _now_us()
+    try:
+        yield
+    finally:
+        duration = _now_us() - start
+        _local.depth = depth
+        if profiler is not None:
+            profiler.disable()
+            with _lock:
+                _profile_count += 1
+                index = _profile_count
+            safe_name = re.sub(r'[^\w.-]', '_', name)
+            profiler.dump_stats(str(_output_dir() / f"{safe_name}_{os.getpid()}_{index:04d}.prof"))
+        with _lock:
+            _events.append({
+                "name": name,
+                "ph": "X",
+                "ts": round(start, 1),
+                "dur": round(duration, 1),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args
+            })
+
+
+def span(name: str, **args):
+    """Context manager timing a block of code as a named span"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _recording_span(name, args)
+
+
+def timed(name: Optional[str] = None):
+    """Decorator recording every call of the function as a span"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _recording_span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, value: float = 1):
+    """Add `value` to a named counter"""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+        _events.append({
+            "name": name,
+            "ph": "C",
+            "ts": round(_now_us(), 1),
+            "pid": os.getpid(),
+            "args": {name: _counters[name]}
+        })
+
+
+def _input_paths(cmd) -> List[str]:
+    """Paths passed to ffmpeg/ffprobe as inputs"""
+    if isinstance(cmd, str):
+        paths = re.findall(r'-i\s+"([^"]+)"', cmd)
+        # ffprobe takes its input as the last quoted argument
+        if cmd.lstrip().startswith("ffprobe"):
+            paths += re.findall(r'"([^"]+)"\s*$', cmd)
+        return paths
+    args = [str(a) for a in cmd]
+    paths = [args[i + 1] for i, a in enumerate(args[:-1]) if a == "-i"]
+    if args and Path(args[0]).name == "ffprobe":
+        paths.append(args[-1])
+    return paths
+
+
+def _decoded_seconds(output: str) -> float:
+    """Media time reached according to the last ffmpeg progress line"""
+    matches = re.findall(r'time=(\d+):(\d+):([\d.]+)', output)
+    if not matches:
+        return 0.0
+    hours, minutes, seconds = matches[-1]
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def run(cmd, **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run that counts launches, input bytes and decoded seconds"""
+    if not ENABLED:
+        return subprocess.run(cmd, **kwargs)
+
+    count("subprocess_launches")
+    input_bytes = sum(os.path.getsize(p) for p in _input_paths(cmd) if os.path.isfile(p))
+    if input_bytes:
+        count("bytes_read", input_bytes)
+
+    result = subprocess.run(cmd, **kwargs)
+
+    output = ""
+    for stream in (result.stdout, result.stderr):
+        if isinstance(stream, bytes):
+            stream = stream.decode("utf-8", errors="ignore")
+        if stream:
+            output += stream
+    decoded = _decoded_seconds(output)
+    if decoded:
+        count("decoded_seconds", decoded)
+    return result
+
+
+def summary_table() -> str:
+    """Format the recorded spans and counters as a text table"""
+    with _lock:
+        spans = [e for e in _events if e["ph"] == "X"]
+        counters = dict(_counters)
+
+    stats: Dict[str, Dict[str, float]] = {}
+    for event in spans:
+        entry = stats.setdefault(event["name"], {"calls": 0, "total": 0.0, "max": 0.0})
+        entry["calls"] += 1
+        entry["total"] += event["dur"] / 1000
+        entry["max"] = max(entry["max"], event["dur"] / 1000)
+
+    lines = [f"{'span':<50} {'calls':>7} {'total ms':>12} {'mean ms':>10} {'max ms':>10}", "-" * 93]
+    for span_name, entry in sorted(stats.items(), key=lambda kv: kv[1]["total"], reverse=True):
+        lines.append(f"{span_name:<50} {entry['calls']:>7} {entry['total']:>12.1f} "
+                     f"{entry['total'] / entry['calls']:>10.1f} {entry['max']:>10.1f}")
+    if counters:
+        lines.append("")
+        for counter_name, value in sorted(counters.items()):
+            lines.append(f"{counter_name:<50} {value:>15,.2f}")
+    return "\n".join(lines)
+
+
+def write_trace(path: Optional[Path] = None) -> Path:
+    """Write the recorded events as Chrome trace JSON"""
+    path = Path(path or _output_dir() / f"trace_{os.getpid()}.json")
+    with _lock:
+        events = list(_events)
+    with open(path, 'w') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return path
+
+
+def _flush():
+    if not _events:
+        return
+    if "trace" in MODES:
+        path = write_trace()
+        print(f"Trace written to: {path}", file=sys.stderr)
+    if "summary" in MODES:
+        table = summary_table()
+        (_output_dir() / f"profile_summary_{os.getpid()}.txt").write_text(table + "\n")
+        print("\n=== PROFILE SUMMARY ===\n" + table, file=sys.stderr)
+
+
+if ENABLED:
+    atexit.register(_flush)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Shared ffprobe results for every script in the pipeline.
+
+Each media file is probed once per (path, size, mtime): the parsed
+format/streams JSON is memoized in process (LRU) and in a sidecar next to
+the file (<name>.probe.json), so later runs and other scripts reuse it
+without starting ffprobe. Accessors return the values the scripts need
+(duration, sample rate, fps, frame size, codecs, pixel format, bitrate),
+and probe_many() probes a batch of files on a thread pool. keyframe_before()
+is the one lookup that reads frames rather than headers.
+
+    python media_info.py "08 - GPT 5.0 This Summer.mp4" 08_gpt5_enhanced.wav
+"""
+import argparse
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import instrumentation
+
+LRU_ENTRIES = 512
+DEFAULT_WORKERS = 8
+
+
+def sidecar_path_for(media_path) -> Path:
+    media_path = Path(media_path)
+    return media_path.with_name(media_path.name + ".probe.json")
+
+
+def _signature(path: Path) -> Dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _run_ffprobe(path: Path) -> Dict:
+    cmd = [
+        "ffprobe", "-v", "error", "-print_format", "json",
+        "-show_format", "-show_streams",
+        str(path)
+    ]
+    result = instrumentation.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe cannot read {path}: {result.stderr.strip()}")
+    return json.loads(result.stdout)
+
+
+def _parse_rate(rate: Optional[str]) -> Optional[float]:
+    """Frames per second from an ffprobe rational such as "30000/1001" """
+    if not rate or rate in ("0/0", "0"):
+        return None
+    try:
+        value = Fraction(rate)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return float(value) if value > 0 else None
+
+
+class MediaInfo:
+    """ffprobe memoized per (path, size, mtime) in memory and in sidecar files"""
+
+    def __init__(self, max_entries: int = LRU_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.probes = 0
+
+    def probe(self, path, persist: bool = True) -> Dict:
+        """Parsed ffprobe format/streams JSON; persist=False skips the sidecar (temp files)"""
+        path = Path(path).resolve()
+        signature = _signature(path)
+        key = (str(path), signature["size"], signature["mtime_ns"])
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        info = None
+        sidecar = sidecar_path_for(path)
+        if persist and sidecar.exists():
+            try:
+                with open(sidecar, 'r') as f:
+                    cached = json.load(f)
+                if cached.get("signature") == signature:
+                    info = cached["probe"]
+            except (OSError, ValueError, KeyError):
+                info = None
+
+        if info is None:
+            info = _run_ffprobe(path)
+            with self._lock:
+                self.probes += 1
+            instrumentation.count("ffprobe_calls")
+            if persist:
+                try:
+                    temp_path = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+                    with open(temp_path, 'w') as f:
+                        json.dump({"signature": signature, "probe": info}, f)
+                    os.replace(temp_path, sidecar)
+                except OSError:
+                    # Read-only media directories still get the in-process cache
+                    pass
+
+        with self._lock:
+            self._entries[key] = info
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return info
+
+    def probe_many(self, paths: List, workers: int = DEFAULT_WORKERS) -> Dict[str, Dict]:
+        """Probe a batch of files concurrently; maps each path (as given) to its info"""
+        paths = [str(p) for p in paths]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths) or 1))) as pool:
+            return dict(zip(paths, pool.map(self.probe, paths)))
+
+    def stream(self, path, kind: str) -> Optional[Dict]:
+        """First stream of a codec type ("video", "audio")"""
+        return next((s for s in self.probe(path).get("streams", []) if s.get("codec_type") == kind), None)
+
+    def duration(self, path) -> Optional[float]:
+        info = self.probe(path)
+        value = info.get("format", {}).get("duration")
+        if value is None:
+            value = next((s.get("duration") for s in info.get("streams", []) if s.get("duration")), None)
+        return float(value) if value is not None else None
+
+    def sample_rate(self, path) -> Optional[int]:
+        stream = self.stream(path, "audio")
+        return int(stream["sample_rate"]) if stream and stream.get("sample_rate") else None
+
+    def channels(self, path) -> Optional[int]:
+        stream = self.stream(path, "audio")
+        return int(stream["channels"]) if stream and stream.get("channels") else None
+
+    def frame_rate(self, path) -> Optional[str]:
+        """Exact frame rate as an ffmpeg rational ("30000/1001"), for -r"""
+        stream = self.stream(path, "video")
+        if not stream:
+            return None
+        for key in ("r_frame_rate", "avg_frame_rate"):
+            if _parse_rate(stream.get(key)):
+                return stream[key]
+        return None
+
+    def fps(self, path) -> Optional[float]:
+        return _parse_rate(self.frame_rate(path))
+
+    def video_size(self, path) -> Optional[Tuple[int, int]]:
+        stream = self.stream(path, "video")
+        return (int(stream["width"]), int(stream["height"])) if stream else None
+
+    def codec(self, path, kind: str = "video") -> Optional[str]:
+        stream = self.stream(path, kind)
+        return stream.get("codec_name") if stream else None
+
+    def pix_fmt(self, path) -> Optional[str]:
+        stream = self.stream(path, "video")
+        return stream.get("pix_fmt") if stream else None
+
+    def constant_frame_rate(self, path) -> bool:
+        """Whether the video's average frame rate matches its nominal one (when both are known)"""
+        stream = self.stream(path, "video")
+        if not stream:
+            return False
+        nominal, average = _parse_rate(stream.get("r_frame_rate")), _parse_rate(stream.get("avg_frame_rate"))
+        return nominal is not None and (average is None or abs(nominal - average) < 0.01)
+
+    def bit_rate(self, path, kind: str = "video") -> Optional[int]:
+        """Stream bitrate in bits/s; for video without one, the container's minus the audio streams'"""
+        info = self.probe(path)
+        stream = self.stream(path, kind)
+        if not stream:
+            return None
+        if stream.get("bit_rate"):
+            return int(stream["bit_rate"])
+        total = info.get("format", {}).get("bit_rate")
+        if kind != "video" or not total:
+            return None
+        audio = sum(int(s.get("bit_rate") or 0) for s in info.get("streams", []) if s.get("codec_type") == "audio")
+        return int(total) - audio
+
+    def summary(self, path) -> Dict:
+        size = self.video_size(path)
+        return {
+            "path": str(path),
+            "duration": self.duration(path),
+            "format": self.probe(path).get("format", {}).get("format_name"),
+            "video_codec": self.codec(path, "video"),
+            "width": size[0] if size else None,
+            "height": size[1] if size else None,
+            "fps": self.fps(path),
+            "audio_codec": self.codec(path, "audio"),
+            "sample_rate": self.sample_rate(path),
+            "channels": self.channels(path)
+        }
+
+
+_default = MediaInfo()
+
+
+def probe(path, persist: bool = True) -> Dict:
+    return _default.probe(path, persist)
+
+
+def probe_many(paths: List, workers: int = DEFAULT_WORKERS) -> Dict[str, Dict]:
+    return _default.probe_many(paths, workers)
+
+
+def duration(path) -> Optional[float]:
+    return _default.duration(path)
+
+
+def sample_rate(path) -> Optional[int]:
+    return _default.sample_rate(path)
+
+
+def channels(path) -> Optional[int]:
+    return _default.channels(path)
+
+
+def frame_rate(path) -> Optional[str]:
+    return _default.frame_rate(path)
+
+
+def fps(path) -> Optional[float]:
+    return _default.fps(path)
+
+
+def fps_or_default(path, default: float = 30.0) -> Tuple[float, bool]:
+    """Frame rate of a video, or (default, True) when the file is missing or has none"""
+    value = fps(path) if os.path.exists(path) else None
+    return (value, False) if value else (default, True)
+
+
+def video_size(path) -> Optional[Tuple[int, int]]:
+    return _default.video_size(path)
+
+
+def codec(path, kind: str = "video") -> Optional[str]:
+    return _default.codec(path, kind)
+
+
+def pix_fmt(path) -> Optional[str]:
+    return _default.pix_fmt(path)
+
+
+def constant_frame_rate(path) -> bool:
+    return _default.constant_frame_rate(path)
+
+
+def bit_rate(path, kind: str = "video") -> Optional[int]:
+    return _default.bit_rate(path, kind)
+
+
+def summary(path) -> Dict:
+    return _default.summary(path)
+
+
+def keyframe_before(path, timestamp: float) -> float:
+    """Time of the last video keyframe at or before timestamp (where an input-seeked stream copy starts)
+
+    Only keyframes are decoded, and only the first one the seek lands on.
+    """
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-skip_frame", "nokey", "-ss", f"{timestamp:.3f}", "-noaccurate_seek",
+        "-i", str(path), "-copyts",
+        "-map", "0:v:0", "-frames:v", "1", "-vf", "showinfo", "-f", "null", "-"
+    ]
+    result = instrumentation.run(cmd, capture_output=True, text=True)
+    match = re.search(r"pts_time:\s*(-?[\d.]+)", result.stderr)
+    if result.returncode != 0 or not match:
+        raise RuntimeError(f"Cannot find a keyframe before {timestamp:.3f}s in {path}")
+    return min(float(match.group(1)), timestamp)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe media files once and print what the pipeline reads")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    probe_many(args.paths, args.workers)
+    print(json.dumps([summary(p) for p in args.paths], indent=2))
+    print(f"ffprobe runs: {_default.probes} for {len(args.paths)} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Embed titles, tags, chapters and artwork into masters and clips by remux.
+
+Episode metadata (08_gpt5_podcast_metadata.json from the metadata generator,
+or the chapters/keywords of a content analysis report) is turned into an
+FFMETADATA file and applied with -map_metadata/-map_chapters and -c copy, so
+each file costs one sequential read and write and no re-encode. Before
+writing, the metadata already embedded in a file is read back (a header-only
+ffmpeg call) and compared with what the container can hold; files that
+already match are skipped. Many files are tagged in parallel.
+
+The tagged file replaces the original atomically. Rewriting a master changes
+its signature, so clip renders keyed on it are redone; tag masters after
+rendering, or write copies with --output-dir.
+
+    python metadata_writer.py apply 08_gpt5_podcast_metadata.json "08 - GPT 5.0 This Summer.mp4" --artwork cover.jpg
+    python metadata_writer.py clips output_clips/generation_metadata.json --metadata 08_gpt5_podcast_metadata.json
+    python metadata_writer.py show "08 - GPT 5.0 This Summer.mp4"
+"""
+import argparse
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import instrumentation
+import media_info
+import moment_manifest
+import render_journal
+
+DEFAULT_WORKERS = 4
+# Chapter times may move by up to a codec frame when a container rounds them
+CHAPTER_TOLERANCE = 0.05
+
+# Global tags each container keeps through a remux (None: everything)
+CONTAINER_TAGS = {
+    ".mp4": {"title", "artist", "album_artist", "album", "date", "track", "comment", "genre", "copyright",
+             "description", "synopsis", "show", "episode_id", "network", "keywords"},
+    ".mov": {"title", "artist", "album", "date", "comment", "genre", "copyright"},
+    ".wav": {"title", "artist", "album", "date", "track", "comment", "genre", "copyright", "language"},
+    ".mp3": None,
+    ".mkv": None
+}
+CONTAINER_TAGS[".m4a"] = CONTAINER_TAGS[".m4v"] = CONTAINER_TAGS[".mp4"]
+CHAPTER_CONTAINERS = {".mp4", ".m4a", ".m4v", ".mov", ".mp3", ".mkv"}
+ARTWORK_CONTAINERS = {".mp4", ".m4a", ".m4v", ".mp3"}
+
+
+def _escape(value) -> str:
+    return re.sub(r'([=;#\\\n])', r'\\\1', str(value))
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r'\\(.)', r'\1', value, flags=re.DOTALL)
+
+
+def _chapter_list(data: Dict, duration: Optional[float]) -> List[Dict]:
+    """Chapters as {start, end, title} seconds from either metadata or report chapters"""
+    chapters = []
+    entries = data.get("chapters") or []
+    for i, chapter in enumerate(entries):
+        start = moment_manifest.parse_timestamp(chapter.get("start_time", chapter.get("timestamp", 0)))
+        if "end_time" in chapter:
+            end = moment_manifest.parse_timestamp(chapter["end_time"])
+        elif i + 1 < len(entries):
+            end = moment_manifest.parse_timestamp(entries[i + 1].get("start_time", entries[i + 1].get("timestamp")))
+        else:
+            end = duration
+        if end is not None and duration is not None:
+            end = min(end, duration)
+        # Chapters past the end of a shorter file come out empty or inverted once clamped
+        if end is None or end <= start:
+            continue
+        chapters.append({"start": start, "end": end, "title": chapter.get("title", f"Chapter {i + 1}")})
+    return chapters
+
+
+def episode_tags(data: Dict) -> Dict[str, str]:
+    """Global tags from podcast metadata (episode_metadata) or an analysis report (podcast_metadata)"""
+    episode = data.get("episode_metadata")
+    tags = {}
+    if episode:
+        people = ", ".join(episode.get("hosts", []) + episode.get("guests", []))
+        tags.update({
+            "title": episode.get("title"),
+            "artist": people,
+            "album_artist": people,
+            "album": episode.get("series"),
+            "show": episode.get("series"),
+            "date": episode.get("release_date"),
+            "genre": (episode.get("categories") or [None])[0],
+            "comment": episode.get("subtitle"),
+            "description": episode.get("description"),
+            "episode_id": episode.get("episode_number"),
+            "keywords": ", ".join(episode.get("tags", [])),
+            "language": episode.get("language")
+        })
+    else:
+        podcast = data.get("podcast_metadata", {})
+        keywords = [word for words in (data.get("seo_keywords") or {}).values() for word in words]
+        tags.update({
+            "title": podcast.get("title"),
+            "description": (data.get("content_themes") or {}).get("primary"),
+            "keywords": ", ".join(dict.fromkeys(keywords)),
+            "language": podcast.get("language")
+        })
+    return {key: str(value) for key, value in tags.items() if value not in (None, "")}
+
+
+def build_metadata(data: Dict, duration: Optional[float] = None, chapters: bool = True) -> Dict:
+    """Tags and chapters to embed for one episode"""
+    return {"tags": episode_tags(data), "chapters": _chapter_list(data, duration) if chapters else []}
+
+
+def for_container(metadata: Dict, path) -> Dict:
+    """The part of the metadata a file's container can hold"""
+    suffix = Path(path).suffix.lower()
+    keep = CONTAINER_TAGS.get(suffix)
+    return {
+        "tags": {k: v for k, v in metadata["tags"].items() if keep is None or k in keep},
+        "chapters": metadata["chapters"] if suffix in CHAPTER_CONTAINERS else []
+    }
+
+
+def write_ffmetadata(metadata: Dict, output_path) -> Path:
+    lines = [";FFMETADATA1"]
+    lines += [f"{key}={_escape(value)}" for key, value in metadata["tags"].items()]
+    for chapter in metadata["chapters"]:
+        lines += [
+            "[CHAPTER]",
+            "TIMEBASE=1/1000",
+            f"START={int(round(chapter['start'] * 1000))}",
+            f"END={int(round(chapter['end'] * 1000))}",
+            f"title={_escape(chapter['title'])}"
+        ]
+    output_path = Path(output_path)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    return output_path
+
+
+def parse_ffmetadata(text: str) -> Dict:
+    """Global tags (lowercase keys) and chapters (seconds) from an FFMETADATA dump"""
+    tags, chapters = {}, []
+    section, current = None, None
+    # Escaped newlines continue a value onto the next line
+    for line in re.split(r'(?<!\\)\n', text):
+        if not line or line.startswith((";", "#")):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            section = line[1:-1]
+            if section == "CHAPTER":
+                current = {"timebase": "1/1000", "title": ""}
+                chapters.append(current)
+            continue
+        key, _, value = line.partition("=")
+        value = _unescape(value)
+        if section is None:
+            tags[key.lower()] = value
+        elif section == "CHAPTER":
+            current[key.lower()] = value
+
+    parsed = []
+    for chapter in chapters:
+        num, den = (int(x) for x in chapter["timebase"].split("/"))
+        parsed.append({"start": int(chapter.get("start", 0)) * num / den,
+                       "end": int(chapter.get("end", 0)) * num / den, "title": chapter["title"]})
+    return {"tags": tags, "chapters": parsed}
+
+
+def read_embedded(path) -> Dict:
+    """Metadata currently embedded in a file (reads headers only)"""
+    result = instrumentation.run(["ffmpeg", "-v", "error", "-i", str(path), "-f", "ffmetadata", "-"],
+                                 capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Cannot read metadata from {path}: {result.stderr.strip()}")
+    return parse_ffmetadata(result.stdout)
+
+
+def _streams(path) -> List[Dict]:
+    # Not persisted: tagged files are rewritten, which would only leave stale sidecars
+    return media_info.probe(path, persist=False).get("streams", [])
+
+
+def _embedded_artwork(path) -> List[bytes]:
+    """Bytes of every attached picture (cover art) in a file, as stored"""
+    pictures = []
+    for index, stream in enumerate(_streams(path)):
+        if not stream.get("disposition", {}).get("attached_pic"):
+            continue
+        result = instrumentation.run(["ffmpeg", "-v", "error", "-i", str(path), "-map", f"0:{index}",
+                                      "-c", "copy", "-f", "image2pipe", "-"], capture_output=True)
+        if result.returncode == 0:
+            pictures.append(result.stdout)
+    return pictures
+
+
+def _has_artwork(path, artwork) -> bool:
+    """Whether the file's only cover is the artwork file (covers are stream-copied, so bytes match)"""
+    return _embedded_artwork(path) == [Path(artwork).read_bytes()]
+
+
+def matches(metadata: Dict, embedded: Dict) -> bool:
+    """Whether every tag and chapter to embed is already there"""
+    if any(embedded["tags"].get(key) != value for key, value in metadata["tags"].items()):
+        return False
+    if len(metadata["chapters"]) != len(embedded["chapters"]):
+        return False
+    return all(abs(a["start"] - b["start"]) <= CHAPTER_TOLERANCE and abs(a["end"] - b["end"]) <= CHAPTER_TOLERANCE
+               and a["title"] == b["title"] for a, b in zip(metadata["chapters"], embedded["chapters"]))
+
+
+def apply_metadata(path, metadata: Dict, artwork=None, output_path=None, faststart: bool = False,
+                   force: bool = False) -> Dict:
+    """Remux one file with the given tags, chapters and artwork; skipped if already embedded
+
+    Returns {"path", "status"} with status "written" or "unchanged".
+    """
+    path = Path(path)
+    output_path = Path(output_path) if output_path else path
+    metadata = for_container(metadata, output_path)
+    suffix = output_path.suffix.lower()
+    artwork = artwork if artwork and suffix in ARTWORK_CONTAINERS else None
+
+    if not force and output_path.exists():
+        if matches(metadata, read_embedded(output_path)) and (not artwork or _has_artwork(output_path, artwork)):
+            return {"path": str(output_path), "status": "unchanged"}
+
+    temp_path = render_journal.temp_path_for(output_path)
+    metadata_path = temp_path.with_name(temp_path.name + ".ffmeta")
+    write_ffmetadata(metadata, metadata_path)
+    cmd = ["ffmpeg", "-v", "error", "-i", str(path), "-f", "ffmetadata", "-i", str(metadata_path)]
+    if artwork:
+        cmd.extend(["-i", str(artwork)])
+    # Streams are mapped in their original order, minus the chapter text track the
+    # mp4 muxer writes (new chapters replace it) and, with new artwork, the old cover
+    kept_video = 0
+    for index, stream in enumerate(_streams(path)):
+        if stream.get("codec_type") == "data" and stream.get("codec_tag_string") == "text":
+            continue
+        is_artwork = bool(stream.get("disposition", {}).get("attached_pic"))
+        if artwork and is_artwork:
+            continue
+        if stream.get("codec_type") == "video":
+            kept_video += 1
+        cmd.extend(["-map", f"0:{index}"])
+    if artwork:
+        cmd.extend(["-map", "2:v:0", f"-disposition:v:{kept_video}", "attached_pic"])
+    cmd.extend(["-map_metadata", "1", "-map_chapters", "1", "-c", "copy"])
+    if faststart and suffix in (".mp4", ".m4a", ".m4v", ".mov"):
+        cmd.extend(["-movflags", "+faststart"])
+    cmd.extend(["-y", str(temp_path)])
+    try:
+        result = instrumentation.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Metadata remux of {path} failed: {result.stderr.strip()}")
+        render_journal.commit(temp_path, output_path, media_info.duration(path),
+                              audio=any(stream.get("codec_type") == "audio" for stream in _streams(path)))
+    finally:
+        metadata_path.unlink(missing_ok=True)
+        temp_path.unlink(missing_ok=True)
+    return {"path": str(output_path), "status": "written"}
+
+
+def apply_many(items: List[Dict], workers: int = DEFAULT_WORKERS, **kwargs) -> List[Dict]:
+    """apply_metadata over {"path", "metadata", "artwork"?, "output_path"?} items in parallel
+
+    Failures are reported per file ({"status": "error"}) instead of stopping the batch.
+    """
+    media_info.probe_many([item["path"] for item in items], workers=workers)
+
+    def apply(item):
+        try:
+            return apply_metadata(item["path"], item["metadata"], item.get("artwork"), item.get("output_path"),
+                                  **kwargs)
+        except (RuntimeError, OSError) as e:
+            return {"path": str(item["path"]), "status": "error", "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(apply, items))
+
+
+def clip_items(generation_metadata: Dict, episode_data: Optional[Dict] = None) -> List[Dict]:
+    """Per-clip metadata for every rendered clip: its own title over the episode's tags"""
+    base = episode_tags(episode_data) if episode_data else {}
+    items = []
+    for clip in generation_metadata.get("clips", []):
+        if "error" in clip or not clip.get("path"):
+            continue
+        tags = {k: v for k, v in base.items() if k != "description"}
+        if base.get("title"):
+            tags["comment"] = base["title"]
+        tags["title"] = clip.get("title") or clip["clip_id"]
+        items.append({"path": clip["path"], "metadata": {"tags": tags, "chapters": []}})
+    return items
+
+
+def _load_json(path) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed metadata and chapters into media files without re-encoding")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    apply_parser = subparsers.add_parser("apply", help="Tag episode masters from podcast metadata or an analysis report")
+    apply_parser.add_argument("metadata", help="Podcast metadata JSON or content analysis report")
+    apply_parser.add_argument("files", nargs="+")
+    apply_parser.add_argument("--artwork", help="Cover image for mp4/m4a/mp3 outputs")
+    apply_parser.add_argument("--output-dir", help="Write tagged copies here instead of replacing the files")
+    apply_parser.add_argument("--no-chapters", action="store_true")
+
+    clips_parser = subparsers.add_parser("clips", help="Tag every clip listed in a generation_metadata.json")
+    clips_parser.add_argument("generation_metadata")
+    clips_parser.add_argument("--metadata", help="Podcast metadata JSON supplying the episode tags")
+    clips_parser.add_argument("--artwork")
+
+    for sub in (apply_parser, clips_parser):
+        sub.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+        sub.add_argument("--force", action="store_true", help="Rewrite even if the metadata already matches")
+        sub.add_argument("--faststart", action="store_true",
+                         help="Move the mp4 index to the front (one extra pass over each file)")
+
+    show_parser = subparsers.add_parser("show", help="Print the metadata embedded in files")
+    show_parser.add_argument("files", nargs="+")
+
+    args = parser.parse_args()
+
+    if args.command == "show":
+        for path in args.files:
+            print(json.dumps({"path": path, **read_embedded(path)}, indent=2))
+        return
+
+    if args.command == "apply":
+        data = _load_json(args.metadata)
+        items = []
+        for path in args.files:
+            output_path = Path(args.output_dir) / Path(path).name if args.output_dir else None
+            if output_path:
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+            items.append({
+                "path": path,
+                "metadata": build_metadata(data, media_info.duration(path), chapters=not args.no_chapters),
+                "artwork": args.artwork,
+                "output_path": output_path
+            })
+    else:
+        items = clip_items(_load_json(args.generation_metadata), _load_json(args.metadata) if args.metadata else None)
+        for item in items:
+            item["artwork"] = args.artwork
+
+    results = apply_many(items, workers=args.workers, faststart=args.faststart, force=args.force)
+    for result in results:
+        print(f"{result['status']:>9}  {result['path']}" + (f": {result['error']}" if "error" in result else ""))
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print(", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Catalog-wide near-duplicate detection for clip moments.
+
+Each moment's text is reduced to a MinHash signature over word 3-shingles;
+signatures are split into LSH bands and stored in a SQLite database next to
+the published clips' episode, id and range. Looking up a new candidate only
+touches the moments that share at least one band bucket with it, so the cost
+does not grow with the catalog the way pairwise comparison does; candidates
+whose estimated Jaccard similarity passes the threshold are reported.
+
+    python moment_dedup.py publish content_analysis_report.json --episode 08_gpt5
+    python moment_dedup.py publish moments.yaml
+    python moment_dedup.py check content_analysis_report.json --episode 09_agents
+"""
+import argparse
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import moment_manifest
+import sqlite_store
+
+DEFAULT_DB = "published_moments.db"
+NUM_PERM = 128
+BANDS = 32                   # 32 bands of 4 rows: pairs near 0.5 similarity collide with ~0.9 probability
+SHINGLE_WORDS = 3
+DEFAULT_THRESHOLD = 0.5      # estimated Jaccard similarity of the shingle sets
+SEED = 1
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_random = np.random.RandomState(SEED)
+_PERM_A = _random.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _random.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS moments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    episode TEXT NOT NULL,
+    moment_id TEXT NOT NULL,
+    start TEXT,
+    end TEXT,
+    text TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    published REAL NOT NULL,
+    UNIQUE (episode, moment_id)
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    moment INTEGER NOT NULL REFERENCES moments (id)
+);
+CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, bucket);
+CREATE INDEX IF NOT EXISTS bands_moment ON bands (moment);
+"""
+
+# One indexed equality lookup per band (a row-value IN list would scan the whole table)
+CANDIDATES_QUERY = ("SELECT * FROM moments WHERE id IN ("
+                    + " UNION ".join(["SELECT moment FROM bands WHERE band = ? AND bucket = ?"] * BANDS) + ")")
+
+
+def shingles(text: str) -> set:
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature (NUM_PERM uint32 values); None for text without words"""
+    items = shingles(text)
+    if not items:
+        return None
+    hashes = np.array([int.from_bytes(hashlib.blake2b(item.encode(), digest_size=4).digest(), "little")
+                       for item in items], dtype=np.uint64)
+    # (a * x + b) mod p per permutation, all shingles at once; x < 2^32 and a < 2^32 keep it in uint64
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(sig: np.ndarray) -> List[int]:
+    """One bucket id per band: a 63-bit hash of that band's rows"""
+    rows = len(sig) // BANDS
+    return [int.from_bytes(hashlib.blake2b(sig[i * rows:(i + 1) * rows].tobytes(), digest_size=8).digest(),
+                           "little") >> 1
+            for i in range(BANDS)]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(a == b))
+
+
+class MomentIndex(sqlite_store.SQLiteStore):
+    """Published moments with their MinHash signatures in an LSH band table"""
+
+    schema = SCHEMA
+
+    def __init__(self, path=DEFAULT_DB):
+        super().__init__(path)
+
+    def publish(self, episode: str, moments: List[Dict]) -> int:
+        """Record moments as published clips (replacing earlier entries with the same id)"""
+        added = 0
+        now = time.time()
+        with self._transaction() as db:
+            for moment in moments:
+                sig = signature(moment.get('text', ''))
+                if sig is None:
+                    continue
+                old = db.execute("SELECT id FROM moments WHERE episode = ? AND moment_id = ?",
+                                 (episode, moment['id'])).fetchone()
+                if old is not None:
+                    db.execute("DELETE FROM bands WHERE moment = ?", (old["id"],))
+                    db.execute("DELETE FROM moments WHERE id = ?", (old["id"],))
+                row_id = db.execute(
+                    "INSERT INTO moments (episode, moment_id, start, end, text, signature, published) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (episode, moment['id'], str(moment.get('start', '')), str(moment.get('end', '')),
+                     moment['text'], sig.tobytes(), now)
+                ).lastrowid
+                db.executemany("INSERT INTO bands (band, bucket, moment) VALUES (?, ?, ?)",
+                               [(band, bucket, row_id) for band, bucket in enumerate(band_buckets(sig))])
+                added += 1
+        return added
+
+    def find_similar(self, text: str, threshold: float = DEFAULT_THRESHOLD,
+                     exclude_episode: Optional[str] = None) -> List[Dict]:
+        """Published moments whose estimated similarity to text is at least threshold, best first"""
+        sig = signature(text)
+        if sig is None:
+            return []
+        buckets = band_buckets(sig)
+        with self._connect() as db:
+            rows = db.execute(CANDIDATES_QUERY, [value for pair in enumerate(buckets) for value in pair]).fetchall()
+
+        matches = []
+        for row in rows:
+            if exclude_episode is not None and row["episode"] == exclude_episode:
+                continue
+            score = similarity(sig, np.frombuffer(row["signature"], dtype=np.uint32))
+            if score >= threshold:
+                matches.append({
+                    "episode": row["episode"],
+                    "moment_id": row["moment_id"],
+                    "start": row["start"],
+                    "end": row["end"],
+                    "text": row["text"],
+                    "similarity": round(score, 3)
+                })
+        matches.sort(key=lambda m: m["similarity"], reverse=True)
+        return matches
+
+    def stats(self) -> Dict:
+        with self._connect() as db:
+            row = db.execute("SELECT COUNT(*) AS moments, COUNT(DISTINCT episode) AS episodes FROM moments").fetchone()
+        return dict(row)
+
+
+def _load_moments(path, episode: Optional[str]) -> Dict[str, List[Dict]]:
+    """Moments per episode from an analysis report or a moment manifest"""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f) if path.suffix.lower() == ".json" else None
+    if data is not None and 'viral_moments' in data:
+        return {episode or path.stem: moment_manifest.moments_from_report(data)}
+    episodes = moment_manifest.load_manifest(path)['episodes']
+    if episode is None:
+        return {e['id']: e['moments'] for e in episodes}
+    # One name for several episodes would merge them under it
+    if len(episodes) > 1:
+        raise ValueError(f"{path} holds {len(episodes)} episodes; --episode only renames a single one")
+    return {episode: episodes[0]['moments']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag clip moments that repeat already published ones")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Published moments database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    publish_parser = subparsers.add_parser("publish", help="Record the moments of a report or manifest as published")
+    publish_parser.add_argument("source")
+    publish_parser.add_argument("--episode", help="Episode id (default: report file name / manifest ids)")
+
+    check_parser = subparsers.add_parser("check", help="List moments that near-duplicate published ones")
+    check_parser.add_argument("source")
+    check_parser.add_argument("--episode")
+    check_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    subparsers.add_parser("stats")
+
+    args = parser.parse_args()
+    index = MomentIndex(args.db)
+    if args.command in ("publish", "check"):
+        try:
+            episodes = _load_moments(args.source, args.episode)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.command == "publish":
+        for episode, moments in episodes.items():
+            print(f"{episode}: {index.publish(episode, moments)} moments published")
+    elif args.command == "check":
+        duplicates = 0
+        for episode, moments in episodes.items():
+            for moment in moments:
+                matches = index.find_similar(moment['text'], args.threshold, exclude_episode=episode)
+                if matches:
+                    duplicates += 1
+                    best = matches[0]
+                    print(f"{episode}/{moment['id']} ~ {best['episode']}/{best['moment_id']} "
+                          f"({best['similarity']:.2f}): {best['text'][:70]}")
+        print(f"{duplicates} near-duplicate moments")
+    else:
+        print(json.dumps(index.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
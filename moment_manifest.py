@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Moment manifests: which ranges of which episodes to render for which platforms.
+
+A manifest is either a content analysis report (content_analysis.py output)
+or a JSON/YAML file listing episodes:
+
+    platform_specs:            # optional overrides/additions, merged per platform
+      tiktok: {crf: 21}
+    episodes:
+      - id: 08_gpt5
+        source_video: "08 - GPT 5.0 This Summer.mp4"
+        enhanced_audio: 08_gpt5_enhanced.wav
+        output_dir: output_clips
+        analysis_report: content_analysis_report.json   # and/or explicit moments:
+        moments:
+          - {id: sam_altman, start: "00:00:06.367", end: "00:00:11.439",
+             text: "...", platforms: [twitter, linkedin], title: "..."}
+
+Moments are validated, near-duplicate ranges within an episode are merged,
+moment ids are made unique across the manifest (an id another episode
+already uses gets that episode's id as a prefix), and identical (source, range, platform) jobs across episodes collapse into a
+single render job that lists every moment it serves. Jobs whose ranges
+overlap on the same platform are grouped so their union is encoded once.
+"""
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# Two moments covering mostly the same audio are one moment (intersection over union)
+DUPLICATE_OVERLAP = 0.8
+
+
+def parse_timestamp(value) -> float:
+    """Seconds from HH:MM:SS.mmm / MM:SS.mmm or a plain number"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return sum(float(x) * 60 ** i for i, x in enumerate(reversed(str(value).split(':'))))
+
+
+def format_timestamp(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    return f"{hours:02d}:{minutes:02d}:{millis / 1000:06.3f}"
+
+
+def _slug(text: str) -> str:
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    return "_".join(words[:4]) or "moment"
+
+
+def moments_from_report(report: Dict) -> List[Dict]:
+    """Generator moments from the viral_moments of a content analysis report"""
+    moments = []
+    for entry in report.get('viral_moments', []):
+        moment = {
+            "id": entry.get('id') or f"{_slug(entry['text'])}_{entry.get('segment_index', len(moments))}",
+            "start": entry['start_time'],
+            "end": entry['end_time'],
+            "text": entry['text'],
+            "platforms": list(entry.get('suitable_platforms', [])),
+            "title": entry.get('suggested_title', entry['text'][:60]),
+            "score": entry.get('engagement_score', {}).get('overall_score')
+        }
+        if entry.get('words'):
+            moment["words"] = entry['words']
+        moments.append(moment)
+    return moments
+
+
+def validate_moments(moments: List[Dict], platforms: Optional[set] = None) -> List[Dict]:
+    """Normalize moments, dropping unknown platforms; raise ValueError on broken entries"""
+    errors = []
+    cleaned = []
+    seen_ids = set()
+    for i, moment in enumerate(moments):
+        label = moment.get('id', f"#{i}")
+        missing = [key for key in ("start", "end", "text") if key not in moment]
+        if missing:
+            errors.append(f"moment {label}: missing {', '.join(missing)}")
+            continue
+        try:
+            start = parse_timestamp(moment['start'])
+            end = parse_timestamp(moment['end'])
+        except ValueError:
+            errors.append(f"moment {label}: unreadable start/end {moment['start']!r}-{moment['end']!r}")
+            continue
+        if start < 0 or end <= start:
+            errors.append(f"moment {label}: empty range {moment['start']}-{moment['end']}")
+            continue
+
+        targets = list(dict.fromkeys(moment.get('platforms', [])))
+        if platforms is not None:
+            unknown = [p for p in targets if p not in platforms]
+            if unknown:
+                print(f"Moment {label}: ignoring unknown platforms {', '.join(unknown)}")
+            targets = [p for p in targets if p in platforms]
+        if not targets:
+            print(f"Moment {label}: no renderable platforms, skipped")
+            continue
+
+        moment_id = moment.get('id') or _slug(moment['text'])
+        base_id, n = moment_id, 2
+        while moment_id in seen_ids:
+            moment_id, n = f"{base_id}_{n}", n + 1
+        seen_ids.add(moment_id)
+
+        cleaned.append(dict(moment, **{
+            "id": moment_id,
+            "start": format_timestamp(start),
+            "end": format_timestamp(end),
+            "platforms": targets,
+            "title": moment.get('title') or moment['text'][:60]
+        }))
+
+    if errors:
+        raise ValueError("Invalid moments:\n  " + "\n  ".join(errors))
+    return cleaned
+
+
+def overlap_ratio(a: Dict, b: Dict) -> float:
+    """Intersection over union of two moments' time ranges"""
+    a_start, a_end = parse_timestamp(a['start']), parse_timestamp(a['end'])
+    b_start, b_end = parse_timestamp(b['start']), parse_timestamp(b['end'])
+    intersection = min(a_end, b_end) - max(a_start, b_start)
+    if intersection <= 0:
+        return 0.0
+    return intersection / (max(a_end, b_end) - min(a_start, b_start))
+
+
+def dedupe_moments(moments: List[Dict], threshold: float = DUPLICATE_OVERLAP) -> List[Dict]:
+    """Merge near-duplicate ranges, keeping the best-scored one and the union of platforms
+
+    Ranges that merely contain each other (a compilation and its parts) are
+    kept; only moments that are mostly the same span collapse.
+    """
+    ranked = sorted(enumerate(moments), key=lambda item: -(item[1].get('score') or 0))
+    kept = []
+    for position, moment in ranked:
+        duplicate = next((k for _, k in kept if overlap_ratio(k, moment) >= threshold), None)
+        if duplicate is None:
+            kept.append((position, dict(moment)))
+        else:
+            duplicate['platforms'] = list(dict.fromkeys(duplicate['platforms'] + moment['platforms']))
+            print(f"Moment {moment['id']} duplicates {duplicate['id']}, merged")
+    return [moment for _, moment in sorted(kept, key=lambda item: item[0])]
+
+
+def _resolve(base: Path, value) -> Optional[str]:
+    if not value:
+        return None
+    path = Path(value).expanduser()
+    return str(path if path.is_absolute() else base / path)
+
+
+def _read_data(path: Path) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix.lower() in (".yaml", ".yml"):
+            if yaml is None:
+                raise RuntimeError("PyYAML is required for YAML manifests: pip install pyyaml")
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+def load_manifest(path, platforms: Optional[set] = None, defaults: Optional[Dict] = None) -> Dict:
+    """Load a manifest or analysis report into validated, deduplicated episodes
+
+    `defaults` fills episode fields the file does not set (e.g. source_video
+    when loading a bare analysis report); `platforms` is the set of renderable
+    platform names before the manifest's own platform_specs are added.
+    """
+    path = Path(path)
+    base = path.parent
+    data = _read_data(path)
+    defaults = defaults or {}
+
+    if 'viral_moments' in data and 'episodes' not in data:
+        # A bare content analysis report is a one-episode manifest
+        data = {"episodes": [dict(defaults, id=defaults.get('id', path.stem), moments=moments_from_report(data))]}
+
+    platform_specs = data.get('platform_specs') or {}
+    known = None if platforms is None else set(platforms) | set(platform_specs)
+
+    episodes = []
+    used_ids = set()
+    for i, entry in enumerate(data.get('episodes', [])):
+        episode = dict(defaults, **entry)
+        episode['id'] = episode.get('id') or f"episode_{i + 1}"
+        moments = list(episode.get('moments') or [])
+        if episode.get('analysis_report'):
+            moments += moments_from_report(_read_data(Path(_resolve(base, episode['analysis_report']))))
+        for key in ("source_video", "enhanced_audio", "output_dir"):
+            if entry.get(key):
+                episode[key] = _resolve(base, entry[key])
+        if not episode.get('source_video') or not episode.get('enhanced_audio'):
+            raise ValueError(f"Episode {episode['id']}: source_video and enhanced_audio are required")
+
+        try:
+            episode['moments'] = dedupe_moments(validate_moments(moments, known))
+        except ValueError as e:
+            raise ValueError(f"Episode {episode['id']}: {e}") from None
+        # Clip, caption and thumbnail files are named by moment id, and episodes may share an output_dir
+        for moment in episode['moments']:
+            moment_id, n = moment['id'], 2
+            if moment_id in used_ids:
+                moment_id = f"{episode['id']}_{moment['id']}"
+            while moment_id in used_ids:
+                moment_id, n = f"{episode['id']}_{moment['id']}_{n}", n + 1
+            if moment_id != moment['id']:
+                print(f"Moment {moment['id']} of episode {episode['id']} is also used by another episode, "
+                      f"renamed {moment_id}")
+                moment['id'] = moment_id
+            used_ids.add(moment_id)
+        episodes.append(episode)
+
+    if not episodes:
+        raise ValueError(f"{path} defines no episodes")
+    return {"platform_specs": platform_specs, "episodes": episodes}
+
+
+def coalesce_jobs(episodes: List[Dict]) -> List[Dict]:
+    """One render job per distinct (source, audio, range, platform) across episodes"""
+    jobs = {}
+    for episode in episodes:
+        for moment in episode['moments']:
+            for platform in moment['platforms']:
+                key = (
+                    str(Path(episode['source_video']).resolve()),
+                    str(Path(episode['enhanced_audio']).resolve()),
+                    round(parse_timestamp(moment['start']), 3),
+                    round(parse_timestamp(moment['end']), 3),
+                    platform
+                )
+                served = {"episode": episode.get('id'), "moment_id": moment['id']}
+                if key in jobs:
+                    jobs[key]['serves'].append(served)
+                else:
+                    jobs[key] = {
+                        "episode": episode.get('id'),
+                        "source_video": episode['source_video'],
+                        "enhanced_audio": episode['enhanced_audio'],
+                        "output_dir": episode.get('output_dir'),
+                        "moment": moment,
+                        "platform": platform,
+                        "serves": [served]
+                    }
+    return list(jobs.values())
+
+
+def _contains(outer: Dict, inner: Dict) -> bool:
+    return (parse_timestamp(outer['start']) <= parse_timestamp(inner['start'])
+            and parse_timestamp(inner['end']) <= parse_timestamp(outer['end'])
+            and (outer['start'], outer['end']) != (inner['start'], inner['end']))
+
+
+def innermost_moments(moments: List[Dict]) -> List[Dict]:
+    """Moments that contain no other moment of the list"""
+    return [m for m in moments if not any(_contains(m, other) for other in moments if other is not m)]
+
+
+def group_overlapping(jobs: List[Dict]) -> List[List[Dict]]:
+    """Group jobs of the same source and platform whose ranges overlap
+
+    A group is only kept when its innermost moments are disjoint: then every
+    frame of the union has one caption source and the union can be encoded
+    once for all members. Otherwise its jobs are rendered on their own.
+    """
+    by_target = {}
+    for job in jobs:
+        key = (str(Path(job['source_video']).resolve()), str(Path(job['enhanced_audio']).resolve()), job['platform'])
+        by_target.setdefault(key, []).append(job)
+
+    groups = []
+    for target_jobs in by_target.values():
+        target_jobs = sorted(target_jobs, key=lambda j: (parse_timestamp(j['moment']['start']),
+                                                          -parse_timestamp(j['moment']['end'])))
+        merged = []
+        for job in target_jobs:
+            if merged and parse_timestamp(job['moment']['start']) < merged[-1][1]:
+                merged[-1][0].append(job)
+                merged[-1][1] = max(merged[-1][1], parse_timestamp(job['moment']['end']))
+            else:
+                merged.append([[job], parse_timestamp(job['moment']['end'])])
+
+        for members, _ in merged:
+            inner = innermost_moments([j['moment'] for j in members])
+            disjoint = all(overlap_ratio(a, b) == 0 for i, a in enumerate(inner) for b in inner[i + 1:])
+            if len(members) > 1 and disjoint:
+                groups.append(members)
+            else:
+                groups.extend([job] for job in members)
+    return groups
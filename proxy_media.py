@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Low-resolution proxy of an episode for fast clip previews.
+
+The master video is transcoded once into a small all-intra H.264 proxy at the
+master's frame rate, with the clip audio muxed in. Because every proxy frame
+is a keyframe on the master's frame grid, a preview of any range is a stream
+copy cut at an exact frame, and platform aspect ratios are applied by
+rewriting the SPS crop rectangle (h264_metadata) instead of re-encoding.
+Preview ranges snap to master frames, so the final render of a previewed
+moment uses exactly the same timing. The proxy is rendered to a temp file and
+verified before it replaces the old one; its index is written after it, so an
+interrupted build leaves either the previous proxy and index or a stale index
+that no longer matches, never a truncated proxy that passes as current.
+
+Examples:
+    python proxy_media.py build "08 - GPT 5.0 This Summer.mp4"
+    python proxy_media.py preview "08 - GPT 5.0 This Summer.mp4" 12.145 17.354 preview.mp4 --aspect 9:16
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import media_info
+import render_journal
+
+PROXY_HEIGHT = 360
+PROXY_CRF = 28
+PROXY_AUDIO_KBPS = 96
+
+
+def proxy_path_for(video_path) -> Path:
+    video_path = Path(video_path)
+    return video_path.with_name(video_path.stem + ".proxy.mp4")
+
+
+def index_path_for(proxy_path) -> Path:
+    proxy_path = Path(proxy_path)
+    return proxy_path.with_name(proxy_path.name + ".index.json")
+
+
+def _signature(path: Path) -> Dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _probe_video(video_path: Path) -> Dict:
+    size = media_info.video_size(video_path)
+    if size is None:
+        raise RuntimeError(f"No video stream in {video_path}")
+    return {"width": size[0], "height": size[1], "fps": media_info.frame_rate(video_path)}
+
+
+def load_index(proxy_path) -> Dict:
+    index_path = index_path_for(proxy_path)
+    if not index_path.exists() or not Path(proxy_path).exists():
+        return {}
+    with open(index_path, 'r') as f:
+        index = json.load(f)
+    if index.get("signature") != _signature(Path(proxy_path)):
+        return {}
+    return index
+
+
+def build_proxy(master_path, proxy_path=None, audio_path=None, height: int = PROXY_HEIGHT) -> Dict:
+    """Transcode the master once into an all-intra proxy and index its frames"""
+    master_path = Path(master_path)
+    proxy_path = Path(proxy_path) if proxy_path else proxy_path_for(master_path)
+    audio_path = Path(audio_path) if audio_path else master_path
+
+    index = load_index(proxy_path)
+    if index and index.get("master_signature") == _signature(master_path) \
+            and index.get("audio") == str(audio_path) and index.get("audio_signature") == _signature(audio_path) \
+            and index.get("height") == height:
+        return index
+
+    master = _probe_video(master_path)
+    proxy_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = render_journal.temp_path_for(proxy_path)
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostats", "-progress", "pipe:1",
+        "-i", str(master_path),
+        "-i", str(audio_path),
+        "-map", "0:v:0", "-map", "1:a:0",
+        # Keep the master's frame grid so proxy frame N is master frame N
+        "-vf", f"scale=-2:{height}", "-fps_mode", "cfr", "-r", master["fps"],
+        "-c:v", "libx264", "-preset", "ultrafast", "-tune", "fastdecode",
+        "-crf", str(PROXY_CRF), "-g", "1", "-bf", "0", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", f"{PROXY_AUDIO_KBPS}k",
+        "-movflags", "+faststart",
+        "-y", str(temp_path)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    frames = [int(line.split("=", 1)[1]) for line in result.stdout.splitlines() if line.startswith("frame=")]
+    # Checked for streams only: the container runs to the longer of video and audio
+    render_journal.commit(temp_path, proxy_path)
+    fps = Fraction(master["fps"])
+
+    index = {
+        "path": str(proxy_path),
+        "signature": _signature(proxy_path),
+        "master": str(master_path),
+        "master_signature": _signature(master_path),
+        "master_width": master["width"],
+        "master_height": master["height"],
+        "audio": str(audio_path),
+        "audio_signature": _signature(audio_path),
+        "fps": master["fps"],
+        "frames": frames[-1] if frames else 0,
+        "width": int(round(master["width"] * height / master["height"] / 2)) * 2,
+        "height": height
+    }
+    index["duration"] = float(index["frames"] / fps)
+    index_path = index_path_for(proxy_path)
+    temp_index = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    with open(temp_index, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(temp_index, index_path)
+    return index
+
+
+def snap_range(index: Dict, start: float, end: float) -> Tuple[int, int]:
+    """Frame range [first, last) of the master/proxy grid covering start..end"""
+    fps = Fraction(index["fps"])
+    first = max(0, math.floor(Fraction(start) * fps + Fraction(1, 1000)))
+    last = min(index["frames"] or math.inf, math.ceil(Fraction(end) * fps - Fraction(1, 1000)))
+    return first, max(first + 1, last)
+
+
+def to_master(index: Dict, start: float, end: float) -> Dict:
+    """Frame-exact master timing for a previewed range"""
+    fps = Fraction(index["fps"])
+    first, last = snap_range(index, start, end)
+    return {
+        "first_frame": first,
+        "last_frame": last,
+        "start": float(first / fps),
+        "end": float(last / fps),
+        "duration": float((last - first) / fps)
+    }
+
+
+def aspect_crop(index: Dict, aspect: str, position: float = 0.5) -> Optional[Dict]:
+    """SPS crop offsets (proxy pixels) for an aspect ratio like "9:16"; None if it already fits"""
+    aspect_w, aspect_h = (int(x) for x in aspect.split(":"))
+    crop_w = min(index["width"], index["height"] * aspect_w // aspect_h // 2 * 2)
+    if crop_w >= index["width"]:
+        return None
+    left = int(round(position * (index["width"] - crop_w) / 2)) * 2
+    return {"crop_left": left, "crop_right": index["width"] - crop_w - left}
+
+
+def cut_preview(index: Dict, start: float, end: float, output_path, crop: Optional[Dict] = None) -> Path:
+    """Stream-copy a frame-exact range out of the proxy"""
+    timing = to_master(index, start, end)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-ss", f"{timing['start']:.6f}",
+        "-i", index["path"],
+        "-t", f"{timing['duration']:.6f}",
+        "-c", "copy"
+    ]
+    if crop:
+        cmd.extend(["-bsf:v", "h264_metadata=" + ":".join(f"{k}={v}" for k, v in crop.items())])
+    cmd.extend(["-avoid_negative_ts", "make_zero", "-y", str(output_path)])
+    subprocess.run(cmd, check=True)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="All-intra proxy media for clip previews")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = sub.add_parser("build", help="Transcode the proxy and its frame index")
+    build_cmd.add_argument("video")
+    build_cmd.add_argument("--audio", help="Audio track for the proxy (default: the video's own)")
+    build_cmd.add_argument("--height", type=int, default=PROXY_HEIGHT)
+
+    preview_cmd = sub.add_parser("preview", help="Cut a preview by stream copy")
+    preview_cmd.add_argument("video")
+    preview_cmd.add_argument("start", type=float)
+    preview_cmd.add_argument("end", type=float)
+    preview_cmd.add_argument("output")
+    preview_cmd.add_argument("--aspect", help="Crop to an aspect ratio such as 9:16")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = build_proxy(args.video, audio_path=args.audio, height=args.height)
+        print(f"Proxy saved to: {index['path']}")
+        print(f"  {index['width']}x{index['height']} @ {index['fps']} fps, {index['frames']} frames")
+    else:
+        index = build_proxy(args.video)
+        crop = aspect_crop(index, args.aspect) if args.aspect else None
+        cut_preview(index, args.start, args.end, args.output, crop)
+        print(json.dumps(to_master(index, args.start, args.end), indent=2))
+
+
+if __name__ == "__main__":
+    main()
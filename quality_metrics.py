@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+"""
+In-process EBU R128 / ITU-R BS.1770 quality metrics.
+
+One streaming decode per file feeds NumPy block processing: K-weighting
+(the two BS.1770 biquads, applied as their truncated impulse response with
+FFT overlap-save), 100 ms energy sub-blocks for momentary (400 ms),
+short-term (3 s) and gated integrated loudness, EBU Tech 3342 loudness
+range, 4x polyphase oversampled true peak, RMS, sample peak and clipping.
+Results are cached next to the audio (<name>.quality.json) and rendered in
+the audio_quality_report.json layout, so QC can run on every episode of a
+batch.
+
+Examples:
+    python quality_metrics.py report original=08_gpt5_audio.wav enhanced=08_gpt5_enhanced.wav
+    python quality_metrics.py batch episodes/*.wav --workers 4
+    python quality_metrics.py verify 08_gpt5_enhanced.wav    # compare with ffmpeg's ebur128 filter
+"""
+import argparse
+import json
+import math
+import os
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import audio_enhancement
+import media_info
+
+BLOCK_FRAMES = 1 << 18          # frames decoded and metered per step
+K_WEIGHT_SEGMENTS = 4           # overlap-save FFTs span at least this many K-weighting responses
+SUB_BLOCK_SECONDS = 0.1         # gating blocks overlap by 75%, so energy is kept per 100 ms
+MOMENTARY_BLOCKS = 4            # 400 ms
+SHORT_TERM_BLOCKS = 30          # 3 s
+ABSOLUTE_GATE = -70.0           # LUFS
+RELATIVE_GATE = -10.0           # LU below the absolute-gated loudness (integrated)
+LRA_RELATIVE_GATE = -20.0       # LU below the absolute-gated short-term loudness (LRA)
+LRA_PERCENTILES = (10, 95)
+TRUE_PEAK_TAPS = 48             # interpolation taps per phase; 12 read full-band noise 0.4 dB low
+TRUE_PEAK_BETA = 6.0            # Kaiser window shape of the interpolator
+TRUE_PEAK_SEGMENT = 1024        # overlap-save FFT length of the interpolator
+CLIP_LEVEL = 0.999              # |sample| at or above this counts as clipped
+IMPULSE_TOLERANCE = 1e-10       # K-weighting response is truncated once it decays below this
+DYNAMIC_RANGE_TARGET = (7.0, 12.0)
+COMPRESSED_RANGE = 4.0          # LU; below this speech sounds squashed
+LOUDNESS_TOLERANCE = 1.0
+MIN_SAMPLE_RATE = 44100
+DEFAULT_WORKERS = 4
+
+# BS.1770 channel weights for 5.1 in ffmpeg's order (FL FR FC LFE BL BR); LFE is excluded
+SURROUND_WEIGHTS = [1.0, 1.0, 1.0, 0.0, 1.41, 1.41]
+
+
+def cache_path_for(audio_path) -> Path:
+    audio_path = Path(audio_path)
+    return audio_path.with_name(audio_path.name + ".quality.json")
+
+
+def _file_signature(path: Path) -> Dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def k_weighting_coefficients(sample_rate: int):
+    """Pre-filter (high shelf) and RLB high-pass biquads for any sample rate, combined"""
+    f0, gain, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / sample_rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf_b = [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0]
+    shelf_a = [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / sample_rate)
+    a0 = 1 + k / q + k * k
+    highpass_b = [1.0, -2.0, 1.0]
+    highpass_a = [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    return np.convolve(shelf_b, highpass_b), np.convolve(shelf_a, highpass_a)
+
+
+def k_weighting_impulse(sample_rate: int) -> np.ndarray:
+    """Impulse response of the K-weighting filter, run until it has decayed away"""
+    b, a = k_weighting_coefficients(sample_rate)
+    order = len(a) - 1
+    x_hist = [0.0] * order
+    y_hist = [0.0] * order
+    response = []
+    quiet = 0
+    for n in range(sample_rate * 4):
+        x = 1.0 if n == 0 else 0.0
+        y = b[0] * x + sum(b[i + 1] * x_hist[i] - a[i + 1] * y_hist[i] for i in range(order))
+        x_hist = [x] + x_hist[:-1]
+        y_hist = [y] + y_hist[:-1]
+        response.append(y)
+        quiet = quiet + 1 if abs(y) < IMPULSE_TOLERANCE else 0
+        if quiet >= 64:
+            break
+    return np.array(response[:len(response) - quiet + 1], dtype=np.float64)
+
+
+def oversampling_factor(sample_rate: int) -> int:
+    if sample_rate < 96000:
+        return 4
+    if sample_rate < 192000:
+        return 2
+    return 1
+
+
+def true_peak_phases(factor: int, taps: int = TRUE_PEAK_TAPS) -> np.ndarray:
+    """Windowed-sinc interpolator split into polyphase kernels, shape (taps, factor)"""
+    length = factor * taps
+    k = np.arange(length)
+    # The window is centred on the sinc's peak (sample length // 2), not on the array
+    kernel = np.sinc((k - length // 2) / factor) * np.kaiser(length + 1, TRUE_PEAK_BETA)[:length]
+    # Column p is phase p, with taps ordered oldest input first (a correlation with the window)
+    return kernel.reshape(taps, factor)[::-1].copy()
+
+
+def overlap_segments(extended: np.ndarray, history: int, segment: int) -> np.ndarray:
+    """(segments, channels, segment) view of overlap-save windows over (frames, channels)
+
+    Consecutive windows overlap by `history` frames, so each yields segment - history
+    outputs of a filter that long; the last one is zero padded past the data.
+    """
+    hop = segment - history
+    count = -(-(len(extended) - history) // hop)
+    padded = np.zeros((count * hop + history, extended.shape[1]), dtype=extended.dtype)
+    padded[:len(extended)] = extended
+    return np.lib.stride_tricks.sliding_window_view(padded, segment, axis=0)[::hop]
+
+
+def channel_weights(channels: int) -> np.ndarray:
+    if channels == len(SURROUND_WEIGHTS):
+        return np.array(SURROUND_WEIGHTS)
+    return np.ones(channels)
+
+
+def _db(value: float) -> Optional[float]:
+    return 20 * math.log10(value) if value > 0 else None
+
+
+def _lufs(energy) -> np.ndarray:
+    with np.errstate(divide='ignore'):
+        return -0.691 + 10 * np.log10(energy)
+
+
+class LoudnessMeter:
+    """Streaming BS.1770 meter; feed (frames, channels) float arrays, then read result()"""
+
+    def __init__(self, sample_rate: int, channels: int):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.weights = channel_weights(channels)
+        self.impulse = k_weighting_impulse(sample_rate)
+        self._filter_history = np.zeros((len(self.impulse) - 1, channels))
+        self.k_segment = 1 << (K_WEIGHT_SEGMENTS * len(self.impulse) - 1).bit_length()
+        self._k_spectrum = np.fft.rfft(self.impulse, self.k_segment)
+        self.block_frames = BLOCK_FRAMES
+        self.factor = oversampling_factor(sample_rate)
+        self.phases = true_peak_phases(self.factor) if self.factor > 1 else None
+        if self.phases is not None:
+            # Phase 0 reproduces the samples (sample_peak covers it); window products are
+            # correlations, so the taps are reversed to filter by FFT convolution
+            self._peak_spectra = np.fft.rfft(self.phases[::-1].T, TRUE_PEAK_SEGMENT, axis=-1)[:, None, :]
+            self._peak_gain = float(np.abs(self.phases[:, 1:]).sum(axis=0).max())
+        self._peak_history = np.zeros((TRUE_PEAK_TAPS - 1, channels), dtype=np.float32)
+        self.sub_block = int(round(sample_rate * SUB_BLOCK_SECONDS))
+        self._pending = np.zeros(0)
+        self._energies = []
+        self.frames = 0
+        self.sum_squares = 0.0
+        self.sample_peak = 0.0
+        self.true_peak = 0.0
+        self.clipped_samples = 0
+        self.clip_events = 0
+        self._clipping = False
+
+    def _k_weight(self, frames: np.ndarray) -> np.ndarray:
+        """Overlap-save FFT convolution with the K-weighting impulse response"""
+        history = len(self._filter_history)
+        extended = np.concatenate([self._filter_history, frames])
+        self._filter_history = extended[len(extended) - history:] if history else extended[:0]
+        segments = overlap_segments(extended, history, self.k_segment)
+        filtered = np.fft.irfft(np.fft.rfft(segments, axis=-1) * self._k_spectrum, self.k_segment, axis=-1)
+        # (segments, channels, outputs) back to (frames, channels) in time order
+        return filtered[..., history:].transpose(0, 2, 1).reshape(-1, self.channels)[:len(frames)]
+
+    def _update_true_peak(self, frames: np.ndarray):
+        self.true_peak = max(self.true_peak, self.sample_peak)
+        if self.phases is None:
+            return
+        history = TRUE_PEAK_TAPS - 1
+        extended = np.concatenate([self._peak_history, frames])
+        self._peak_history = extended[len(extended) - history:]
+        segments = overlap_segments(extended, history, TRUE_PEAK_SEGMENT)
+        # An interpolated sample is at most its window's peak times the phase's tap gain,
+        # so only segments loud enough to raise the running true peak are interpolated.
+        # A segment spans its own hop and the start of the next one.
+        hop = TRUE_PEAK_SEGMENT - history
+        peaks = np.abs(segments[:, :, :hop]).max(axis=(1, 2))
+        peaks[:-1] = np.maximum(peaks[:-1], peaks[1:])
+        peaks[-1] = max(peaks[-1], float(np.abs(segments[-1, :, hop:]).max()))
+        live = np.flatnonzero(peaks * self._peak_gain > self.true_peak)
+        if not len(live):
+            return
+        spectra = np.fft.rfft(segments[live], axis=-1)
+        for phase in range(1, self.factor):
+            interpolated = np.fft.irfft(spectra * self._peak_spectra[phase], TRUE_PEAK_SEGMENT, axis=-1)
+            interpolated = np.abs(interpolated[..., history:])
+            if live[-1] == len(segments) - 1:
+                # Outputs past the block read the zero padding
+                interpolated[-1, :, len(frames) - (len(segments) - 1) * hop:] = 0.0
+            self.true_peak = max(self.true_peak, float(interpolated.max()))
+
+    def process(self, frames: np.ndarray):
+        if not len(frames):
+            return
+        self.frames += len(frames)
+        magnitude = np.abs(frames)
+        self.sample_peak = max(self.sample_peak, float(magnitude.max()))
+        self.sum_squares += float(np.einsum('ij,ij->', frames, frames, dtype=np.float64))
+
+        clipped = (magnitude >= CLIP_LEVEL).any(axis=1)
+        self.clipped_samples += int(clipped.sum())
+        starts = np.flatnonzero(clipped[1:] & ~clipped[:-1])
+        self.clip_events += len(starts) + int(bool(clipped[0]) and not self._clipping)
+        self._clipping = bool(clipped[-1])
+
+        self._update_true_peak(frames)
+
+        filtered = self._k_weight(frames.astype(np.float64))
+        weighted = (filtered * filtered) @ self.weights
+        pending = np.concatenate([self._pending, weighted])
+        usable = len(pending) - len(pending) % self.sub_block
+        if usable:
+            self._energies.append(pending[:usable].reshape(-1, self.sub_block).mean(axis=1))
+        self._pending = pending[usable:]
+
+    def _windowed(self, blocks: int) -> np.ndarray:
+        """Mean energy of every complete window of `blocks` sub-blocks, one per 100 ms step"""
+        energies = np.concatenate(self._energies) if self._energies else np.zeros(0)
+        if len(energies) < blocks:
+            return np.zeros(0)
+        cumulative = np.concatenate([[0.0], np.cumsum(energies)])
+        return (cumulative[blocks:] - cumulative[:-blocks]) / blocks
+
+    def result(self) -> Dict:
+        momentary = self._windowed(MOMENTARY_BLOCKS)
+        short_term = self._windowed(SHORT_TERM_BLOCKS)
+
+        integrated, threshold = None, None
+        gated = momentary[_lufs(momentary) > ABSOLUTE_GATE]
+        if len(gated):
+            threshold = float(_lufs(gated.mean())) + RELATIVE_GATE
+            gated = gated[_lufs(gated) > threshold]
+            if len(gated):
+                integrated = float(_lufs(gated.mean()))
+
+        loudness_range = 0.0
+        short_lufs = _lufs(short_term)
+        short_lufs = short_lufs[short_lufs > ABSOLUTE_GATE]
+        if len(short_lufs):
+            relative = float(_lufs(np.mean(10 ** ((short_lufs + 0.691) / 10)))) + LRA_RELATIVE_GATE
+            short_lufs = short_lufs[short_lufs > relative]
+            if len(short_lufs):
+                low, high = np.percentile(short_lufs, LRA_PERCENTILES)
+                loudness_range = float(high - low)
+
+        samples = self.frames * self.channels
+        return {
+            "duration": self.frames / self.sample_rate,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "integrated_loudness": integrated,
+            "threshold": threshold,
+            "loudness_range": loudness_range,
+            "momentary_max": float(_lufs(momentary.max())) if len(momentary) and momentary.max() > 0 else None,
+            "short_term_max": float(_lufs(short_term.max())) if len(short_term) and short_term.max() > 0 else None,
+            "true_peak": _db(max(self.true_peak, self.sample_peak)),
+            "peak_level": _db(self.sample_peak),
+            "rms_level": _db(math.sqrt(self.sum_squares / samples)) if samples else None,
+            "clipped_samples": self.clipped_samples,
+            "clip_events": self.clip_events
+        }
+
+
+def measure(audio_path) -> Dict:
+    """Decode the first audio stream once at its native rate and run the meter over it"""
+    audio_path = Path(audio_path)
+    sample_rate = media_info.sample_rate(audio_path)
+    channels = media_info.channels(audio_path)
+    if not sample_rate or not channels:
+        raise RuntimeError(f"No audio stream in {audio_path}")
+
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-i", str(audio_path),
+        "-map", "0:a:0", "-ar", str(sample_rate), "-ac", str(channels),
+        "-f", "f32le", "-"
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    meter = LoudnessMeter(sample_rate, channels)
+    frame_bytes = 4 * channels
+    started = time.perf_counter()
+
+    # read() returns full chunks until EOF, so only the last chunk is short
+    while True:
+        data = process.stdout.read(meter.block_frames * frame_bytes)
+        if not data:
+            break
+        frames = np.frombuffer(data[:len(data) - len(data) % frame_bytes], dtype=np.float32)
+        meter.process(frames.reshape(-1, channels))
+
+    process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {audio_path}")
+    metrics = meter.result()
+    elapsed = time.perf_counter() - started
+    metrics["realtime_factor"] = round(metrics["duration"] / elapsed, 1) if elapsed > 0 else None
+    return metrics
+
+
+def analyze(audio_path, use_cache: bool = True) -> Dict:
+    """Metrics for one file, reusing <name>.quality.json while the audio is unchanged"""
+    audio_path = Path(audio_path)
+    cache_path = cache_path_for(audio_path)
+    signature = {**_file_signature(audio_path), "true_peak_taps": TRUE_PEAK_TAPS}
+    if use_cache and cache_path.exists():
+        try:
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+            if cached.get("source_signature") == signature:
+                return cached["metrics"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    metrics = measure(audio_path)
+    try:
+        temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump({"source": str(audio_path), "source_signature": signature, "metrics": metrics}, f, indent=2)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+    return metrics
+
+
+def analyze_many(paths: List, workers: int = DEFAULT_WORKERS, use_cache: bool = True) -> Dict[str, Dict]:
+    """Metrics for a batch of files; each decode runs in its own ffmpeg process"""
+    paths = [str(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths) or 1))) as pool:
+        return dict(zip(paths, pool.map(lambda p: analyze(p, use_cache), paths)))
+
+
+def _fmt(value: Optional[float], unit: str) -> str:
+    return f"{value:.2f} {unit}" if value is not None else "n/a"
+
+
+def detect_issues(metrics: Dict, target: Optional[Dict] = None) -> List[Dict]:
+    """Issue flags against the podcast target used by audio_enhancement"""
+    target = target or audio_enhancement.TARGET_LOUDNESS
+    issues = []
+    integrated = metrics["integrated_loudness"]
+    if integrated is None:
+        issues.append({"issue": "No programme audio", "severity": "HIGH",
+                       "description": f"Nothing above the {ABSOLUTE_GATE:.0f} LUFS gate"})
+    else:
+        gap = target["I"] - integrated
+        if gap > 3 or gap < -3:
+            issues.append({
+                "issue": "Low volume" if gap > 0 else "Too loud",
+                "severity": "HIGH",
+                "description": f"Audio is {abs(gap):.2f} LUFS {'below' if gap > 0 else 'above'} podcast standard ({target['I']:g} LUFS)"
+            })
+        elif abs(gap) > LOUDNESS_TOLERANCE:
+            issues.append({
+                "issue": f"Slightly {'below' if gap > 0 else 'above'} target loudness",
+                "severity": "LOW",
+                "description": f"{abs(gap):.2f} LUFS {'below' if gap > 0 else 'above'} {target['I']:g} LUFS target"
+            })
+
+    if metrics["true_peak"] is not None and metrics["true_peak"] > target["TP"]:
+        issues.append({"issue": "True peak over limit", "severity": "HIGH",
+                       "description": f"{metrics['true_peak']:.2f} dBTP exceeds the {target['TP']:g} dBTP limit"})
+    if metrics["clipped_samples"]:
+        issues.append({"issue": "Clipping", "severity": "HIGH",
+                       "description": f"{metrics['clipped_samples']} clipped samples in {metrics['clip_events']} events"})
+    if metrics["sample_rate"] < MIN_SAMPLE_RATE:
+        issues.append({"issue": "Low sample rate", "severity": "MEDIUM",
+                       "description": f"{metrics['sample_rate'] / 1000:g} kHz sample rate limits frequency response to {metrics['sample_rate'] / 2000:g} kHz"})
+
+    low, high = DYNAMIC_RANGE_TARGET
+    lra = metrics["loudness_range"]
+    if integrated is not None and lra < COMPRESSED_RANGE:
+        issues.append({"issue": "Very low dynamic range", "severity": "MEDIUM",
+                       "description": f"{lra:.2f} LU is too compressed, may sound lifeless"})
+    elif integrated is not None and lra < low:
+        issues.append({"issue": "Limited dynamic range", "severity": "LOW",
+                       "description": f"{lra:.2f} LU is below optimal range of {low:g}-{high:g} LU"})
+    elif lra > high:
+        issues.append({"issue": "Wide dynamic range", "severity": "LOW",
+                       "description": f"{lra:.2f} LU is above optimal range of {low:g}-{high:g} LU"})
+    return issues
+
+
+def broadcast_compliance(metrics: Dict, target: Optional[Dict] = None) -> Dict:
+    target = target or audio_enhancement.TARGET_LOUDNESS
+    integrated, peak, lra = metrics["integrated_loudness"], metrics["true_peak"], metrics["loudness_range"]
+    low, high = DYNAMIC_RANGE_TARGET
+    checks = {
+        "loudness": (integrated is not None and abs(integrated - target["I"]) <= LOUDNESS_TOLERANCE,
+                     f"{_fmt(integrated, 'LUFS')}, target {target['I']:g} ±{LOUDNESS_TOLERANCE:g}"),
+        "true_peak": (peak is not None and peak <= target["TP"],
+                      f"{_fmt(peak, 'dBTP')}, limit {target['TP']:g}"),
+        "dynamic_range": (low <= lra <= high, f"{lra:.2f} LU, target {low:g}-{high:g}"),
+        "clipping": (metrics["clipped_samples"] == 0, f"{metrics['clipped_samples']} clipped samples")
+    }
+    compliance = {name: f"{'PASS' if ok else 'FAIL'} ({detail})" for name, (ok, detail) in checks.items()}
+    compliance["overall_status"] = "BROADCAST READY" if all(ok for ok, _ in checks.values()) else "NEEDS ATTENTION"
+    return compliance
+
+
+def technical_specs(audio_path, metrics: Dict) -> Dict:
+    stream = next((s for s in media_info.probe(audio_path).get("streams", []) if s.get("codec_type") == "audio"), {})
+    bits = stream.get("bits_per_raw_sample") or stream.get("bits_per_sample")
+    layout = {1: "mono", 2: "stereo"}.get(metrics["channels"], stream.get("channel_layout"))
+    return {
+        "duration": f"{metrics['duration']:.2f} seconds",
+        "sample_rate": f"{metrics['sample_rate']} Hz",
+        "bit_depth": f"{bits}-bit" if bits and int(bits) else "n/a",
+        "channels": f"{metrics['channels']} ({layout})" if layout else str(metrics["channels"]),
+        "codec": stream.get("codec_long_name") or stream.get("codec_name") or "n/a"
+    }
+
+
+def file_section(audio_path, metrics: Dict) -> Dict:
+    """One "<label>_audio_analysis" block of audio_quality_report.json"""
+    return {
+        "technical_specs": technical_specs(audio_path, metrics),
+        "loudness_metrics": {
+            "integrated_loudness": _fmt(metrics["integrated_loudness"], "LUFS"),
+            "true_peak": _fmt(metrics["true_peak"], "dBTP"),
+            "loudness_range": _fmt(metrics["loudness_range"], "LU"),
+            "threshold": _fmt(metrics["threshold"], "LUFS"),
+            "momentary_max": _fmt(metrics["momentary_max"], "LUFS"),
+            "short_term_max": _fmt(metrics["short_term_max"], "LUFS")
+        },
+        "audio_statistics": {
+            "rms_level": _fmt(metrics["rms_level"], "dB"),
+            "peak_level": _fmt(metrics["peak_level"], "dB"),
+            "clipped_samples": metrics["clipped_samples"],
+            "clip_events": metrics["clip_events"]
+        },
+        "issues_detected": detect_issues(metrics)
+    }
+
+
+def build_report(files: Dict[str, str], workers: int = DEFAULT_WORKERS) -> Dict:
+    """audio_quality_report.json for labelled files (e.g. original, normalized, enhanced)
+
+    The last file is the deliverable; its broadcast compliance is the overall verdict.
+    """
+    results = analyze_many(list(files.values()), workers)
+    analysis = {
+        "analysis_timestamp": date.today().isoformat(),
+        "files_analyzed": dict(files)
+    }
+    for label, path in files.items():
+        analysis[f"{label}_audio_analysis"] = file_section(path, results[str(path)])
+
+    final = results[str(list(files.values())[-1])]
+    assessment = {"broadcast_compliance": broadcast_compliance(final)}
+    first = results[str(list(files.values())[0])]
+    if len(files) > 1 and first["integrated_loudness"] is not None and final["integrated_loudness"] is not None:
+        assessment["loudness_change"] = f"{final['integrated_loudness'] - first['integrated_loudness']:+.2f} LU"
+    analysis["overall_assessment"] = assessment
+    return {"audio_quality_analysis": analysis}
+
+
+def ffmpeg_ebur128(audio_path) -> Dict:
+    """Reference numbers from ffmpeg's ebur128 filter, for verify"""
+    cmd = [
+        "ffmpeg", "-nostats", "-i", str(audio_path), "-map", "0:a:0",
+        "-af", "ebur128=peak=true", "-f", "null", "-"
+    ]
+    stderr = subprocess.run(cmd, capture_output=True, text=True, errors='ignore').stderr
+    summary = stderr[stderr.rfind("Summary:"):]
+    values = {}
+    for key, pattern in (("integrated_loudness", r"I:\s+(-?[\d.]+|-inf) LUFS"),
+                         ("loudness_range", r"LRA:\s+(-?[\d.]+) LU"),
+                         ("true_peak", r"Peak:\s+(-?[\d.]+|-inf) dBFS")):
+        match = re.search(pattern, summary)
+        values[key] = float(match.group(1)) if match and match.group(1) != "-inf" else None
+    return values
+
+
+def verify(paths: List[str]) -> bool:
+    """Compare against ffmpeg's ebur128 (I within 0.1 LU, LRA 0.3 LU, true peak 0.3 dB)
+
+    The 4x interpolator cuts off at the source Nyquist, so its transition band
+    reads content above ~20 kHz slightly low: white noise to 24 kHz at 48 kHz
+    measures about 0.1 dB under an ideal (FFT) interpolation, band-limited
+    speech and music less. test_quality_metrics.py holds both bounds.
+    """
+    tolerances = {"integrated_loudness": 0.1, "loudness_range": 0.3, "true_peak": 0.3}
+    ok = True
+    for path in paths:
+        ours = measure(path)
+        reference = ffmpeg_ebur128(path)
+        for key, tolerance in tolerances.items():
+            a, b = ours[key], reference[key]
+            match = (a is None and b is None) or (a is not None and b is not None and abs(a - b) <= tolerance)
+            ok = ok and match
+            print(f"{'ok  ' if match else 'FAIL'} {path}  {key:20s} ours={_fmt(a, ''):>10s} ffmpeg={_fmt(b, ''):>10s}")
+        print(f"     {path}  {ours['realtime_factor']}x realtime")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EBU R128 loudness, true peak and clipping QC")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    report_parser = subparsers.add_parser("report", help="Write audio_quality_report.json for labelled files")
+    report_parser.add_argument("files", nargs="+", help="label=path, deliverable last")
+    report_parser.add_argument("-o", "--output", default="audio_quality_report.json")
+    report_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+
+    batch_parser = subparsers.add_parser("batch", help="Check every episode against the broadcast target")
+    batch_parser.add_argument("files", nargs="+")
+    batch_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    batch_parser.add_argument("-o", "--output", help="Also write all metrics as JSON")
+
+    verify_parser = subparsers.add_parser("verify", help="Compare against ffmpeg's ebur128 filter")
+    verify_parser.add_argument("files", nargs="+")
+
+    args = parser.parse_args()
+
+    if args.command == "report":
+        files = {}
+        for item in args.files:
+            label, _, path = item.rpartition("=")
+            files[label or Path(path).stem] = path
+        report = build_report(files, args.workers)
+        temp_path = f"{args.output}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(temp_path, args.output)
+        print(json.dumps(report["audio_quality_analysis"]["overall_assessment"], indent=2))
+        print(f"Report saved to: {args.output}")
+    elif args.command == "batch":
+        results = analyze_many(args.files, args.workers)
+        failed = 0
+        for path, metrics in results.items():
+            compliance = broadcast_compliance(metrics)
+            failed += compliance["overall_status"] != "BROADCAST READY"
+            print(f"{compliance['overall_status']:16s} {_fmt(metrics['integrated_loudness'], 'LUFS'):>12s} "
+                  f"{_fmt(metrics['true_peak'], 'dBTP'):>12s} {metrics['loudness_range']:6.2f} LU  {path}")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+        print(f"{len(results) - failed}/{len(results)} episodes broadcast ready")
+        raise SystemExit(1 if failed else 0)
+    else:
+        raise SystemExit(0 if verify(args.files) else 1)
+
+
+if __name__ == "__main__":
+    main()
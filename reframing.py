@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Motion-aware horizontal reframing for vertical clips.
+
+The source video is decoded once at low resolution and frame rate. Every
+sampled frame is scored column by column from frame differences (who is
+moving/talking) plus edge energy (faces and detail), and the crop window with
+the most saliency wins. The resulting positions are median-filtered, held
+inside a dead zone and rate-limited into a smooth pan, then stored as a
+per-episode track. Clips apply the track with a sendcmd file driving the crop
+filter's x position, so no clip analyzes video again.
+
+Examples:
+    python reframing.py analyze "08 - GPT 5.0 This Summer.mp4"
+    python reframing.py commands "08 - GPT 5.0 This Summer.mp4" 12.145 17.354 crop.cmd
+"""
+import argparse
+import json
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import media_info
+
+ANALYSIS_WIDTH = 160
+SAMPLE_FPS = 4
+EDGE_WEIGHT = 0.25
+CENTER_BIAS = 0.15       # fraction of score lost at the frame edge, keeps ties centered
+MIN_ENERGY = 1.0         # mean saliency per pixel below which a frame has no opinion
+MEDIAN_WINDOW = 5        # samples
+DEAD_ZONE = 0.08         # fraction of the pan range the target may drift before the camera moves
+MAX_PAN_SPEED = 0.35     # fraction of the pan range per second
+COMMAND_RATE = 30        # crop updates per second in the sendcmd file
+
+
+def track_path_for(video_path) -> Path:
+    video_path = Path(video_path)
+    return video_path.with_name(video_path.name + ".reframe.json")
+
+
+def _signature(path: Path) -> Dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _video_size(video_path: Path) -> Tuple[int, int]:
+    size = media_info.video_size(video_path)
+    if size is None:
+        raise RuntimeError(f"No video stream in {video_path}")
+    return size
+
+
+def crop_width(width: int, height: int, aspect: float = 9 / 16) -> int:
+    """Even crop width for the target aspect ratio at full source height"""
+    return min(width, int(height * aspect) // 2 * 2)
+
+
+def _frame_target(frame: np.ndarray, previous: Optional[np.ndarray], window: int) -> Optional[float]:
+    """Crop position (0 = left, 1 = right) with the most saliency in one frame"""
+    motion = np.abs(frame - previous) if previous is not None else np.zeros_like(frame)
+    edges = np.zeros_like(frame)
+    edges[:, 1:] += np.abs(np.diff(frame, axis=1))
+    edges[1:, :] += np.abs(np.diff(frame, axis=0))
+    saliency = motion + EDGE_WEIGHT * edges
+    if saliency.mean() < MIN_ENERGY:
+        return None
+
+    columns = saliency.sum(axis=0)
+    positions = len(columns) - window + 1
+    if positions <= 1:
+        return 0.5
+    cumulative = np.concatenate([[0.0], np.cumsum(columns)])
+    scores = cumulative[window:] - cumulative[:-window]
+    offsets = np.linspace(-1.0, 1.0, positions)
+    scores = scores * (1 - CENTER_BIAS * np.abs(offsets))
+    return float(np.argmax(scores) / (positions - 1))
+
+
+def _smooth(targets: np.ndarray, sample_fps: float) -> np.ndarray:
+    """Median filter, dead zone and pan-speed limit over raw per-frame targets"""
+    half = MEDIAN_WINDOW // 2
+    padded = np.concatenate([np.repeat(targets[:1], half), targets, np.repeat(targets[-1:], half)])
+    medians = np.array([np.median(padded[i:i + MEDIAN_WINDOW]) for i in range(len(targets))])
+
+    max_step = MAX_PAN_SPEED / sample_fps
+    positions = np.empty_like(medians)
+    current = medians[0]
+    goal = current
+    for i, target in enumerate(medians):
+        if abs(target - goal) > DEAD_ZONE:
+            goal = target
+        current += float(np.clip(goal - current, -max_step, max_step))
+        positions[i] = current
+    return positions
+
+
+def analyze(video_path, track_path=None, sample_fps: float = SAMPLE_FPS,
+            aspect: float = 9 / 16) -> Dict:
+    """Compute (or load) the smoothed crop trajectory for a whole episode"""
+    video_path = Path(video_path)
+    track_path = Path(track_path) if track_path else track_path_for(video_path)
+
+    if track_path.exists():
+        with open(track_path, 'r') as f:
+            track = json.load(f)
+        if track.get("signature") == _signature(video_path) and track.get("sample_fps") == sample_fps \
+                and track.get("aspect") == aspect:
+            return track
+
+    width, height = _video_size(video_path)
+    analysis_height = max(2, int(round(ANALYSIS_WIDTH * height / width / 2)) * 2)
+    window = max(1, int(round(crop_width(width, height, aspect) * ANALYSIS_WIDTH / width)))
+
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-i", str(video_path),
+        "-an", "-vf", f"fps={sample_fps},scale={ANALYSIS_WIDTH}:{analysis_height},format=gray",
+        "-f", "rawvideo", "-"
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    frame_size = ANALYSIS_WIDTH * analysis_height
+
+    raw_targets = []
+    previous = None
+    while True:
+        data = process.stdout.read(frame_size)
+        if len(data) < frame_size:
+            break
+        frame = np.frombuffer(data, dtype=np.uint8).reshape(analysis_height, ANALYSIS_WIDTH).astype(np.float32)
+        raw_targets.append(_frame_target(frame, previous, window))
+        previous = frame
+    process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {video_path}")
+    if not raw_targets:
+        raise RuntimeError(f"No frames decoded from {video_path}")
+
+    # Frames without enough signal keep the last confident position
+    targets = []
+    last = 0.5
+    for target in raw_targets:
+        last = target if target is not None else last
+        targets.append(last)
+    positions = _smooth(np.array(targets), sample_fps)
+
+    track = {
+        "source": str(video_path),
+        "signature": _signature(video_path),
+        "width": width,
+        "height": height,
+        "aspect": aspect,
+        "crop_width": crop_width(width, height, aspect),
+        "sample_fps": sample_fps,
+        "positions": [round(float(p), 4) for p in positions]
+    }
+    track_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = track_path.with_name(f"{track_path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'w') as f:
+        json.dump(track, f)
+    os.replace(temp_path, track_path)
+    return track
+
+
+def position_at(track: Dict, seconds: np.ndarray) -> np.ndarray:
+    """Interpolated crop position (0..1) at episode times"""
+    times = np.arange(len(track["positions"])) / track["sample_fps"]
+    return np.interp(seconds, times, track["positions"])
+
+
+def write_commands(track: Dict, start: float, end: float, output_path, rate: int = COMMAND_RATE) -> Path:
+    """sendcmd script moving the crop across one clip, in clip-relative time"""
+    pan_range = track["width"] - track["crop_width"]
+    times = np.arange(0.0, max(end - start, 0.0) + 1.0 / rate, 1.0 / rate)
+    xs = np.round(position_at(track, start + times) * pan_range / 2).astype(int) * 2
+
+    lines = []
+    last = None
+    for t, x in zip(times, xs):
+        if x != last:
+            lines.append(f"{t:.3f} crop x {x};")
+            last = x
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def _filter_path(path: Path) -> str:
+    return str(path).replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+
+
+def crop_filter(track: Dict, start: float, end: float, commands_path) -> str:
+    """Filter chain applying the track to a clip whose video starts at `start`"""
+    commands_path = write_commands(track, start, end, commands_path)
+    x0 = int(round(float(position_at(track, start)) * (track["width"] - track["crop_width"]) / 2)) * 2
+    return f"sendcmd=f='{_filter_path(commands_path)}',crop={track['crop_width']}:ih:{x0}:0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motion-aware vertical reframing track")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    analyze_cmd = sub.add_parser("analyze", help="Build the per-episode crop track")
+    analyze_cmd.add_argument("video")
+    analyze_cmd.add_argument("--sample-fps", type=float, default=SAMPLE_FPS)
+
+    commands_cmd = sub.add_parser("commands", help="Write the sendcmd file for one clip")
+    commands_cmd.add_argument("video")
+    commands_cmd.add_argument("start", type=float)
+    commands_cmd.add_argument("end", type=float)
+    commands_cmd.add_argument("output")
+    args = parser.parse_args()
+
+    if args.command == "analyze":
+        track = analyze(args.video, sample_fps=args.sample_fps)
+        positions = np.array(track["positions"])
+        print(f"Reframe track saved to: {track_path_for(args.video)}")
+        print(f"  Samples: {len(positions)}, crop: {track['crop_width']}x{track['height']}, "
+              f"position range {positions.min():.2f}-{positions.max():.2f}")
+    else:
+        track = analyze(args.video)
+        print(crop_filter(track, args.start, args.end, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Crash-safe clip renders: verified atomic outputs and a journal of finished jobs.
+
+ffmpeg writes every render to a temp file next to its final path; the file is
+checked with ffprobe (readable container, expected streams, duration) and only
+then renamed over the final name, so an interrupted run never leaves a
+truncated clip where a good one is expected. Temps a crashed run left behind
+are swept when the next run starts. Each finished job is appended to
+a JSON-lines journal keyed by everything that determines its output (source
+and audio signatures, moments, platform spec); a rerun skips jobs whose
+journal entry still matches and whose files still exist.
+
+    python render_journal.py output_clips/.work/render_journal.jsonl   # list finished jobs
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import media_info
+
+# Allowed difference between the expected and probed clip duration (AAC priming, frame snapping)
+DURATION_TOLERANCE = 0.5
+# A temp render untouched this long belongs to a dead process (live ones are written continuously)
+STALE_PARTIAL_SECONDS = 3600
+
+
+def temp_path_for(path) -> Path:
+    """Temp name in the same directory (same filesystem) keeping the extension for the muxer"""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.partial{path.suffix}")
+
+
+def is_partial(path) -> bool:
+    return ".partial" in Path(path).suffixes
+
+
+def sweep_partials(directory, max_age: float = STALE_PARTIAL_SECONDS) -> int:
+    """Delete stale temp renders anywhere under directory; returns how many were removed"""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in Path(directory).rglob("*.partial.*"):
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            # Committed or swept by another process in the meantime
+            pass
+    return removed
+
+
+def verify_media(path, duration: Optional[float] = None, audio: bool = True):
+    """Raise RuntimeError unless path is a complete clip with the expected streams and length"""
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        raise RuntimeError(f"Render produced no output: {path}")
+    # Not persisted: the temp file is renamed right after
+    info = media_info.probe(path, persist=False)
+    types = {stream.get("codec_type") for stream in info.get("streams", [])}
+    if "video" not in types:
+        raise RuntimeError(f"No video stream in {path}")
+    if audio and "audio" not in types:
+        raise RuntimeError(f"No audio stream in {path}")
+    if duration is not None:
+        probed = float(info.get("format", {}).get("duration") or 0)
+        if abs(probed - duration) > DURATION_TOLERANCE:
+            raise RuntimeError(f"{path} is {probed:.3f}s, expected {duration:.3f}s")
+
+
+def commit(temp_path, final_path, duration: Optional[float] = None, audio: bool = True) -> Path:
+    """Verify a finished temp render and move it over the final path"""
+    temp_path, final_path = Path(temp_path), Path(final_path)
+    try:
+        if final_path.suffix.lower() in (".mp4", ".mov", ".m4v"):
+            verify_media(temp_path, duration, audio)
+        elif not temp_path.exists() or temp_path.stat().st_size == 0:
+            raise RuntimeError(f"Render produced no output: {final_path}")
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+    os.replace(temp_path, final_path)
+    return final_path
+
+
+def file_signature(path) -> Dict:
+    stat = Path(path).stat()
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def job_key(**inputs) -> str:
+    """Stable hash of everything a render's output depends on"""
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+
+class RenderJournal:
+    """Append-only record of finished jobs; the last entry per key wins"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries = {}
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a crash; everything before it is intact
+                        continue
+                    self._entries[entry["key"]] = entry
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Clip entries of a finished job, if every file it produced is still in place"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        for clip in entry["clips"]:
+            for field in ("path", "thumbnail", "subtitles"):
+                if clip.get(field) and not Path(clip[field]).exists():
+                    return None
+            if clip.get("path") and clip.get("signature") != file_signature(clip["path"]):
+                return None
+        return entry["clips"]
+
+    def record(self, key: str, clips: List[Dict]):
+        clips = [dict(clip, signature=file_signature(clip["path"])) if clip.get("path") else clip
+                 for clip in clips]
+        entry = {"key": key, "clips": clips}
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[key] = entry
+
+    def entries(self) -> List[Dict]:
+        with self._lock:
+            return list(self._entries.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the jobs recorded in a render journal")
+    parser.add_argument("journal")
+    args = parser.parse_args()
+
+    journal = RenderJournal(args.journal)
+    for entry in journal.entries():
+        valid = journal.get(entry["key"]) is not None
+        for clip in entry["clips"]:
+            print(f"{entry['key']}  {'ok     ' if valid else 'missing'}  {clip['platform']:15s} {clip['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+CPU-pinned worker pool for ffmpeg renders.
+
+The CPUs this process may use are split per NUMA node (from /sys) into
+equal slots that never straddle a socket. Every render job runs while
+holding one slot: the ffmpeg processes it launches are pinned to the slot's
+CPUs by running them under taskset and told to use exactly that many
+decoder, filter and x264 threads, so concurrent encodes stop oversubscribing
+cores and migrating across sockets. Jobs are dispatched longest first by
+estimated cost (duration x output pixels), which keeps the slots evenly
+busy until the end of a batch (LPT scheduling).
+
+    python render_pool.py            # show the slot layout for this machine
+"""
+import argparse
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import instrumentation
+
+TASKSET = shutil.which("taskset")
+
+NODE_ROOT = Path("/sys/devices/system/node")
+
+# x264 at 1080p scales close to linearly up to about this many threads;
+# beyond it more parallel jobs beat more threads per job
+DEFAULT_THREADS_PER_JOB = 8
+
+_local = threading.local()
+
+
+def parse_cpulist(text: str) -> List[int]:
+    """CPU ids from a kernel cpulist such as "0-15,32-47" """
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def _available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def numa_nodes() -> List[List[int]]:
+    """Usable CPUs grouped by NUMA node; one group when the topology is unknown"""
+    available = set(_available_cpus())
+    nodes = []
+    for node_dir in sorted(NODE_ROOT.glob("node[0-9]*"), key=lambda p: int(p.name[4:])):
+        try:
+            cpus = [c for c in parse_cpulist((node_dir / "cpulist").read_text()) if c in available]
+        except (OSError, ValueError):
+            continue
+        if cpus:
+            nodes.append(cpus)
+    return nodes or [sorted(available)]
+
+
+def plan_slots(workers: Optional[int] = None, threads_per_job: int = DEFAULT_THREADS_PER_JOB) -> List[Dict]:
+    """Split the CPUs into `workers` slots, each inside a single NUMA node"""
+    nodes = numa_nodes()
+    total = sum(len(cpus) for cpus in nodes)
+    if not workers:
+        workers = max(1, total // threads_per_job)
+    workers = max(1, min(workers, total))
+
+    # Slots per node in proportion to its CPUs, at least one CPU per slot
+    counts = [min(len(cpus), max(1, round(workers * len(cpus) / total))) for cpus in nodes]
+    while sum(counts) > workers and max(counts) > 1:
+        counts[counts.index(max(counts))] -= 1
+    while sum(counts) < workers:
+        spare = [len(cpus) / count if count < len(cpus) else 0 for cpus, count in zip(nodes, counts)]
+        counts[spare.index(max(spare))] += 1
+
+    slots = []
+    for node, (cpus, count) in enumerate(zip(nodes, counts)):
+        size, extra = divmod(len(cpus), count)
+        start = 0
+        for i in range(count):
+            end = start + size + (1 if i < extra else 0)
+            slots.append({"id": len(slots), "node": node, "cpus": cpus[start:end]})
+            start = end
+    return slots
+
+
+def estimate_cost(duration: float, resolution: str) -> float:
+    """Relative encode cost of a render: seconds x output pixels"""
+    width, height = (int(x) for x in resolution.split("x"))
+    return duration * width * height
+
+
+def current_slot() -> Optional[Dict]:
+    """Slot held by the calling worker thread, if any"""
+    return getattr(_local, "slot", None)
+
+
+def pin_command(cmd: List[str], threads: int) -> List[str]:
+    """Limit an ffmpeg command's decoder, filter and encoder threads"""
+    if not cmd or Path(cmd[0]).name != "ffmpeg":
+        return cmd
+    pinned = [cmd[0], "-filter_threads", str(threads), "-filter_complex_threads", str(threads)]
+    args = cmd[1:]
+    i = 0
+    while i < len(args):
+        if args[i] == "-i":
+            pinned.extend(["-threads", str(threads)])
+        pinned.append(args[i])
+        if args[i] in ("-c:v", "-vcodec") and i + 1 < len(args):
+            # libx264 maps -threads onto x264's own frame threads
+            pinned.extend([args[i + 1], "-threads", str(threads)])
+            i += 1
+        i += 1
+    return pinned
+
+
+def run(cmd, **kwargs):
+    """instrumentation.run, pinned to the calling worker's slot when it holds one"""
+    slot = current_slot()
+    if slot is None or isinstance(cmd, str):
+        return instrumentation.run(cmd, **kwargs)
+
+    cpus = sorted(slot["cpus"])
+    pinned = pin_command(cmd, len(cpus))
+    # taskset sets the affinity before exec; preexec_fn is not safe from worker threads
+    if TASKSET:
+        pinned = [TASKSET, "-c", ",".join(str(cpu) for cpu in cpus)] + pinned
+    return instrumentation.run(pinned, **kwargs)
+
+
+class RenderPool:
+    """Thread pool whose workers each hold one pinned CPU slot while running a job"""
+
+    def __init__(self, workers: Optional[int] = None, threads_per_job: int = DEFAULT_THREADS_PER_JOB):
+        self.slots = plan_slots(workers, threads_per_job)
+        self._free = queue.Queue()
+        for slot in self.slots:
+            self._free.put(slot)
+
+    def _run_job(self, fn: Callable, item):
+        slot = self._free.get()
+        _local.slot = slot
+        try:
+            with instrumentation.span("render_job", slot=slot["id"], node=slot["node"]):
+                return fn(item)
+        finally:
+            _local.slot = None
+            self._free.put(slot)
+
+    def map(self, fn: Callable, items: List, cost: Optional[Callable] = None) -> List:
+        """Run fn over items, most expensive first; results come back in input order"""
+        order = list(range(len(items)))
+        if cost:
+            order.sort(key=lambda i: -cost(items[i]))
+        with ThreadPoolExecutor(max_workers=len(self.slots)) as executor:
+            # The executor hands out work in submission order, so this is LPT dispatch
+            futures = {i: executor.submit(self._run_job, fn, items[i]) for i in order}
+            return [futures[i].result() for i in range(len(items))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the CPU slot layout used for parallel renders")
+    parser.add_argument("--workers", type=int, help="Number of concurrent renders (default: CPUs / threads per job)")
+    parser.add_argument("--threads-per-job", type=int, default=DEFAULT_THREADS_PER_JOB)
+    args = parser.parse_args()
+
+    nodes = numa_nodes()
+    print(f"NUMA nodes: {len(nodes)}, usable CPUs: {sum(len(n) for n in nodes)}")
+    for slot in plan_slots(args.workers, args.threads_per_job):
+        cpus = slot["cpus"]
+        print(f"  slot {slot['id']}: node {slot['node']}, {len(cpus)} threads, CPUs {cpus[0]}-{cpus[-1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+SQLite render queue for spreading clip rendering over many worker processes.
+
+The generator enqueues its render job groups (the same units generate_all_clips
+renders) into a queue database on storage every worker can reach. Workers on
+any host claim the most expensive pending job under a lease, extend the lease
+with heartbeats while rendering, and record the clip entries when done. A job
+whose worker dies is picked up again once its lease expires; failed jobs are
+retried up to max_attempts. `merge` writes one generation_metadata.json per
+output directory from all finished jobs of a run.
+
+    python render_queue.py enqueue queue/render.db --manifest moments.yaml
+    python render_queue.py work queue/render.db --processes 4     # on every host
+    python render_queue.py status queue/render.db
+    python render_queue.py merge queue/render.db
+
+Paths are stored absolute, so hosts must mount the shared storage at the same
+place. The database uses SQLite's rollback journal rather than WAL, which
+keeps locking working on network filesystems that support POSIX locks.
+"""
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import render_journal
+import sqlite_store
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_SECONDS = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    generator TEXT NOT NULL,
+    job_group TEXT NOT NULL,
+    cost REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    heartbeat REAL,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, cost);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    info TEXT NOT NULL
+);
+"""
+
+
+class RenderQueue(sqlite_store.SQLiteStore):
+    """Job table with leased claims; every call opens its own connection"""
+
+    schema = SCHEMA
+
+    def enqueue(self, generator: Dict, groups: List[List[Dict]], costs: List[float],
+                run_id: Optional[str] = None, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> str:
+        """Add job groups rendered by one generator configuration; returns the run id"""
+        run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6]
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("INSERT OR IGNORE INTO runs (run_id, created, info) VALUES (?, ?, ?)",
+                       (run_id, now, json.dumps({"host": socket.gethostname()})))
+            db.executemany(
+                "INSERT INTO jobs (run_id, generator, job_group, cost, max_attempts, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, json.dumps(generator), json.dumps(group), cost, max_attempts, now, now)
+                 for group, cost in zip(groups, costs)]
+            )
+        return run_id
+
+    def claim(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict]:
+        """Lease the most expensive runnable job (pending, or leased with an expired lease)"""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT * FROM jobs WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                "AND attempts < max_attempts ORDER BY cost DESC, id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                # Expired leases that already used up their attempts are final
+                db.execute("UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired'), "
+                           "updated = ? WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                           (now, now))
+                return None
+            db.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?, attempts = attempts + 1, "
+                "lease_expires = ?, heartbeat = ?, updated = ? WHERE id = ?",
+                (worker, now + lease_seconds, now, now, row["id"])
+            )
+        job = dict(row)
+        job["attempts"] += 1
+        job["generator"] = json.loads(job["generator"])
+        job["job_group"] = json.loads(job["job_group"])
+        return job
+
+    def heartbeat(self, job_id: int, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a lease; False if the job is no longer leased to this worker"""
+        now = time.time()
+        with self._transaction() as db:
+            updated = db.execute(
+                "UPDATE jobs SET lease_expires = ?, heartbeat = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (now + lease_seconds, now, now, job_id, worker)
+            ).rowcount
+        return updated == 1
+
+    def complete(self, job_id: int, worker: str, result: List[Dict]) -> bool:
+        now = time.time()
+        with self._transaction() as db:
+            updated = db.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (json.dumps(result), now, job_id, worker)
+            ).rowcount
+        return updated == 1
+
+    def fail(self, job_id: int, worker: str, error: str, result: Optional[List[Dict]] = None) -> bool:
+        """Record a failed attempt; the job goes back to pending until max_attempts"""
+        now = time.time()
+        with self._transaction() as db:
+            updated = db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END, "
+                "error = ?, result = ?, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (error, json.dumps(result) if result is not None else None, now, job_id, worker)
+            ).rowcount
+        return updated == 1
+
+    def status(self, run_id: Optional[str] = None) -> Dict[str, int]:
+        with self._connect() as db:
+            query = "SELECT status, COUNT(*) AS n FROM jobs"
+            params = ()
+            if run_id:
+                query += " WHERE run_id = ?"
+                params = (run_id,)
+            return {row["status"]: row["n"] for row in db.execute(query + " GROUP BY status", params)}
+
+    def latest_run(self) -> Optional[str]:
+        with self._connect() as db:
+            row = db.execute("SELECT run_id FROM runs ORDER BY created DESC LIMIT 1").fetchone()
+        return row["run_id"] if row else None
+
+    def jobs(self, run_id: str) -> List[Dict]:
+        with self._connect() as db:
+            rows = db.execute("SELECT * FROM jobs WHERE run_id = ? ORDER BY id", (run_id,)).fetchall()
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            for key in ("generator", "job_group", "result"):
+                job[key] = json.loads(job[key]) if job[key] else None
+            jobs.append(job)
+        return jobs
+
+
+def generator_config(generator) -> Dict:
+    """Everything a worker needs to rebuild an equivalent SocialMediaClipGenerator"""
+    return {
+        "source_video": str(generator.source_video.resolve()),
+        "enhanced_audio": str(generator.enhanced_audio.resolve()),
+        "output_dir": str(generator.output_dir.resolve()),
+        "normalize_loudness": generator.normalize_loudness,
+        "platform_specs": generator.platform_specs,
+        "soft_subtitles": generator.soft_subtitles
+    }
+
+
+def enqueue_generator(queue: RenderQueue, generator, jobs: Optional[List[Dict]] = None,
+                      run_id: Optional[str] = None, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> str:
+    """Prepare a generator's shared episode assets and enqueue its job groups"""
+    import moment_manifest
+
+    if jobs is None:
+        jobs = moment_manifest.coalesce_jobs([{
+            "source_video": generator.source_video,
+            "enhanced_audio": generator.enhanced_audio,
+            "moments": generator.viral_moments
+        }])
+    # Temp renders crashed workers left from earlier runs
+    render_journal.sweep_partials(generator.output_dir)
+    # Per-episode intermediates are built once here rather than raced by workers
+    generator.prepare_audio()
+    if any(generator.platform_specs[job['platform']]['aspect_ratio'] == "9:16" for job in jobs):
+        generator.get_reframe_track()
+
+    config = dict(generator_config(generator), clip_audio=str(generator.clip_audio),
+                  audio_intermediate=generator.audio_index["path"])
+    groups = moment_manifest.group_overlapping(jobs)
+    return queue.enqueue(config, groups, [generator.job_group_cost(g) for g in groups],
+                         run_id=run_id, max_attempts=max_attempts)
+
+
+def _heartbeat_loop(queue: RenderQueue, job_id: int, worker: str, lease_seconds: float,
+                    stop: threading.Event, lost: threading.Event):
+    while not stop.wait(lease_seconds / 3):
+        if not queue.heartbeat(job_id, worker, lease_seconds):
+            lost.set()
+            return
+
+
+def work(queue_path, worker: Optional[str] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+         exit_when_idle: bool = True) -> int:
+    """Claim and render jobs until the queue has nothing runnable; returns jobs completed"""
+    from generate_social_clips import SocialMediaClipGenerator
+
+    queue = RenderQueue(queue_path)
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    generators = {}
+    completed = 0
+
+    while True:
+        job = queue.claim(worker, lease_seconds)
+        if job is None:
+            counts = queue.status()
+            if exit_when_idle and not counts.get("pending") and not counts.get("leased"):
+                return completed
+            time.sleep(POLL_SECONDS)
+            continue
+
+        config = job["generator"]
+        key = json.dumps(config, sort_keys=True)
+        if key not in generators:
+            generators[key] = SocialMediaClipGenerator(
+                config["source_video"], config["enhanced_audio"], config["output_dir"],
+                normalize_loudness=config["normalize_loudness"], platform_specs=config["platform_specs"],
+                soft_subtitles=config.get("soft_subtitles", False)
+            )
+        generator = generators[key]
+
+        stop, lost = threading.Event(), threading.Event()
+        beat = threading.Thread(target=_heartbeat_loop, args=(queue, job["id"], worker, lease_seconds, stop, lost),
+                                daemon=True)
+        beat.start()
+        ids = ", ".join(j['moment']['id'] for j in job["job_group"])
+        print(f"[{worker}] job {job['id']} ({job['job_group'][0]['platform']}: {ids}), attempt {job['attempts']}")
+        try:
+            clip_infos = generator.render_job_group(job["job_group"])
+        finally:
+            stop.set()
+            beat.join()
+
+        if lost.is_set():
+            print(f"[{worker}] lost the lease on job {job['id']}, result discarded")
+            continue
+        errors = [c["error"] for c in clip_infos if "error" in c]
+        if errors:
+            queue.fail(job["id"], worker, "; ".join(errors), clip_infos)
+        elif queue.complete(job["id"], worker, clip_infos):
+            completed += 1
+
+
+def _work_process(queue_path, lease_seconds):
+    work(queue_path, lease_seconds=lease_seconds)
+
+
+def run_workers(queue_path, processes: int, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+    """Start several local worker processes and wait for the queue to drain"""
+    context = get_context("spawn")
+    workers = [context.Process(target=_work_process, args=(str(queue_path), lease_seconds))
+               for _ in range(processes)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+
+def merge(queue_path, run_id: Optional[str] = None) -> List[Path]:
+    """Write generation_metadata.json for every output directory of a run
+
+    Each source gets the results document generate_all_clips writes for it, and
+    sources sharing an output directory are combined with merge_results, so the
+    queue and local rendering produce the same metadata.
+    """
+    from generate_social_clips import merge_results
+
+    queue = RenderQueue(queue_path)
+    run_id = run_id or queue.latest_run()
+    if run_id is None:
+        raise ValueError(f"No runs in {queue_path}")
+
+    sources = {}
+    for job in queue.jobs(run_id):
+        config = job["generator"]
+        results = sources.setdefault((config["output_dir"], config["source_video"], config["enhanced_audio"]), {
+            "generation_timestamp": datetime.now().isoformat(),
+            "run_id": run_id,
+            "source_video": config["source_video"],
+            "enhanced_audio": config["enhanced_audio"],
+            "status": "complete",
+            "clips": [],
+            "clip_audio": config.get("clip_audio"),
+            "audio_intermediate": config.get("audio_intermediate"),
+            "jobs_total": 0,
+            "jobs_done": 0
+        })
+        results["jobs_total"] += 1
+        if job["status"] in ("done", "failed"):
+            results["jobs_done"] += 1
+        else:
+            results["status"] = "rendering"
+        if job["result"]:
+            results["clips"].extend(job["result"])
+        else:
+            results["clips"].extend({
+                "platform": j["platform"],
+                "clip_id": j["moment"]["id"],
+                "error": job["error"] or f"job {job['status']}"
+            } for j in job["job_group"])
+
+    outputs = {}
+    for (output_dir, _, _), results in sources.items():
+        outputs.setdefault(output_dir, []).append(results)
+
+    paths = []
+    for output_dir, results_list in outputs.items():
+        document = merge_results(results_list) if len(results_list) > 1 else results_list[0]
+        metadata_path = Path(output_dir) / "generation_metadata.json"
+        temp_path = metadata_path.with_name(f"{metadata_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(document, f, indent=2)
+        os.replace(temp_path, metadata_path)
+        paths.append(metadata_path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed clip rendering through a shared SQLite queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_cmd = sub.add_parser("enqueue", help="Queue render jobs from a manifest")
+    enqueue_cmd.add_argument("queue")
+    enqueue_cmd.add_argument("--manifest", required=True, help="Moment manifest or content analysis report")
+    enqueue_cmd.add_argument("--video")
+    enqueue_cmd.add_argument("--audio")
+    enqueue_cmd.add_argument("--output-dir")
+    enqueue_cmd.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    enqueue_cmd.add_argument("--soft-subtitles", action="store_true",
+                             help="Mux captions as a track on platforms without burn_captions")
+
+    work_cmd = sub.add_parser("work", help="Render queued jobs until none are left")
+    work_cmd.add_argument("queue")
+    work_cmd.add_argument("--processes", type=int, default=1)
+    work_cmd.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS)
+
+    status_cmd = sub.add_parser("status", help="Job counts by status")
+    status_cmd.add_argument("queue")
+    status_cmd.add_argument("--run")
+
+    merge_cmd = sub.add_parser("merge", help="Write generation_metadata.json from finished jobs")
+    merge_cmd.add_argument("queue")
+    merge_cmd.add_argument("--run", help="Run id (default: the latest)")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        import moment_manifest
+        from generate_social_clips import PLATFORM_SPECS, SocialMediaClipGenerator
+
+        defaults = {k: v for k, v in {
+            "source_video": args.video, "enhanced_audio": args.audio, "output_dir": args.output_dir
+        }.items() if v}
+        manifest = moment_manifest.load_manifest(args.manifest, set(PLATFORM_SPECS), defaults)
+        jobs = moment_manifest.coalesce_jobs(manifest['episodes'])
+        queue = RenderQueue(args.queue)
+        run_id = None
+        groups = {}
+        for job in jobs:
+            groups.setdefault((job['source_video'], job['enhanced_audio'], job['output_dir'] or "output_clips"),
+                              []).append(job)
+        for (source_video, enhanced_audio, output_dir), group in groups.items():
+            generator = SocialMediaClipGenerator(source_video, enhanced_audio, output_dir,
+                                                 normalize_loudness=True,
+                                                 platform_specs=manifest['platform_specs'],
+                                                 soft_subtitles=args.soft_subtitles)
+            run_id = enqueue_generator(queue, generator, group, run_id, args.max_attempts)
+        print(f"Queued run {run_id}: {queue.status(run_id)}")
+    elif args.command == "work":
+        if args.processes > 1:
+            run_workers(args.queue, args.processes, args.lease)
+        else:
+            work(args.queue, lease_seconds=args.lease)
+        print(f"Queue drained: {RenderQueue(args.queue).status()}")
+    elif args.command == "status":
+        print(json.dumps(RenderQueue(args.queue).status(args.run), indent=2))
+    else:
+        for path in merge(args.queue, args.run):
+            print(f"Metadata saved to: {path}")
+
+
+if __name__ == "__main__":
+    main()
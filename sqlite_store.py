@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite plumbing for the pipeline's databases.
+
+The render queue, the transcript index and the published-moment index all
+keep one database file that several processes (and hosts, over shared
+storage) open at once. Each operation opens its own short-lived connection
+in autocommit mode, and writes go through BEGIN IMMEDIATE transactions so
+the write lock is taken up front instead of on the first write, where two
+readers upgrading at once would deadlock.
+"""
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+CONNECT_TIMEOUT = 60    # seconds a connection waits for another writer's lock
+
+
+class SQLiteStore:
+    """Base for classes backed by one SQLite file; subclasses set `schema`"""
+
+    schema = ""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(self.schema)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(str(self.path), timeout=CONNECT_TIMEOUT, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction taken up front, so concurrent read-then-write sequences never race"""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
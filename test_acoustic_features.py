@@ -0,0 +1,48 @@
+"""Excitement components must be centred on the episode: a typical stretch scores about 5.
+
+The episode is a synthetic voice generated with ffmpeg's lavfi aevalsrc that
+builds steadily over four minutes: syllables get louder, faster and wider in
+pitch. Its middle is the median stretch, its start the calmest and its end
+the most excited.
+
+    python -m pytest -q test_acoustic_features.py
+"""
+import shutil
+import subprocess
+
+import pytest
+
+import acoustic_features
+
+pytestmark = pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")),
+                                reason="needs ffmpeg and ffprobe")
+
+DURATION = 240
+# Level, syllable rate (3 -> 6 per second, gated at 60% duty) and vibrato depth
+# (+/- 5 -> 45 Hz around 150 Hz) all rise linearly with x = t / DURATION
+VOICE = ("(0.05+0.35*(t/{d}))*if(lt(mod(3*t+1.5*t*t/{d},1),0.6),1,0.02)"
+         "*sin(2*PI*150*t+(5+40*(t/{d}))/3*sin(2*PI*3*t))").format(d=DURATION)
+
+
+@pytest.fixture(scope="module")
+def features(tmp_path_factory):
+    audio = tmp_path_factory.mktemp("acoustic") / "building.wav"
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"aevalsrc=exprs='{VOICE}':s=48000:d={DURATION}",
+                    "-c:a", "pcm_s16le", "-y", str(audio)], check=True)
+    return acoustic_features.AcousticFeatures.for_audio(audio)
+
+
+def test_median_stretch_scores_about_five(features):
+    middle = features.segment_features(110, 130)
+
+    assert set(middle["components"]) == set(acoustic_features.COMPONENTS)
+    for name, score in middle["components"].items():
+        assert score == pytest.approx(5, abs=1), name
+    assert middle["excitement"] == pytest.approx(5, abs=0.5)
+
+
+def test_scores_follow_the_episode_distribution(features):
+    calm = features.segment_features(5, 25)["excitement"]
+    excited = features.segment_features(215, 235)["excitement"]
+
+    assert calm <= 2 and excited >= 8
@@ -0,0 +1,71 @@
+"""Chunked silence and level analysis must equal a whole-file pass.
+
+The audio is generated with ffmpeg's lavfi aevalsrc (tone plus noise, gated
+down to -60 dB in gaps placed on, across and beyond chunk edges).
+
+    python -m pytest -q test_chunked_analysis.py
+"""
+import shutil
+import subprocess
+
+import pytest
+
+import chunked_analysis
+
+pytestmark = pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")),
+                                reason="needs ffmpeg and ffprobe")
+
+SAMPLE_RATE = 48000
+
+
+def gaps_for(chunk_seconds, duration):
+    return [
+        (0.0, 0.6),                                              # file start
+        (chunk_seconds - 0.1, chunk_seconds + 0.15),             # across an edge, long enough only in total
+        (2 * chunk_seconds - 0.35, 2 * chunk_seconds),           # ends exactly on an edge
+        (3 * chunk_seconds, 3 * chunk_seconds + 0.5),            # starts exactly on an edge
+        (4 * chunk_seconds - 1.5, 4 * chunk_seconds + 0.05),     # starts in the previous chunk's overlap
+        (5 * chunk_seconds - 0.2, 7 * chunk_seconds + 0.3),      # spans several chunks
+        (8 * chunk_seconds + 2.0, 8 * chunk_seconds + 2.1),      # too short everywhere
+        (duration - 0.9, duration)                               # file end
+    ]
+
+
+def lavfi_audio(path, chunk_seconds):
+    duration = 10 * chunk_seconds + 3
+    gate = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in gaps_for(chunk_seconds, duration))
+    channel = f"(0.3*sin(2*PI*440*t)+0.4*(random(0)-0.5))*if({gate},0.001,1)"
+    subprocess.run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"aevalsrc=exprs='{channel}|{channel}':s={SAMPLE_RATE}:d={duration}",
+        "-c:a", "pcm_s16le", "-y", str(path)
+    ], check=True)
+    return path
+
+
+@pytest.mark.parametrize("chunk_seconds", [5, 7])
+def test_chunked_matches_whole_file(tmp_path, chunk_seconds):
+    audio = lavfi_audio(tmp_path / "chunk_edges.wav", chunk_seconds)
+
+    whole = chunked_analysis.analyze(audio, -18.0, 0.2, chunk_seconds=None)
+    chunked = chunked_analysis.analyze(audio, -18.0, 0.2, chunk_seconds=chunk_seconds)
+
+    assert chunked["chunks"] > 1
+    assert len(whole["silences"]) >= 6
+    assert chunked["silences"] == whole["silences"]
+    assert chunked["duration"] == whole["duration"]
+    assert chunked["mean_volume"] == pytest.approx(whole["mean_volume"], abs=1e-6)
+    assert chunked["max_volume"] == pytest.approx(whole["max_volume"], abs=1e-6)
+
+
+def test_whole_file_matches_silencedetect(tmp_path):
+    audio = lavfi_audio(tmp_path / "chunk_edges.wav", 7)
+
+    silences = chunked_analysis.analyze(audio, -18.0, 0.2, chunk_seconds=7)["silences"]
+    reference = chunked_analysis._ffmpeg_silencedetect(audio, -18.0, 0.2)
+
+    # ffmpeg prints times with 6 significant digits
+    assert len(silences) == len(reference)
+    for ours, theirs in zip(silences, reference):
+        assert ours["start"] == pytest.approx(theirs["start"], abs=2e-3)
+        assert ours["end"] == pytest.approx(theirs["end"], abs=2e-3)
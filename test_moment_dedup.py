@@ -0,0 +1,33 @@
+"""Near-duplicate lookups must find reworded moments through indexed band searches.
+
+    python -m pytest -q test_moment_dedup.py
+"""
+import sqlite3
+
+import moment_dedup
+
+TEXT = "GPT five is coming this summer with PhD level reasoning and a hundred times more power"
+
+
+def test_candidates_are_band_index_searches(tmp_path):
+    index = moment_dedup.MomentIndex(tmp_path / "moments.db")
+    with sqlite3.connect(str(index.path)) as db:
+        plan = [row[3] for row in db.execute("EXPLAIN QUERY PLAN " + moment_dedup.CANDIDATES_QUERY,
+                                             [0] * (2 * moment_dedup.BANDS))]
+
+    band_steps = [step for step in plan if " bands " in f" {step} "]
+    assert band_steps
+    assert all(step.startswith("SEARCH bands USING INDEX bands_lookup") for step in band_steps), plan
+
+
+def test_finds_reworded_moment_across_episodes(tmp_path):
+    index = moment_dedup.MomentIndex(tmp_path / "moments.db")
+    index.publish("08_gpt5", [{"id": "bombshell", "start": "0:00", "end": "0:06", "text": TEXT},
+                              {"id": "other", "text": "Sam Altman hinted at a mysterious surprise for the education market"}])
+
+    matches = index.find_similar(TEXT.replace("a hundred", "one hundred"))
+    assert [m["moment_id"] for m in matches] == ["bombshell"]
+    assert matches[0]["similarity"] >= moment_dedup.DEFAULT_THRESHOLD
+
+    assert index.find_similar(TEXT, exclude_episode="08_gpt5") == []
+    assert index.find_similar("completely unrelated words about cooking pasta at home tonight") == []
@@ -0,0 +1,86 @@
+"""The in-process meter must agree with ffmpeg's ebur128 and with ideal interpolation.
+
+The audio is generated with ffmpeg's lavfi aevalsrc: a 440 Hz tone plus
+full-band noise, a programme with loud and quiet passages (for LRA), and a
+quarter-sample-rate tone whose samples all miss its peak by 3 dB (faded in, so
+the onset step does not ring above the steady-state peak).
+
+    python -m pytest -q test_quality_metrics.py
+"""
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+import quality_metrics
+
+pytestmark = pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")),
+                                reason="needs ffmpeg and ffprobe")
+
+SAMPLE_RATE = 48000
+TOLERANCES = {"integrated_loudness": 0.1, "loudness_range": 0.3, "true_peak": 0.3}
+
+SIGNALS = {
+    "tone_noise": ("0.3*sin(2*PI*440*t)+0.1*(random(0)-0.5)", 20),
+    "programme": ("(0.3*sin(2*PI*440*t)+0.2*(random(0)-0.5))*if(lt(mod(t,10),6),1,0.2)", 40),
+    "inter_sample": ("0.5*sin(2*PI*12000*t+PI/4)*min(10*t,1)", 10)
+}
+
+
+def lavfi_audio(path, name):
+    expression, duration = SIGNALS[name]
+    subprocess.run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"aevalsrc=exprs='{expression}|{expression}':s={SAMPLE_RATE}:d={duration}",
+        "-c:a", "pcm_f32le", "-y", str(path)
+    ], check=True)
+    return path
+
+
+def ideal_true_peak(path) -> float:
+    """dBTP from 4x FFT (zero-padded spectrum) interpolation over overlapping blocks"""
+    data = subprocess.run(["ffmpeg", "-v", "error", "-i", str(path), "-f", "f64le", "-"],
+                          capture_output=True, check=True).stdout
+    samples = np.frombuffer(data, dtype=np.float64).reshape(-1, 2)
+    size, factor = 1 << 15, 4
+    peak = 0.0
+    for start in range(0, len(samples) - size + 1, size // 2):
+        spectrum = np.fft.rfft(samples[start:start + size], axis=0)
+        padded = np.zeros((size * factor // 2 + 1, 2), dtype=complex)
+        padded[:len(spectrum)] = spectrum
+        interpolated = np.fft.irfft(padded, size * factor, axis=0) * factor
+        # Only the middle half is free of the block's circular wrap-around
+        peak = max(peak, float(np.abs(interpolated[len(interpolated) // 4:3 * len(interpolated) // 4]).max()))
+    return 20 * np.log10(peak)
+
+
+@pytest.mark.parametrize("name", sorted(SIGNALS))
+def test_matches_ebur128(tmp_path, name):
+    audio = lavfi_audio(tmp_path / f"{name}.wav", name)
+
+    ours = quality_metrics.measure(audio)
+    reference = quality_metrics.ffmpeg_ebur128(audio)
+
+    for key, tolerance in TOLERANCES.items():
+        assert ours[key] == pytest.approx(reference[key], abs=tolerance), key
+
+
+@pytest.mark.parametrize("name", ["tone_noise", "inter_sample"])
+def test_true_peak_near_ideal(tmp_path, name):
+    audio = lavfi_audio(tmp_path / f"{name}.wav", name)
+
+    ours = quality_metrics.measure(audio)["true_peak"]
+    ideal = ideal_true_peak(audio)
+
+    # The interpolator's transition band can only lose level near Nyquist
+    assert ideal - 0.15 <= ours <= ideal + 0.01
+
+
+def test_inter_sample_peak_above_sample_peak(tmp_path):
+    audio = lavfi_audio(tmp_path / "inter_sample.wav", "inter_sample")
+
+    metrics = quality_metrics.measure(audio)
+
+    assert metrics["true_peak"] == pytest.approx(20 * np.log10(0.5), abs=0.05)
+    assert metrics["true_peak"] - metrics["peak_level"] == pytest.approx(3.01, abs=0.05)
@@ -0,0 +1,79 @@
+"""Queue workers must re-claim jobs whose worker died and stop retrying at max_attempts.
+
+Real worker processes drain a queue built in tmp_path; rendering is replaced
+by a stub generator, installed in each spawned worker by the process target.
+
+    python -m pytest -q test_render_queue.py
+"""
+import json
+import os
+from pathlib import Path
+
+import render_queue
+
+LEASE_SECONDS = 1.0
+
+
+class StubGenerator:
+    """Renders instantly; 'crash' kills its worker once, 'broken' always reports an error"""
+
+    def __init__(self, source_video, enhanced_audio, output_dir, **kwargs):
+        self.source_video = source_video
+        self.output_dir = Path(output_dir)
+
+    def render_job_group(self, group):
+        moment_id = group[0]["moment"]["id"]
+        marker = self.output_dir / f"{Path(self.source_video).stem}_{moment_id}.crashed"
+        if moment_id == "crash" and not marker.exists():
+            marker.touch()
+            os._exit(1)  # dies holding the lease, without failing the job
+        if moment_id == "broken":
+            return [{"platform": j["platform"], "clip_id": j["moment"]["id"], "error": "encoder failed"}
+                    for j in group]
+        return [{"platform": j["platform"], "clip_id": j["moment"]["id"], "filename": f"{moment_id}.mp4"}
+                for j in group]
+
+
+def stub_work_process(queue_path, lease_seconds):
+    import generate_social_clips
+
+    generate_social_clips.SocialMediaClipGenerator = StubGenerator
+    render_queue.POLL_SECONDS = 0.1
+    render_queue.work(queue_path, lease_seconds=lease_seconds)
+
+
+def config(tmp_path, source):
+    return {"source_video": str(tmp_path / f"{source}.mp4"), "enhanced_audio": str(tmp_path / f"{source}.wav"),
+            "output_dir": str(tmp_path / "clips"), "normalize_loudness": True, "platform_specs": {},
+            "soft_subtitles": False, "clip_audio": None, "audio_intermediate": None}
+
+
+def groups(*moment_ids):
+    return [[{"platform": "tiktok", "moment": {"id": moment_id}}] for moment_id in moment_ids]
+
+
+def test_workers_reclaim_expired_leases_and_respect_max_attempts(tmp_path, monkeypatch):
+    (tmp_path / "clips").mkdir()
+    queue = render_queue.RenderQueue(tmp_path / "render.db")
+    run_id = queue.enqueue(config(tmp_path, "ep_a"), groups("crash", "intro", "broken"), [3, 2, 1], max_attempts=2)
+    queue.enqueue(config(tmp_path, "ep_b"), groups("outro"), [1], run_id=run_id, max_attempts=2)
+
+    # The spawned workers unpickle the target by name, so they run the stub
+    monkeypatch.setattr(render_queue, "_work_process", stub_work_process)
+    render_queue.run_workers(queue.path, processes=2, lease_seconds=LEASE_SECONDS)
+
+    jobs = {job["job_group"][0]["moment"]["id"]: job for job in queue.jobs(run_id)}
+    assert (jobs["crash"]["status"], jobs["crash"]["attempts"]) == ("done", 2)
+    assert (jobs["broken"]["status"], jobs["broken"]["attempts"]) == ("failed", 2)
+    assert jobs["broken"]["error"] == "encoder failed"
+    assert queue.status(run_id) == {"done": 3, "failed": 1}
+
+    [metadata_path] = render_queue.merge(queue.path, run_id)
+    metadata = json.loads(metadata_path.read_text())
+    assert metadata["status"] == "complete"
+    assert [source["source_video"] for source in metadata["sources"]] == [
+        str(tmp_path / "ep_a.mp4"), str(tmp_path / "ep_b.mp4")]
+    clips = {clip["clip_id"]: clip for clip in metadata["clips"]}
+    assert clips["outro"]["source_video"] == str(tmp_path / "ep_b.mp4")
+    assert clips["crash"]["source_video"] == str(tmp_path / "ep_a.mp4")
+    assert clips["broken"]["error"] == "encoder failed"
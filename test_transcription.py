@@ -0,0 +1,90 @@
+"""Chunked transcription must re-base chunk times, cut chunks by the plan's rules and reuse its cache.
+
+The audio is generated with ffmpeg's lavfi aevalsrc: tone bursts standing in
+for speech, separated by one silence longer than MAX_GAP and one shorter.
+
+    python -m pytest -q test_transcription.py
+"""
+import shutil
+import subprocess
+import wave
+
+import pytest
+
+import transcription
+
+pytestmark = pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")),
+                                reason="needs ffmpeg and ffprobe")
+
+# Speech 0-3 s, 4 s of silence, speech 7-10 s, 1 s of silence, speech 11-14 s, 2 s of silence
+BURSTS = ("0.5*sin(2*PI*220*t)*(lt(t,3)+between(t,7,10)+between(t,11,14))", 16)
+# 40 s of speech with a quiet dip at 26.0-26.4 s, inside the last quarter of the first 30 s
+LONG_SPEECH = ("0.5*sin(2*PI*220*t)*if(between(t,26,26.4),0.01,1)", 40)
+
+
+def lavfi_audio(path, signal):
+    expression, duration = signal
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"aevalsrc=exprs='{expression}':s=48000:d={duration}",
+                    "-c:a", "pcm_s16le", "-y", str(path)], check=True)
+    return path
+
+
+class OffsetBackend(transcription.TranscriptionBackend):
+    """One segment per chunk, starting 0.5 s in and running past the chunk's end"""
+    name = "offset-test"
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio_path, language):
+        with wave.open(str(audio_path), 'rb') as f:
+            duration = f.getnframes() / f.getframerate()
+        self.calls.append(duration)
+        return [{"start": 0.5, "end": duration + 5, "text": "hello there", "confidence": 0.9,
+                 "words": [{"word": "hello", "start": 0.5, "end": 0.9},
+                           {"word": "there", "start": 1.0, "end": duration + 5}]}]
+
+
+def test_plan_chunks_merges_short_gaps_only():
+    regions = [(0.0, 5.0), (6.5, 10.0), (13.0, 20.0), (21.0, 45.0), (46.0, 50.0)]
+
+    chunks = transcription.plan_chunks(regions, audio_path=None, max_seconds=30.0, max_gap=2.0)
+
+    # 1.5 s gap merged; 3 s gap splits; 1 s gaps split only where the merge would exceed 30 s
+    assert [(c["index"], c["start"], c["end"]) for c in chunks] == [
+        (0, 0.0, 10.0), (1, 13.0, 20.0), (2, 21.0, 50.0)]
+
+
+def test_plan_chunks_cuts_long_speech_at_its_quietest_point(tmp_path):
+    audio = lavfi_audio(tmp_path / "long.wav", LONG_SPEECH)
+
+    chunks = transcription.plan_chunks([(0.0, 40.0)], audio, max_seconds=30.0)
+
+    assert len(chunks) == 2
+    assert 26.0 <= chunks[0]["end"] <= 26.4
+    assert chunks[1]["start"] == chunks[0]["end"] and chunks[1]["end"] == 40.0
+
+
+def test_segments_are_rebased_into_their_chunks_and_cached(tmp_path):
+    audio = lavfi_audio(tmp_path / "bursts.wav", BURSTS)
+    regions, _ = transcription.speech_regions(audio)
+    chunks = transcription.plan_chunks(regions, audio)
+    assert len(chunks) == 2
+
+    backend = OffsetBackend()
+    transcript = transcription.transcribe(audio, backend, cache_dir=tmp_path / "cache", workers=2)
+
+    assert len(transcript["segments"]) == len(chunks)
+    for segment, chunk in zip(transcript["segments"], chunks):
+        hello, there = segment["words"]
+        assert hello["start"] == pytest.approx(chunk["start"] + 0.5, abs=0.001)
+        # Times past the chunk's end are clamped to it
+        assert there["end"] == pytest.approx(chunk["end"], abs=0.001)
+        assert segment["start_time"] == transcription.format_timestamp(chunk["start"] + 0.5)
+        assert segment["end_time"] == transcription.format_timestamp(chunk["end"])
+    assert transcript["metadata"]["cached_chunks"] == 0
+
+    again = transcription.transcribe(audio, backend, cache_dir=tmp_path / "cache", workers=2)
+    assert again["metadata"]["cached_chunks"] == again["metadata"]["chunks"] == len(chunks)
+    assert len(backend.calls) == len(chunks)
+    assert again["segments"] == transcript["segments"]
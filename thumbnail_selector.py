@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Best-frame thumbnail selection from a single low-resolution scan.
+
+A moment's range is decoded once at reduced size and frame rate into gray
+frames, and every frame is scored with vectorized NumPy metrics:
+- sharpness: variance of the Laplacian (motion blur and soft focus score low)
+- exposure: mean level near mid-gray with few crushed or blown pixels
+- stability: small difference to the neighbouring frames (blinks, gestures
+  and cuts stand out against both neighbours)
+The winning time is cached per (source, range), so every platform's
+thumbnail of a moment comes from the same scan and only the chosen frame is
+extracted at full quality.
+
+    python thumbnail_selector.py "08 - GPT 5.0 This Summer.mp4" 12.145 17.354 thumb.jpg
+"""
+import argparse
+import json
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+import media_info
+
+SCAN_WIDTH = 320
+SCAN_FPS = 5
+CHUNK_FRAMES = 64        # frames scored per read, bounding memory on long ranges
+EDGE_MARGIN = 0.1        # fraction of the range skipped at each end
+TARGET_LEVEL = 118.0     # mid-gray a well exposed frame averages around
+CLIP_LOW, CLIP_HIGH = 10, 245
+
+
+def frame_metrics(frames: np.ndarray, previous: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """Raw per-frame Laplacian variance, mean level, clipped fraction and difference to the previous frame"""
+    frames = frames.astype(np.float32)
+    count = len(frames)
+    laplacian = (4 * frames[:, 1:-1, 1:-1] - frames[:, :-2, 1:-1] - frames[:, 2:, 1:-1]
+                 - frames[:, 1:-1, :-2] - frames[:, 1:-1, 2:])
+    if previous is not None:
+        frames_with_previous = np.concatenate([previous[None].astype(np.float32), frames])
+    else:
+        frames_with_previous = np.concatenate([frames[:1], frames])
+    return {
+        "laplacian_var": laplacian.reshape(count, -1).var(axis=1),
+        "mean": frames.reshape(count, -1).mean(axis=1),
+        "clipped": ((frames < CLIP_LOW) | (frames > CLIP_HIGH)).reshape(count, -1).mean(axis=1),
+        "diff": np.abs(np.diff(frames_with_previous, axis=0)).reshape(count, -1).mean(axis=1)
+    }
+
+
+def score_frames(metrics: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Sharpness, exposure and stability (each 0..1) and their product for a whole range"""
+    sharpness = metrics["laplacian_var"] / max(float(metrics["laplacian_var"].max()), 1e-6)
+    exposure = np.clip(1 - np.abs(metrics["mean"] - TARGET_LEVEL) / TARGET_LEVEL, 0, 1) * (1 - metrics["clipped"])
+
+    # A frame is as unstable as its larger difference to either neighbour
+    diff = metrics["diff"]
+    motion = np.maximum(diff, np.concatenate([diff[1:], diff[-1:]]))
+    stability = 1 / (1 + motion / (float(np.median(motion)) + 1))
+
+    return {"sharpness": sharpness, "exposure": exposure, "stability": stability,
+            "score": sharpness * exposure * stability}
+
+
+class ThumbnailSelector:
+    def __init__(self, cache_path=None):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._cache = {}
+        self._lock = threading.Lock()
+        if self.cache_path and self.cache_path.exists():
+            with open(self.cache_path, 'r') as f:
+                self._cache = json.load(f)
+
+    def _cache_key(self, source, start: float, end: float) -> str:
+        source = Path(source)
+        stat = source.stat()
+        return f"{source.resolve()}|{stat.st_size}|{stat.st_mtime}|{start:.3f}|{end:.3f}"
+
+    def _save_cache(self):
+        if self.cache_path:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+            with open(temp_path, 'w') as f:
+                json.dump(self._cache, f, indent=2)
+            os.replace(temp_path, self.cache_path)
+
+    def scan(self, source, start: float, end: float) -> Dict[str, np.ndarray]:
+        """Raw metrics of the range's frames at SCAN_FPS and SCAN_WIDTH, from one streamed decode"""
+        width, height = media_info.video_size(source) or (1920, 1080)
+        scan_height = max(2, int(round(SCAN_WIDTH * height / width / 2)) * 2)
+        cmd = [
+            "ffmpeg", "-v", "error",
+            "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}",
+            "-i", str(source),
+            "-an", "-sn", "-vf", f"fps={SCAN_FPS},scale={SCAN_WIDTH}:{scan_height},format=gray",
+            "-f", "rawvideo", "-"
+        ]
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+        frame_size = SCAN_WIDTH * scan_height
+
+        chunks = []
+        previous = None
+        while True:
+            data = process.stdout.read(frame_size * CHUNK_FRAMES)
+            count = len(data) // frame_size
+            if not count:
+                break
+            frames = np.frombuffer(data[:count * frame_size], dtype=np.uint8).reshape(count, scan_height, SCAN_WIDTH)
+            chunks.append(frame_metrics(frames, previous))
+            previous = frames[-1]
+        process.wait()
+        if process.returncode != 0:
+            raise RuntimeError(f"Thumbnail scan failed for {source} [{start:.3f}-{end:.3f}]")
+        if not chunks:
+            return {}
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+    def select(self, source, start: float, end: float) -> Dict:
+        """Best thumbnail time (source seconds) in a range, with its scores (cached)"""
+        key = self._cache_key(source, start, end)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+
+        metrics = self.scan(source, start, end)
+        if not metrics:
+            choice = {"time": (start + end) / 2, "frames_scanned": 0}
+        else:
+            scores = score_frames(metrics)
+            count = len(scores["score"])
+            # Stay away from the range edges (fades, cut-ins) when enough frames remain
+            margin = int(count * EDGE_MARGIN)
+            best = int(np.argmax(scores["score"][margin:count - margin])) + margin
+            choice = {
+                # The fps filter emits the source frame nearest each 1/SCAN_FPS step
+                "time": round(start + best / SCAN_FPS, 3),
+                "frames_scanned": count,
+                **{name: round(float(values[best]), 3) for name, values in scores.items()}
+            }
+
+        with self._lock:
+            self._cache[key] = choice
+            self._save_cache()
+        return choice
+
+
+def extract_frame(video_path, timestamp: float, output_path) -> Path:
+    """Full-quality JPEG of the frame at timestamp (input seek, one frame decoded per GOP)"""
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-ss", f"{timestamp:.3f}",
+        "-i", str(video_path),
+        "-frames:v", "1",
+        "-q:v", "2",
+        "-y", str(output_path)
+    ]
+    subprocess.run(cmd, check=True)
+    return Path(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick and extract the best thumbnail frame of a range")
+    parser.add_argument("video")
+    parser.add_argument("start", type=float)
+    parser.add_argument("end", type=float)
+    parser.add_argument("output", nargs="?", help="JPEG to write (default: only print the choice)")
+    args = parser.parse_args()
+
+    choice = ThumbnailSelector().select(args.video, args.start, args.end)
+    print(json.dumps(choice, indent=2))
+    if args.output:
+        extract_frame(args.video, choice["time"], args.output)
+        print(f"Thumbnail: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
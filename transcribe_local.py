@@ -2,11 +2,14 @@
 """
 Basic audio analysis and transcription framework for podcast episode
 """
+import argparse
 import json
-import subprocess
 import os
 from datetime import datetime, timedelta
 
+import media_info
+import transcription
+
 def format_timestamp(seconds):
     """Convert seconds to HH:MM:SS.mmm format"""
     td = timedelta(seconds=seconds)
@@ -16,16 +19,11 @@ def format_timestamp(seconds):
     return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
 
 def get_audio_duration(audio_path):
-    """Get duration of audio file using ffprobe"""
-    cmd = [
-        'ffprobe', '-v', 'quiet', '-print_format', 'json',
-        '-show_format', audio_path
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode == 0:
-        data = json.loads(result.stdout)
-        return float(data['format']['duration'])
-    return None
+    """Get duration of audio file (probed once, shared through media_info)"""
+    try:
+        return media_info.duration(audio_path)
+    except (OSError, RuntimeError):
+        return None
 
 def analyze_audio_segments(audio_path, segment_duration=5.0):
     """Analyze audio and create segment placeholders"""
@@ -55,8 +53,15 @@ def analyze_audio_segments(audio_path, segment_duration=5.0):
     
     return segments
 
-def create_transcript_structure(audio_path):
-    """Create the full transcript structure"""
+def create_transcript_structure(audio_path, backend=None, workers=None):
+    """Create the full transcript structure
+    
+    With a transcription backend, only the detected speech is transcribed, in
+    parallel chunks; without one, fixed-length placeholder segments are emitted.
+    """
+    if backend is not None:
+        return transcription.transcribe(audio_path, backend, workers=workers)
+    
     segments = analyze_audio_segments(audio_path)
     if not segments:
         return None
@@ -77,14 +82,26 @@ def create_transcript_structure(audio_path):
     return transcript
 
 def main():
-    audio_file = "/Users/cam/Desktop/video-automation/08_gpt5_audio.wav"
+    parser = argparse.ArgumentParser(description="Transcribe a podcast episode")
+    parser.add_argument("audio", nargs="?", default="/Users/cam/Desktop/video-automation/08_gpt5_audio.wav")
+    parser.add_argument("--output", default="/Users/cam/Desktop/video-automation/08_gpt5_transcript.json")
+    parser.add_argument("--backend", choices=sorted(transcription.BACKENDS),
+                        help="Transcription backend (default: placeholder segments only)")
+    parser.add_argument("--model", help="Model name for model-based backends")
+    parser.add_argument("--workers", type=int, help="Chunks transcribed in parallel")
+    args = parser.parse_args()
+    audio_file = args.audio
+    
+    backend = None
+    if args.backend:
+        backend = transcription.get_backend(args.backend, **({"model": args.model} if args.model else {}))
     
     print("Analyzing audio file...")
-    transcript = create_transcript_structure(audio_file)
+    transcript = create_transcript_structure(audio_file, backend, args.workers)
     
     if transcript:
         # Save transcript
-        output_path = "/Users/cam/Desktop/video-automation/08_gpt5_transcript.json"
+        output_path = args.output
         with open(output_path, 'w') as f:
             json.dump(transcript, f, indent=2)
         
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Full-text index over the transcript back catalog.
+
+Every segment of every transcript JSON is stored with its episode and
+timestamps in a SQLite database with an FTS5 index on the text, so phrase
+and boolean queries across hundreds of episodes return (episode, start, end)
+hits in milliseconds. Indexing is incremental: a transcript is re-read only
+when its size or mtime changed, and then its segments are replaced in one
+transaction.
+
+Queries use FTS5 syntax: words are ANDed, "quoted phrases", OR, NOT,
+NEAR(a b, 5) and prefix* all work. A query without any of that syntax is
+taken as plain words, and words FTS5 would misread (GPT-5, o3-mini, 4.5) are
+quoted as phrases; with operators, quote such words yourself.
+
+    python transcript_index.py index transcripts/ 08_gpt5_transcript.json
+    python transcript_index.py search pricing
+    python transcript_index.py search '"release date" OR summer NOT leaked' --episode 08_gpt5_transcript
+"""
+import argparse
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import sqlite_store
+
+DEFAULT_DB = "transcripts.db"
+DEFAULT_LIMIT = 100
+FTS_OPERATORS = re.compile(r'["*():^]|\b(?:AND|OR|NOT|NEAR)\b')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    episode TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    segment_count INTEGER NOT NULL,
+    indexed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    episode_id INTEGER NOT NULL REFERENCES episodes (id),
+    segment_index INTEGER NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    speaker TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_episode ON segments (episode_id, start);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5 (
+    text, content='segments', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS segments_insert AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_delete AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def parse_time(value) -> float:
+    """Seconds from a number or an HH:MM:SS.mmm string"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    seconds = 0.0
+    for part in str(value).split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_time(seconds: float) -> str:
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds % 60:06.3f}"
+
+
+def load_segments(transcript_path) -> Optional[List[Dict]]:
+    """Indexable segments of a transcript JSON, or None if the file is not a transcript"""
+    try:
+        with open(transcript_path, 'r') as f:
+            transcript = json.load(f)
+    except (OSError, ValueError):
+        return None
+    segments = transcript.get("segments") if isinstance(transcript, dict) else None
+    if not isinstance(segments, list):
+        return None
+
+    rows = []
+    for i, segment in enumerate(segments):
+        text = (segment.get("text") or "").strip()
+        # Placeholder segments from the silence-based fallback carry no speech
+        if not text or text.startswith(("[Segment", "[Speech segment")):
+            continue
+        rows.append({
+            "segment_index": i,
+            "start": parse_time(segment.get("start_time", segment.get("start", 0))),
+            "end": parse_time(segment.get("end_time", segment.get("end", 0))),
+            "speaker": segment.get("speaker"),
+            "text": text
+        })
+    return rows
+
+
+def fts_query(query: str) -> str:
+    """FTS5 MATCH expression for a query; plain words that are not FTS5 barewords become phrases"""
+    if FTS_OPERATORS.search(query):
+        return query
+    # Barewords are runs of letters, digits, underscores and non-ASCII characters
+    return " ".join(word if all(c.isalnum() or c == "_" or ord(c) > 127 for c in word) else f'"{word}"'
+                    for word in query.split())
+
+
+class TranscriptIndex(sqlite_store.SQLiteStore):
+    """Segments of all indexed transcripts with an FTS5 index on their text"""
+
+    schema = SCHEMA
+
+    def __init__(self, path=DEFAULT_DB):
+        super().__init__(path)
+
+    def add_transcript(self, transcript_path, episode: Optional[str] = None, force: bool = False) -> Optional[bool]:
+        """Index one transcript; True if (re)indexed, False if unchanged, None if not a transcript"""
+        transcript_path = Path(transcript_path).resolve()
+        episode = episode or transcript_path.stem
+        stat = transcript_path.stat()
+
+        with self._connect() as db:
+            row = db.execute("SELECT path, size, mtime FROM episodes WHERE episode = ?", (episode,)).fetchone()
+        if (not force and row is not None and row["path"] == str(transcript_path)
+                and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime):
+            return False
+
+        segments = load_segments(transcript_path)
+        if segments is None:
+            return None
+
+        with self._transaction() as db:
+            db.execute("DELETE FROM segments WHERE episode_id = (SELECT id FROM episodes WHERE episode = ?)",
+                       (episode,))
+            db.execute(
+                "INSERT INTO episodes (episode, path, size, mtime, segment_count, indexed) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (episode) DO UPDATE SET path = excluded.path, size = excluded.size, "
+                "mtime = excluded.mtime, segment_count = excluded.segment_count, indexed = excluded.indexed",
+                (episode, str(transcript_path), stat.st_size, stat.st_mtime, len(segments), time.time())
+            )
+            episode_id = db.execute("SELECT id FROM episodes WHERE episode = ?", (episode,)).fetchone()["id"]
+            db.executemany(
+                "INSERT INTO segments (episode_id, segment_index, start, end, speaker, text) VALUES (?, ?, ?, ?, ?, ?)",
+                [(episode_id, s["segment_index"], s["start"], s["end"], s["speaker"], s["text"]) for s in segments]
+            )
+        return True
+
+    def update(self, paths: List, force: bool = False) -> Dict[str, int]:
+        """Index files and directories (every *.json below them); unchanged files are skipped"""
+        counts = {"indexed": 0, "unchanged": 0, "skipped": 0}
+        for path in paths:
+            path = Path(path)
+            files = sorted(path.rglob("*.json")) if path.is_dir() else [path]
+            for transcript_path in files:
+                result = self.add_transcript(transcript_path, force=force)
+                counts["indexed" if result else "unchanged" if result is False else "skipped"] += 1
+        return counts
+
+    def remove(self, episode: str) -> bool:
+        with self._transaction() as db:
+            db.execute("DELETE FROM segments WHERE episode_id = (SELECT id FROM episodes WHERE episode = ?)",
+                       (episode,))
+            return db.execute("DELETE FROM episodes WHERE episode = ?", (episode,)).rowcount > 0
+
+    def prune(self) -> List[str]:
+        """Drop episodes whose transcript file no longer exists"""
+        with self._connect() as db:
+            rows = db.execute("SELECT episode, path FROM episodes").fetchall()
+        gone = [row["episode"] for row in rows if not Path(row["path"]).exists()]
+        for episode in gone:
+            self.remove(episode)
+        return gone
+
+    def search(self, query: str, episode: Optional[str] = None, limit: int = DEFAULT_LIMIT,
+               by_rank: bool = False) -> List[Dict]:
+        """Segments matching an FTS5 query, in catalog order (or best match first with by_rank)"""
+        sql = (
+            "SELECT e.episode, s.segment_index, s.start, s.end, s.speaker, s.text, "
+            "snippet(segments_fts, 0, '[', ']', '...', 12) AS snippet "
+            "FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid "
+            "JOIN episodes e ON e.id = s.episode_id WHERE segments_fts MATCH ?"
+        )
+        params = [fts_query(query)]
+        if episode:
+            sql += " AND e.episode = ?"
+            params.append(episode)
+        sql += " ORDER BY " + ("segments_fts.rank" if by_rank else "e.episode, s.start") + " LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as db:
+            try:
+                rows = db.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Bad search query {query!r}: {e} "
+                                 f"(with FTS5 operators, quote words like \"GPT-5\" yourself)") from e
+        return [dict(row, start_time=format_time(row["start"]), end_time=format_time(row["end"])) for row in rows]
+
+    def stats(self) -> Dict:
+        with self._connect() as db:
+            row = db.execute("SELECT COUNT(*) AS episodes, COALESCE(SUM(segment_count), 0) AS segments FROM episodes").fetchone()
+        return dict(row)
+
+    def optimize(self):
+        """Merge the FTS5 b-trees after large batches of updates"""
+        with self._connect() as db:
+            db.execute("INSERT INTO segments_fts (segments_fts) VALUES ('optimize')")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and search the transcript back catalog")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Index database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="Add or refresh transcripts (files or directories)")
+    index_parser.add_argument("paths", nargs="+")
+    index_parser.add_argument("--force", action="store_true", help="Re-read transcripts even if unchanged")
+    index_parser.add_argument("--prune", action="store_true", help="Drop episodes whose transcript is gone")
+
+    search_parser = subparsers.add_parser("search", help="Find segments matching an FTS5 query")
+    search_parser.add_argument("query", help="FTS5 query; without operators, words like GPT-5 are quoted for you")
+    search_parser.add_argument("--episode")
+    search_parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    search_parser.add_argument("--rank", action="store_true", help="Best match first instead of catalog order")
+    search_parser.add_argument("--json", action="store_true")
+
+    subparsers.add_parser("stats", help="Episode and segment counts")
+
+    args = parser.parse_args()
+    index = TranscriptIndex(args.db)
+
+    if args.command == "index":
+        counts = index.update(args.paths, force=args.force)
+        if args.prune:
+            counts["pruned"] = len(index.prune())
+        if counts["indexed"]:
+            index.optimize()
+        print(", ".join(f"{key}: {value}" for key, value in counts.items()))
+    elif args.command == "search":
+        started = time.perf_counter()
+        try:
+            hits = index.search(args.query, args.episode, args.limit, args.rank)
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed = (time.perf_counter() - started) * 1000
+        if args.json:
+            print(json.dumps(hits, indent=2))
+        else:
+            for hit in hits:
+                print(f"{hit['episode']}  {hit['start_time']} - {hit['end_time']}  {hit['snippet']}")
+            print(f"{len(hits)} hits in {elapsed:.1f} ms")
+    else:
+        print(json.dumps(index.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+VAD-gated, chunk-parallel transcription with pluggable backends.
+
+Only speech is transcribed. Silence detection (chunked_analysis) finds the
+speech regions; regions are padded slightly, packed into chunks of at most
+MAX_CHUNK_SECONDS that never bridge a long silence, and regions longer than
+that are cut at their quietest point (waveform_pyramid). Each chunk is cut to
+16 kHz mono, hashed, and transcribed on a worker pool unless the cache
+already holds the result for that hash and backend. Segment and word times
+come back relative to the chunk and are re-based onto the episode timeline.
+
+Backends implement TranscriptionBackend.transcribe(). "stand-in" is a
+deterministic local backend (text derived from the audio hash) for tests and
+pipeline runs without a model; "faster-whisper" needs `pip install faster-whisper`.
+
+    python transcription.py 08_gpt5_enhanced.wav --backend stand-in --workers 4
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import chunked_analysis
+import instrumentation
+import waveform_pyramid
+
+VAD_NOISE_DB = -35.0
+VAD_MIN_SILENCE = 0.4      # shorter pauses stay inside a speech region
+SPEECH_PAD = 0.15          # kept around each region so word onsets are not clipped
+MIN_SPEECH = 0.25          # shorter regions are clicks and breaths
+MAX_GAP = 2.0              # longest silence kept inside one chunk
+MAX_CHUNK_SECONDS = 30.0
+CHUNK_SAMPLE_RATE = 16000
+DEFAULT_WORKERS = 4
+
+
+def format_timestamp(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    return f"{hours:02d}:{minutes:02d}:{millis / 1000:06.3f}"
+
+
+class TranscriptionBackend(ABC):
+    """Turns one short mono WAV into segments timed relative to its start
+
+    transcribe() returns [{"start", "end", "text", "confidence",
+    "words": [{"word", "start", "end"}]}]. cache_id() must change whenever
+    the same audio could produce different output (model, options).
+    """
+    name = "base"
+
+    def cache_id(self) -> str:
+        return self.name
+
+    @abstractmethod
+    def transcribe(self, audio_path: Path, language: str) -> List[Dict]:
+        ...
+
+
+class StandInBackend(TranscriptionBackend):
+    """Deterministic pseudo-transcript: same audio, same words and timings"""
+    name = "stand-in"
+    VERSION = 1
+    VOCABULARY = (
+        "the", "model", "release", "summer", "benchmark", "research", "open", "source", "faster",
+        "people", "really", "think", "going", "change", "everything", "about", "data", "training",
+        "agents", "reasoning", "video", "audio", "launch", "next", "year", "question", "answer"
+    )
+    WORDS_PER_SECOND = 2.5
+    WORDS_PER_SEGMENT = 12
+
+    def __init__(self, **options):
+        # Model options (model=, device=, ...) mean nothing here and are ignored
+        pass
+
+    def cache_id(self) -> str:
+        return f"{self.name}-v{self.VERSION}"
+
+    def transcribe(self, audio_path: Path, language: str) -> List[Dict]:
+        with wave.open(str(audio_path), 'rb') as f:
+            duration = f.getnframes() / f.getframerate()
+            digest = hashlib.sha256(f.readframes(f.getnframes())).digest()
+        count = max(1, int(duration * self.WORDS_PER_SECOND))
+        step = duration / count
+        words = [{
+            "word": self.VOCABULARY[hashlib.sha256(digest + i.to_bytes(4, "little")).digest()[0] % len(self.VOCABULARY)],
+            "start": round(i * step, 3),
+            "end": round((i + 0.8) * step, 3)
+        } for i in range(count)]
+
+        segments = []
+        for first in range(0, count, self.WORDS_PER_SEGMENT):
+            group = words[first:first + self.WORDS_PER_SEGMENT]
+            segments.append({
+                "start": group[0]["start"],
+                "end": group[-1]["end"],
+                "text": " ".join(w["word"] for w in group).capitalize() + ".",
+                "confidence": 1.0,
+                "words": group
+            })
+        return segments
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """Whisper through faster-whisper (CTranslate2), word timestamps on"""
+    name = "faster-whisper"
+
+    def __init__(self, model: str = "small", device: str = "auto", compute_type: str = "default"):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("The faster-whisper backend needs: pip install faster-whisper") from None
+        self.model_name = model
+        self.compute_type = compute_type
+        self.model = WhisperModel(model, device=device, compute_type=compute_type)
+
+    def cache_id(self) -> str:
+        return f"{self.name}-{self.model_name}-{self.compute_type}"
+
+    def transcribe(self, audio_path: Path, language: str) -> List[Dict]:
+        segments, _ = self.model.transcribe(str(audio_path), language=language, word_timestamps=True)
+        results = []
+        for segment in segments:
+            words = [{"word": w.word.strip(), "start": w.start, "end": w.end} for w in (segment.words or [])]
+            results.append({
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text.strip(),
+                "confidence": round(float(2 ** segment.avg_logprob), 3),
+                "words": words
+            })
+        return results
+
+
+BACKENDS = {
+    StandInBackend.name: StandInBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend
+}
+
+
+def get_backend(name: str, **options) -> TranscriptionBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend {name!r} (available: {', '.join(BACKENDS)})")
+    return BACKENDS[name](**options)
+
+
+def speech_regions(audio_path, noise_db: float = VAD_NOISE_DB, min_silence: float = VAD_MIN_SILENCE,
+                   workers: Optional[int] = None) -> Tuple[List[Tuple[float, float]], float]:
+    """Padded speech regions between detected silences, and the file duration"""
+    analysis = chunked_analysis.analyze(audio_path, noise_db, min_silence, workers=workers)
+    duration = analysis["duration"]
+    regions = []
+    for segment in chunked_analysis.speech_segments(analysis["silences"], duration):
+        if segment["duration"] < MIN_SPEECH:
+            continue
+        start = round(max(0.0, segment["start"] - SPEECH_PAD), 3)
+        end = round(min(duration, segment["end"] + SPEECH_PAD), 3)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions, duration
+
+
+def plan_chunks(regions: List[Tuple[float, float]], audio_path, max_seconds: float = MAX_CHUNK_SECONDS,
+                max_gap: float = MAX_GAP) -> List[Dict]:
+    """Pack speech regions into chunks cut only at silences (or the quietest point of long speech)"""
+    pieces = []
+    pyramid = None
+    for start, end in regions:
+        while end - start > max_seconds:
+            if pyramid is None:
+                pyramid = waveform_pyramid.WaveformPyramid.for_audio(audio_path)
+            # Cut in the quietest 200 ms of the last quarter of the allowed length
+            search = max_seconds / 8
+            cut = pyramid.quietest(start + max_seconds - search, window=0.2, search=search)["center"]
+            cut = min(max(cut, start + max_seconds / 2), start + max_seconds)
+            pieces.append((start, cut))
+            start = cut
+        pieces.append((start, end))
+
+    chunks = []
+    for start, end in pieces:
+        if chunks and start - chunks[-1]["end"] <= max_gap and end - chunks[-1]["start"] <= max_seconds:
+            chunks[-1]["end"] = end
+        else:
+            chunks.append({"index": len(chunks), "start": start, "end": end})
+    return chunks
+
+
+def cut_chunk(audio_path, start: float, end: float, output_path) -> Path:
+    """16 kHz mono PCM cut of start..end, the format speech models expect"""
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-ss", f"{start:.6f}", "-t", f"{end - start:.6f}",
+        "-i", str(audio_path),
+        "-map", "0:a:0", "-ac", "1", "-ar", str(CHUNK_SAMPLE_RATE), "-c:a", "pcm_s16le",
+        "-y", str(output_path)
+    ]
+    instrumentation.run(cmd, check=True)
+    return Path(output_path)
+
+
+def chunk_hash(chunk_path: Path, backend: TranscriptionBackend, language: str) -> str:
+    with wave.open(str(chunk_path), 'rb') as f:
+        samples = f.readframes(f.getnframes())
+    return hashlib.sha256(f"{backend.cache_id()}|{language}|".encode() + samples).hexdigest()
+
+
+def _rebase(segments: List[Dict], offset: float, limit: float) -> List[Dict]:
+    rebased = []
+    for segment in segments:
+        words = [{"word": w["word"], "start": round(offset + w["start"], 3), "end": round(min(offset + w["end"], limit), 3)}
+                 for w in segment.get("words", [])]
+        rebased.append(dict(segment, start=round(offset + segment["start"], 3),
+                            end=round(min(offset + segment["end"], limit), 3), words=words))
+    return rebased
+
+
+def cache_dir_for(audio_path) -> Path:
+    audio_path = Path(audio_path)
+    return audio_path.with_name(audio_path.name + ".transcripts")
+
+
+@instrumentation.timed("transcribe_chunk")
+def transcribe_chunk(audio_path, chunk: Dict, backend: TranscriptionBackend, language: str,
+                     cache_dir: Path, work_dir: Path) -> Dict:
+    """Transcribe (or load from cache) one chunk, with episode-relative times"""
+    chunk_path = cut_chunk(audio_path, chunk["start"], chunk["end"], work_dir / f"chunk_{chunk['index']:05d}.wav")
+    key = chunk_hash(chunk_path, backend, language)
+    cache_path = cache_dir / f"{key}.json"
+
+    cached = cache_path.exists()
+    if cached:
+        with open(cache_path, 'r') as f:
+            segments = json.load(f)
+    else:
+        segments = backend.transcribe(chunk_path, language)
+        temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(segments, f)
+        os.replace(temp_path, cache_path)
+        instrumentation.count("transcribed_seconds", chunk["end"] - chunk["start"])
+    chunk_path.unlink()
+
+    return dict(chunk, hash=key, cached=cached, segments=_rebase(segments, chunk["start"], chunk["end"]))
+
+
+def transcribe(audio_path, backend: Optional[TranscriptionBackend] = None, language: str = "en",
+               workers: Optional[int] = None, cache_dir=None) -> Dict:
+    """Transcript of the speech in audio_path, in the transcribe_local structure"""
+    audio_path = Path(audio_path)
+    backend = backend or StandInBackend()
+    cache_dir = Path(cache_dir) if cache_dir else cache_dir_for(audio_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    regions, duration = speech_regions(audio_path, workers=workers)
+    chunks = plan_chunks(regions, audio_path)
+    with tempfile.TemporaryDirectory(prefix="transcribe_") as tmp:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers or DEFAULT_WORKERS, len(chunks) or 1))) as pool:
+            results = list(pool.map(
+                lambda c: transcribe_chunk(audio_path, c, backend, language, cache_dir, Path(tmp)), chunks
+            ))
+
+    segments = []
+    for result in results:
+        for segment in result["segments"]:
+            if not segment["text"].strip():
+                continue
+            segments.append({
+                "start_time": format_timestamp(segment["start"]),
+                "end_time": format_timestamp(segment["end"]),
+                "speaker": "Speaker 1",
+                "text": segment["text"].strip(),
+                "confidence": segment.get("confidence", 0.0),
+                "words": segment["words"]
+            })
+
+    speech_seconds = sum(c["end"] - c["start"] for c in chunks)
+    cached = sum(1 for r in results if r["cached"])
+    return {
+        "segments": segments,
+        "metadata": {
+            "duration": format_timestamp(duration),
+            "speakers_detected": 1,
+            "language": language,
+            "backend": backend.cache_id(),
+            "chunks": len(chunks),
+            "cached_chunks": cached,
+            "speech_seconds": round(speech_seconds, 3),
+            "processing_notes": f"Transcribed {speech_seconds:.1f}s of speech out of {duration:.1f}s in "
+                                f"{len(chunks)} chunks ({cached} from cache) with {backend.cache_id()}."
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VAD-gated parallel transcription")
+    parser.add_argument("audio")
+    parser.add_argument("--backend", default=StandInBackend.name, choices=sorted(BACKENDS))
+    parser.add_argument("--model", help="Model name for model-based backends")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="Transcript JSON path (default: print)")
+    args = parser.parse_args()
+
+    options = {"model": args.model} if args.model else {}
+    transcript = transcribe(args.audio, get_backend(args.backend, **options), args.language, args.workers)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(transcript, f, indent=2)
+        print(f"Transcript saved to: {args.output}")
+        print(transcript["metadata"]["processing_notes"])
+    else:
+        print(json.dumps(transcript, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Multi-resolution waveform and loudness overview for an episode.
+
+One streaming decode builds per-block min/max/RMS at the finest level; every
+coarser level halves the resolution. The pyramid is stored as a compact
+binary sidecar (<audio>.wpyr) and memory-mapped for queries, so drawing a
+waveform for any range or finding a quiet cut point never touches the audio
+again.
+
+Examples:
+    python waveform_pyramid.py build 08_gpt5_enhanced.wav
+    python waveform_pyramid.py peaks 08_gpt5_enhanced.wav 0 38.2 1920
+    python waveform_pyramid.py quiet 08_gpt5_enhanced.wav 12.1
+"""
+import argparse
+import json
+import struct
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"WPYR"
+VERSION = 1
+HEADER_FORMAT = "<4sHIIHQQqH"
+ANALYSIS_SAMPLE_RATE = 48000
+BASE_BLOCK = 256      # samples per block at level 0 (~5.3 ms at 48 kHz)
+FACTOR = 2            # blocks merged per step up the pyramid
+READ_BLOCKS = 4096    # level-0 blocks decoded per read
+
+
+def sidecar_path_for(audio_path) -> Path:
+    audio_path = Path(audio_path)
+    return audio_path.with_name(audio_path.name + ".wpyr")
+
+
+def _reduce_level(mins, maxs, rms) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Merge FACTOR neighbouring blocks into one"""
+    count = -(-len(rms) // FACTOR)
+    pad = count * FACTOR - len(rms)
+    if pad:
+        mins = np.concatenate([mins, np.repeat(mins[-1:], pad)])
+        maxs = np.concatenate([maxs, np.repeat(maxs[-1:], pad)])
+        rms = np.concatenate([rms, np.repeat(rms[-1:], pad)])
+    mins = mins.reshape(count, FACTOR).min(axis=1)
+    maxs = maxs.reshape(count, FACTOR).max(axis=1)
+    rms = np.sqrt((rms.reshape(count, FACTOR).astype(np.float64) ** 2).mean(axis=1)).astype(np.float32)
+    return mins, maxs, rms
+
+
+def build_pyramid(audio_path, sidecar_path=None, sample_rate: int = ANALYSIS_SAMPLE_RATE,
+                  block_consumers: Optional[List] = None) -> Path:
+    """Decode the audio once and write the min/max/RMS pyramid sidecar
+
+    block_consumers are called with every decoded float32 chunk (whole level-0
+    blocks except for the final chunk) so other per-window analyses can share
+    the pass.
+    """
+    audio_path = Path(audio_path)
+    sidecar_path = Path(sidecar_path) if sidecar_path else sidecar_path_for(audio_path)
+
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-i", str(audio_path),
+        "-map", "0:a:0", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "f32le", "-"
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+
+    level0_min, level0_max, level0_rms = [], [], []
+    total_samples = 0
+    read_size = BASE_BLOCK * READ_BLOCKS * 4
+
+    # read() returns full chunks until EOF, so only the last chunk can end mid-block
+    while True:
+        data = process.stdout.read(read_size)
+        if not data:
+            break
+        samples = np.frombuffer(data[:len(data) - len(data) % 4], dtype=np.float32)
+        total_samples += len(samples)
+
+        full = len(samples) - len(samples) % BASE_BLOCK
+        if full:
+            blocks = samples[:full].reshape(-1, BASE_BLOCK)
+            level0_min.append(blocks.min(axis=1))
+            level0_max.append(blocks.max(axis=1))
+            level0_rms.append(np.sqrt((blocks.astype(np.float64) ** 2).mean(axis=1)).astype(np.float32))
+        if len(samples) > full:
+            tail = samples[full:]
+            level0_min.append(tail.min(keepdims=True))
+            level0_max.append(tail.max(keepdims=True))
+            level0_rms.append(np.sqrt((tail.astype(np.float64) ** 2).mean(keepdims=True)).astype(np.float32))
+        for consumer in block_consumers or []:
+            consumer(samples)
+
+    process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {audio_path}")
+    if not level0_rms:
+        raise RuntimeError(f"No audio decoded from {audio_path}")
+
+    mins = np.concatenate(level0_min)
+    maxs = np.concatenate(level0_max)
+    rms = np.concatenate(level0_rms)
+    levels = [(mins, maxs, rms)]
+    while len(levels[-1][2]) > 1:
+        levels.append(_reduce_level(*levels[-1]))
+
+    stat = audio_path.stat()
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, sample_rate, BASE_BLOCK, FACTOR,
+                         total_samples, stat.st_size, stat.st_mtime_ns, len(levels))
+    header += struct.pack(f"<{len(levels)}Q", *(len(level[2]) for level in levels))
+    header += b"\0" * (-len(header) % 8)
+
+    with open(sidecar_path, 'wb') as f:
+        f.write(header)
+        for level_min, level_max, level_rms in levels:
+            f.write(level_rms.astype('<f4').tobytes())
+            f.write(np.clip(np.round(level_min * 32767), -32768, 32767).astype('<i2').tobytes())
+            f.write(np.clip(np.round(level_max * 32767), -32768, 32767).astype('<i2').tobytes())
+    return sidecar_path
+
+
+class WaveformPyramid:
+    """Memory-mapped reader for a .wpyr sidecar"""
+
+    def __init__(self, sidecar_path):
+        self.path = Path(sidecar_path)
+        with open(self.path, 'rb') as f:
+            fixed = f.read(struct.calcsize(HEADER_FORMAT))
+            (magic, version, self.sample_rate, self.base_block, self.factor, self.total_samples,
+             self.source_size, self.source_mtime_ns, level_count) = struct.unpack(HEADER_FORMAT, fixed)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.path} is not a version {VERSION} waveform pyramid")
+            counts = struct.unpack(f"<{level_count}Q", f.read(8 * level_count))
+        offset = struct.calcsize(HEADER_FORMAT) + 8 * level_count
+        offset += -offset % 8
+
+        self.levels = []
+        for count in counts:
+            rms = np.memmap(self.path, dtype='<f4', mode='r', offset=offset, shape=(count,))
+            offset += 4 * count
+            mins = np.memmap(self.path, dtype='<i2', mode='r', offset=offset, shape=(count,))
+            offset += 2 * count
+            maxs = np.memmap(self.path, dtype='<i2', mode='r', offset=offset, shape=(count,))
+            offset += 2 * count
+            self.levels.append((mins, maxs, rms))
+
+    @classmethod
+    def for_audio(cls, audio_path, build: bool = True) -> "WaveformPyramid":
+        """Open the sidecar for an audio file, (re)building it when stale"""
+        audio_path = Path(audio_path)
+        sidecar = sidecar_path_for(audio_path)
+        if sidecar.exists():
+            pyramid = cls(sidecar)
+            stat = audio_path.stat()
+            if pyramid.source_size == stat.st_size and pyramid.source_mtime_ns == stat.st_mtime_ns:
+                return pyramid
+        if not build:
+            raise FileNotFoundError(f"No up-to-date waveform pyramid for {audio_path}")
+        return cls(build_pyramid(audio_path, sidecar))
+
+    @property
+    def duration(self) -> float:
+        return self.total_samples / self.sample_rate
+
+    def block_seconds(self, level: int) -> float:
+        return self.base_block * self.factor ** level / self.sample_rate
+
+    def _level_for(self, seconds_per_unit: float) -> int:
+        """Coarsest level whose blocks are no longer than seconds_per_unit"""
+        ratio = seconds_per_unit * self.sample_rate / self.base_block
+        if ratio < 1:
+            return 0
+        return min(int(np.log(ratio) / np.log(self.factor) + 1e-9), len(self.levels) - 1)
+
+    def _block_range(self, level: int, start: float, end: float) -> Tuple[int, int]:
+        block = self.block_seconds(level)
+        count = len(self.levels[level][2])
+        first = min(max(int(start / block), 0), count - 1)
+        last = min(max(int(np.ceil(end / block)), first + 1), count)
+        return first, last
+
+    def peaks(self, start: float, end: float, pixels: int) -> Dict[str, List[float]]:
+        """Min/max/RMS per pixel column for the range start..end"""
+        level = self._level_for((end - start) / pixels)
+        mins, maxs, rms = self.levels[level]
+        first, last = self._block_range(level, start, end)
+
+        edges = np.linspace(first, last, pixels + 1).astype(np.int64)
+        edges = np.minimum(edges[:-1], last - 1)
+        power = rms[first:last].astype(np.float64) ** 2
+        sums = np.add.reduceat(power, edges - first)
+        counts = np.diff(np.append(edges, last))
+        return {
+            "level": level,
+            "min": (np.minimum.reduceat(mins[first:last], edges - first) / 32767).round(4).tolist(),
+            "max": (np.maximum.reduceat(maxs[first:last], edges - first) / 32767).round(4).tolist(),
+            "rms": np.sqrt(sums / np.maximum(counts, 1)).round(5).tolist()
+        }
+
+    def rms_db(self, start: float, end: float) -> float:
+        """RMS level of a range in dBFS"""
+        level = self._level_for((end - start) / 64)
+        first, last = self._block_range(level, start, end)
+        power = (self.levels[level][2][first:last].astype(np.float64) ** 2).mean()
+        return float(10 * np.log10(max(power, 1e-20)))
+
+    def window_rms_db(self, start: float, end: float, window: float) -> Tuple[np.ndarray, float]:
+        """RMS level in dBFS of consecutive `window`-second windows from start, and the window length
+
+        Window edges rarely fall on block boundaries, so the cumulative block
+        energy is interpolated at each edge: a straddling block's energy is
+        split between its windows in proportion to its overlap with each.
+        """
+        level = self._level_for(window / 8)
+        block = self.block_seconds(level)
+        first, last = self._block_range(level, start, end)
+        power = self.levels[level][2][first:last].astype(np.float64) ** 2
+        count = int((min(end, last * block) - start) / window + 1e-9)
+        if count < 1:
+            return np.zeros(0), window
+        cumulative = np.concatenate([[0.0], np.cumsum(power)])
+        energy = np.interp(start + window * np.arange(count + 1), block * np.arange(first, last + 1), cumulative)
+        return 10 * np.log10(np.maximum(np.diff(energy) * block / window, 1e-20)), window
+
+    def quietest(self, around: float, window: float = 0.2, search: float = 1.0) -> Dict[str, float]:
+        """Quietest window of `window` seconds within +/- search of `around`"""
+        level = self._level_for(window / 8)
+        block = self.block_seconds(level)
+        first, last = self._block_range(level, max(0.0, around - search), min(self.duration, around + search))
+        width = max(1, int(round(window / block)))
+
+        power = self.levels[level][2][first:last].astype(np.float64) ** 2
+        if len(power) <= width:
+            best = 0
+            energy = power.mean() if len(power) else 0.0
+        else:
+            cumulative = np.concatenate([[0.0], np.cumsum(power)])
+            windows = (cumulative[width:] - cumulative[:-width]) / width
+            best = int(np.argmin(windows))
+            energy = windows[best]
+
+        start = (first + best) * block
+        return {
+            "start": round(start, 4),
+            "end": round(start + width * block, 4),
+            "center": round(start + width * block / 2, 4),
+            "rms_db": round(float(10 * np.log10(max(energy, 1e-20))), 2)
+        }
+
+
+def snap_to_quiet(audio_path, seconds: float, window: float = 0.2, search: float = 0.5) -> float:
+    """Move a cut point to the centre of the quietest nearby window"""
+    return WaveformPyramid.for_audio(audio_path).quietest(seconds, window, search)["center"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Waveform/loudness overview pyramid")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = sub.add_parser("build", help="Build the .wpyr sidecar")
+    build_cmd.add_argument("audio")
+
+    peaks_cmd = sub.add_parser("peaks", help="Min/max/RMS columns for a time range")
+    peaks_cmd.add_argument("audio")
+    peaks_cmd.add_argument("start", type=float)
+    peaks_cmd.add_argument("end", type=float)
+    peaks_cmd.add_argument("pixels", type=int)
+
+    quiet_cmd = sub.add_parser("quiet", help="Quietest window near a timestamp")
+    quiet_cmd.add_argument("audio")
+    quiet_cmd.add_argument("time", type=float)
+    quiet_cmd.add_argument("--window", type=float, default=0.2)
+    quiet_cmd.add_argument("--search", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        path = build_pyramid(args.audio)
+        pyramid = WaveformPyramid(path)
+        print(f"Waveform pyramid saved to: {path}")
+        print(f"  Duration: {pyramid.duration:.3f}s, levels: {len(pyramid.levels)}, size: {path.stat().st_size} bytes")
+    elif args.command == "peaks":
+        pyramid = WaveformPyramid.for_audio(args.audio)
+        print(json.dumps(pyramid.peaks(args.start, args.end, args.pixels)))
+    else:
+        pyramid = WaveformPyramid.for_audio(args.audio)
+        print(json.dumps(pyramid.quietest(args.time, args.window, args.search), indent=2))
+
+
+if __name__ == "__main__":
+    main()